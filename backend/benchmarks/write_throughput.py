@@ -0,0 +1,207 @@
+"""
+    Write throughput of a service's tables before and after 0002_rationalize_indexes.
+
+    Migrates two scratch schemas of the database in POSTGRES_URL, one to the baseline
+    revision and one to head, runs the same inserts and updates against both and drops
+    them again, so it leaves the service's own tables alone. From backend/:
+
+        POSTGRES_URL=postgresql+psycopg2://... python -m benchmarks.write_throughput courses_topics --rows 5000 --workers 8
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert, text, update
+from sqlalchemy.pool import NullPool
+from common.migrations import upgrade_database
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = ("courses_topics", "discussion_forum", "quiz_service")
+# Revision before the indexes were rationalized
+BEFORE = "0001"
+
+# Every row gets a different text, like the real thing
+WORDS = "lecture notes assignment week exam review lab solution reading project deadline question answer".split()
+
+
+def _sentence(n: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(n))
+
+
+def _timestamp() -> datetime:
+    return datetime(2024, 1, 1) + timedelta(seconds=random.randrange(365 * 24 * 3600))
+
+
+def _courses_topics(models):
+    now = datetime.now()
+
+    def seed(conn):
+        conn.execute(insert(models.Courses), [
+            {
+                "course_code": f"BENCH{i}", "course_name": _sentence(3), "course_description": _sentence(30),
+                "course_created_by": "bench", "course_created_timestamp": now, "course_updated_by": "bench",
+                "course_updated_timestamp": now, "course_is_deleted": False
+            } for i in range(1, 51)
+        ])
+
+    steps = (
+        ("insert topics", lambda i: insert(models.Topics).values(
+            topic_name=_sentence(4), topic_description=_sentence(40), course_id=i % 50 + 1, topic_is_released=False,
+            topic_created_by="bench", topic_created_timestamp=_timestamp(), topic_updated_by="bench",
+            topic_updated_timestamp=_timestamp(), topic_is_deleted=False
+        )),
+        ("insert contents", lambda i: insert(models.Contents).values(
+            course_id=i % 50 + 1, topic_id=i + 1, content_id=f"bench-{i}", content_name=f"{_sentence(2)}.pdf",
+            content_type="application/pdf", content_created_by="bench", content_created_timestamp=_timestamp(),
+            content_updated_by="bench", content_updated_timestamp=_timestamp()
+        )),
+        ("insert enrollments", lambda i: insert(models.UserXrefCourse).values(
+            user_id=f"user-{i // 50}", course_id=i % 50 + 1, enrollment_date=_timestamp()
+        )),
+        ("update topics", lambda i: update(models.Topics).where(models.Topics.topic_id == i + 1).values(
+            topic_description=_sentence(40), topic_is_released=True, topic_updated_by="bench", topic_updated_timestamp=_timestamp()
+        )),
+    )
+    return seed, steps
+
+
+def _discussion_forum(models):
+    def seed(conn):
+        pass
+
+    steps = (
+        ("insert posts", lambda i: insert(models.Posts).values(
+            post_title=_sentence(6), post_content=_sentence(80), post_created_by=f"user-{i % 200}",
+            post_created_timestamp=_timestamp(), post_updated_timestamp=_timestamp(), vote_count=0,
+            upvotes_by="", downvotes_by="", course_id=i % 50 + 1
+        )),
+        ("insert comments", lambda i: insert(models.Comments).values(
+            comment_content=_sentence(40), comment_created_by=f"user-{i % 200}", comment_created_timestamp=_timestamp(),
+            comment_updated_timestamp=_timestamp(), vote_count=0, upvotes_by="", downvotes_by="",
+            comment_in_post=i + 1, reply_to=""
+        )),
+        ("vote on posts", lambda i: update(models.Posts).where(models.Posts.post_id == i + 1).values(
+            vote_count=models.Posts.vote_count + 1, upvotes_by=models.Posts.upvotes_by + f"user-{i % 200},"
+        )),
+        ("vote on comments", lambda i: update(models.Comments).where(models.Comments.comment_id == i + 1).values(
+            vote_count=models.Comments.vote_count + 1, upvotes_by=models.Comments.upvotes_by + f"user-{i % 200},"
+        )),
+    )
+    return seed, steps
+
+
+def _quiz_service(models):
+    def seed(conn):
+        pass
+
+    steps = (
+        ("insert quizzes", lambda i: insert(models.Quiz).values(
+            quiz_description=_sentence(10), max_score=10.0, course_id=i % 50 + 1, quiz_created_by="bench",
+            quiz_created_timestamp=_timestamp(),
+            quiz_content=[{"question": _sentence(12), "options": [_sentence(3) for _ in range(4)], "answer": 0}]
+        )),
+        ("insert attempts", lambda i: insert(models.QuizXrefUser).values(
+            quiz_id=i + 1, user_id=f"user-{i % 200}", score=random.uniform(0, 10), date_attempted=_timestamp()
+        )),
+    )
+    return seed, steps
+
+
+# Per service, a seed run once and the timed steps as (name, statement of row i) pairs
+WORKLOADS = {
+    "courses_topics": _courses_topics,
+    "discussion_forum": _discussion_forum,
+    "quiz_service": _quiz_service,
+}
+
+
+def _wal_position(conn) -> int:
+    return conn.execute(text("SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), '0/0')")).scalar()
+
+
+def _run_step(engine, statement, rows: int, workers: int) -> tuple:
+    """
+        Runs statement(i) for every row, one transaction each like the API. Returns rows per
+        second and WAL bytes per row, which counts every index page a write touched.
+    """
+    def work(worker: int):
+        with engine.connect() as conn:
+            for i in range(worker, rows, workers):
+                conn.execute(statement(i))
+                conn.commit()
+
+    with engine.connect() as conn:
+        wal_start = _wal_position(conn)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(work, worker) for worker in range(workers)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+    with engine.connect() as conn:
+        wal_bytes = _wal_position(conn) - wal_start
+    return rows / elapsed, float(wal_bytes) / rows
+
+
+def benchmark(service: str, rows: int, workers: int) -> dict:
+    """Returns {step: ((rows/s, WAL bytes/row) before, (rows/s, WAL bytes/row) after)} for the service."""
+    models = importlib.import_module(f"{service}.models")
+    service_dir = os.path.join(BACKEND_DIR, service)
+    url = os.getenv("POSTGRES_URL")
+    admin = create_engine(url, poolclass=NullPool)
+    results = {}
+
+    for label, revision in (("before", BEFORE), ("after", "head")):
+        schema = f"bench_{service}_{label}"
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+        # Waiting on the WAL flush of every commit costs the same before and after and would drown the difference
+        options = f"-csearch_path={schema} -csynchronous_commit=off"
+        engine = create_engine(url, pool_size=workers, connect_args={"options": options})
+        try:
+            upgrade_database(engine, service_dir, revision)
+            seed, steps = WORKLOADS[service](models)
+            with engine.begin() as conn:
+                seed(conn)
+            random.seed(0)
+            for name, statement in steps:
+                results.setdefault(name, {})[label] = _run_step(engine, statement, rows, workers)
+        finally:
+            engine.dispose()
+            with admin.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+
+    admin.dispose()
+    return {name: (result["before"], result["after"]) for name, result in results.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("services", nargs="*", help=f"any of {', '.join(SERVICES)}, all of them when none are given")
+    parser.add_argument("--rows", type=int, default=5000, help="rows written by every step")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent connections")
+    args = parser.parse_args(argv)
+    unknown = set(args.services) - set(SERVICES)
+    if unknown:
+        parser.error(f"unknown services: {', '.join(sorted(unknown))}")
+
+    if not os.getenv("POSTGRES_URL"):
+        sys.exit("POSTGRES_URL is not set")
+
+    print(f"{'step':<40}{'rows/s before':>15}{'after':>8}{'change':>8}{'WAL B/row before':>18}{'after':>8}{'change':>8}")
+    for service in args.services or SERVICES:
+        for name, (before, after) in benchmark(service, args.rows, args.workers).items():
+            print(
+                f"{service + ': ' + name:<40}"
+                f"{before[0]:>15.0f}{after[0]:>8.0f}{(after[0] / before[0] - 1) * 100:>7.0f}%"
+                f"{before[1]:>18.0f}{after[1]:>8.0f}{(after[1] / before[1] - 1) * 100:>7.0f}%",
+                flush=True
+            )
+
+
+if __name__ == "__main__":
+    main()
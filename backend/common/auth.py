@@ -0,0 +1,109 @@
+import os
+import time
+import hashlib
+from typing import Annotated
+import jwt
+from fastapi import Depends, FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from common.response_format import error_response
+from common.ttl_cache import TTLCache, MISSING
+
+# Defaults match the Google ID tokens issued through NextAuth on the frontend
+JWT_JWKS_URL = os.getenv("JWT_JWKS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+JWT_ALGORITHMS = os.getenv("JWT_ALGORITHMS", "RS256").split(",")
+JWT_ISSUERS = os.getenv("JWT_ISSUERS", "accounts.google.com,https://accounts.google.com").split(",")
+# OAuth client ID the tokens must be issued for, without it every token is refused
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE") or os.getenv("GOOGLE_CLIENT_ID")
+JWT_JWKS_CACHE_SECONDS = int(os.getenv("JWT_JWKS_CACHE_SECONDS", "3600"))
+# A JWKS fetch holds a threadpool thread, so it gives up well before clients would
+JWT_JWKS_TIMEOUT_SECONDS = float(os.getenv("JWT_JWKS_TIMEOUT_SECONDS", "5"))
+JWT_CLAIMS_CACHE_SIZE = int(os.getenv("JWT_CLAIMS_CACHE_SIZE", "10000"))
+JWT_LEEWAY_SECONDS = int(os.getenv("JWT_LEEWAY_SECONDS", "30"))
+
+
+class AuthError(Exception):
+    """Raised by the auth dependency, rendered with the common error envelope."""
+
+    def __init__(self, message: str, status_code: int = 401):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+# Signing keys are fetched once and reused until the JWKS cache lifespan runs out
+jwks_client = jwt.PyJWKClient(JWT_JWKS_URL, cache_keys=True, lifespan=JWT_JWKS_CACHE_SECONDS, timeout=JWT_JWKS_TIMEOUT_SECONDS)
+
+# Verified claims keyed by token digest, each entry lives until the token expires
+claims_cache = TTLCache(maxsize=JWT_CLAIMS_CACHE_SIZE)
+
+
+def _cached_claims(token: str):
+    return claims_cache.get(hashlib.sha256(token.encode("utf-8")).digest())
+
+
+def verify_token(token: str) -> dict:
+    """
+        Verify the token signature and standard claims, memoizing the result until exp.
+        May fetch the signing keys, so callers on the event loop run it in the threadpool.
+    """
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = claims_cache.get(digest)
+    if claims is not MISSING:
+        return claims
+
+    # Skipping the audience check would accept Google tokens issued to any other app
+    if not JWT_AUDIENCE:
+        raise AuthError("Authentication is not configured", status_code=503)
+
+    try:
+        signing_key = jwks_client.get_signing_key_from_jwt(token)
+        claims = jwt.decode(
+            token,
+            signing_key.key,
+            algorithms=JWT_ALGORITHMS,
+            audience=JWT_AUDIENCE,
+            issuer=JWT_ISSUERS,
+            leeway=JWT_LEEWAY_SECONDS,
+            options={"require": ["exp", "sub", "aud"]}
+        )
+    except jwt.ExpiredSignatureError:
+        raise AuthError("Token has expired")
+    except (jwt.PyJWTError, ValueError):
+        raise AuthError("Invalid token")
+
+    ttl = claims["exp"] + JWT_LEEWAY_SECONDS - time.time()
+    if ttl > 0:
+        claims_cache.set(digest, claims, ttl=ttl)
+    return claims
+
+
+async def get_current_user_id(authorization: str = Header(...)) -> str:
+    """
+        FastAPI dependency returning the verified user ID from the Bearer token. Tokens seen
+        before are answered from the claims cache on the event loop, only new ones go to the
+        threadpool for verification.
+    """
+    if not authorization.startswith("Bearer "):
+        raise AuthError("Invalid Authorization header format")
+    token = authorization.split(" ")[1]
+    claims = _cached_claims(token)
+    if claims is MISSING:
+        claims = await run_in_threadpool(verify_token, token)
+
+    user_id = claims.get("sub")
+    if not user_id:
+        raise AuthError("User ID not found in token")
+    return user_id
+
+
+user_dependency = Annotated[str, Depends(get_current_user_id)]
+
+
+def register_auth_error_handler(app: FastAPI):
+    @app.exception_handler(AuthError)
+    async def auth_error_handler(request: Request, exc: AuthError):
+        return JSONResponse(
+            status_code=exc.status_code,
+            content=error_response(message=exc.message)
+        )
@@ -0,0 +1,89 @@
+import os
+import time
+import uuid
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from prometheus_client import Counter, Gauge, Histogram
+
+# Sizes are per engine and per process, so every replica the HPA adds opens up to
+# DB_POOL_SIZE + DB_MAX_OVERFLOW more connections on each engine it actually uses
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# PgBouncer in transaction mode hands every transaction a different server
+# connection, so named prepared statements cannot be cached across them
+DB_PGBOUNCER_MODE = os.getenv("DB_PGBOUNCER_MODE", "false").lower() == "true"
+
+DB_POOL_CAPACITY = DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+POOL_LABELS = ["service", "engine"]
+
+pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a connection from the pool",
+    POOL_LABELS,
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+pool_checkout_timeouts = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT",
+    POOL_LABELS
+)
+pool_checked_out = Gauge("db_pool_checked_out", "Connections currently checked out", POOL_LABELS)
+pool_capacity = Gauge("db_pool_capacity", "Pool size plus max overflow", POOL_LABELS)
+pool_saturation = Gauge("db_pool_saturation", "Checked out connections over pool capacity", POOL_LABELS)
+
+
+class InstrumentedPoolMixin:
+    """Times every checkout, including the wait for a free slot, and counts timeouts."""
+
+    metrics_labels = ("unknown", "unknown")
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_checkout_timeouts.labels(*self.metrics_labels).inc()
+            raise
+        finally:
+            pool_checkout_seconds.labels(*self.metrics_labels).observe(time.perf_counter() - start)
+
+
+def instrumented_pool_class(base, service: str, engine: str):
+    # A subclass per engine keeps the labels when the engine recreates its pool on dispose
+    return type(f"Instrumented{base.__name__}", (InstrumentedPoolMixin, base), {"metrics_labels": (service, engine)})
+
+
+def engine_options(service: str, is_async: bool = False) -> dict:
+    """Keyword arguments for create_engine / create_async_engine from the DB_* settings."""
+    options = {
+        "poolclass": instrumented_pool_class(
+            AsyncAdaptedQueuePool if is_async else QueuePool, service, "async" if is_async else "sync"
+        ),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if DB_PGBOUNCER_MODE and is_async:
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            # Statement names must be unique or they clash with another client's on the same server connection
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return options
+
+
+def export_pool_metrics(engine, service: str, kind: str):
+    """Report checkout and saturation gauges for the engine's current pool."""
+    labels = (service, kind)
+    pool_capacity.labels(*labels).set(DB_POOL_CAPACITY)
+    pool_checked_out.labels(*labels).set_function(lambda: engine.pool.checkedout())
+    pool_saturation.labels(*labels).set_function(
+        lambda: engine.pool.checkedout() / DB_POOL_CAPACITY if DB_POOL_CAPACITY else 0
+    )
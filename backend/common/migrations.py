@@ -0,0 +1,72 @@
+import os
+from alembic import command, context
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import NullPool
+
+# Advisory lock held while migrating, so replicas starting together apply each migration once
+MIGRATION_LOCK_KEY = 72400125
+
+
+def upgrade_database(engine, service_dir: str, revision: str = "head"):
+    """
+        Apply the migrations of the service whose alembic.ini is in service_dir, in one
+        transaction. Replicas starting together queue on the lock, the first one migrates
+        and the rest find nothing left to do.
+    """
+    config = Config(os.path.join(service_dir, "alembic.ini"))
+    with engine.begin() as connection:
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+def missing_tables(*names) -> set:
+    """
+        Tables of names not in the database yet. Baseline migrations only create these,
+        since databases made by create_all before migrations existed already hold the rest.
+        Those tables are left as they were, later revisions add what they lack.
+    """
+    if context.is_offline_mode():
+        return set(names)
+    existing = set(inspect(context.get_bind()).get_table_names())
+    return set(names) - existing
+
+
+def missing_columns(table: str, *names) -> set:
+    """
+        Columns of names that table does not have yet. Tables made by create_all before
+        migrations existed lack every column added to the model since, and create_all never
+        altered them.
+    """
+    if context.is_offline_mode():
+        return set(names)
+    existing = {column["name"] for column in inspect(context.get_bind()).get_columns(table)}
+    return set(names) - existing
+
+
+def run_env(target_metadata):
+    """Body of every service's migrations/env.py."""
+    if context.is_offline_mode():
+        context.configure(url=os.getenv("POSTGRES_URL"), target_metadata=target_metadata, literal_binds=True)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    # Handed over by upgrade_database, already locked and in a transaction
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        _run_online(connection, target_metadata)
+        return
+
+    # Run from the alembic command line
+    engine = create_engine(os.getenv("POSTGRES_URL"), poolclass=NullPool)
+    with engine.begin() as connection:
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        _run_online(connection, target_metadata)
+
+
+def _run_online(connection, target_metadata):
+    context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
+    with context.begin_transaction():
+        context.run_migrations()
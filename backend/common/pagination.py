@@ -0,0 +1,86 @@
+import os
+import json
+import base64
+from datetime import date, datetime
+from typing import NamedTuple
+from sqlalchemy import tuple_
+
+# Rows per page when a client does not ask for a size, and the most one page may hold
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "100"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+
+class InvalidPage(ValueError):
+    pass
+
+
+class Page(NamedTuple):
+    rows: list
+    next_cursor: str    # None on the last page
+
+
+def page_size(limit: int = None) -> int:
+    """The client's limit capped at PAGE_SIZE_MAX, PAGE_SIZE when it sent none."""
+    if limit is None:
+        return PAGE_SIZE
+    if limit < 1:
+        raise InvalidPage("limit must be at least 1")
+    return min(limit, PAGE_SIZE_MAX)
+
+
+class Keyset:
+    """
+        A listing order over indexed columns, the last of them unique, paged by comparing
+        against the sort key of the last row already sent rather than by OFFSET, so every
+        page is one index range scan however deep it is. Cursors are opaque to clients and
+        only valid for the keyset that made them.
+    """
+
+    def __init__(self, name: str, *columns, descending: bool = False):
+        self.name = name
+        self.columns = columns
+        self.descending = descending
+
+    def encode(self, values: tuple) -> str:
+        values = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+        return base64.urlsafe_b64encode(json.dumps([self.name, values]).encode()).decode()
+
+    def decode(self, cursor: str) -> tuple:
+        try:
+            name, values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if name != self.name or len(values) != len(self.columns):
+                raise InvalidPage("Cursor belongs to a different listing")
+            return tuple(self._parse(column, value) for column, value in zip(self.columns, values))
+        except InvalidPage:
+            raise
+        except Exception:
+            raise InvalidPage("Invalid cursor")
+
+    @staticmethod
+    def _parse(column, value):
+        python_type = column.type.python_type
+        if value is None or isinstance(value, python_type):
+            return value
+        if python_type in (date, datetime):
+            return python_type.fromisoformat(value)
+        return python_type(value)
+
+    def apply(self, stmt, cursor: str = None, limit: int = PAGE_SIZE):
+        """Order the statement, skip past the cursor and fetch one row beyond the page to tell whether another follows."""
+        if cursor:
+            sort_key, after = tuple_(*self.columns), tuple_(*self.decode(cursor))
+            stmt = stmt.filter(sort_key < after if self.descending else sort_key > after)
+        return stmt.order_by(*(column.desc() if self.descending else column for column in self.columns)).limit(limit + 1)
+
+    def page(self, rows, limit: int, key=None) -> Page:
+        """
+            Trim rows fetched with apply() to the page and make the cursor for the next one.
+            key maps a row to its sort values, by default read off the row by column name.
+        """
+        rows = list(rows)
+        if len(rows) <= limit:
+            return Page(rows, None)
+        rows = rows[:limit]
+        last = rows[-1]
+        values = key(last) if key else tuple(getattr(last, column.key) for column in self.columns)
+        return Page(rows, self.encode(values))
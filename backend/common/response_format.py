@@ -1,13 +1,17 @@
 from datetime import datetime
 from fastapi import HTTPException
 
-def success_response(data: dict, message: str = "Operation successful"):
-    return {
+def success_response(data: dict, message: str = "Operation successful", next_cursor: str = None):
+    response = {
         "status": "success",
         "message": message,
         "data": data,
         "timestamp": datetime.utcnow().isoformat()
     }
+    # Only paginated lists with more rows to fetch carry a cursor
+    if next_cursor is not None:
+        response["next_cursor"] = next_cursor
+    return response
 
 def error_response(message: str, details: dict = {}):
     return {
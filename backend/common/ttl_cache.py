@@ -0,0 +1,110 @@
+import time
+import threading
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+        Thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+        Entries can carry tags so every entry for, say, one course can be
+        evicted together without scanning the whole cache. Evicting a tag also
+        gives it a new generation, so a value loaded before the eviction can be
+        refused instead of stored stale.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}             # tag -> set of keys
+        # tag -> generation, least recently read first and at most maxsize of them. Generations are
+        # never handed out twice, so a tag dropped here only costs the stores of loads in flight
+        self._generations = OrderedDict()
+        self._last_generation = 0
+        self._epoch = 0             # times cleared
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        """Return the cached value, or default when absent or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def generation(self, tags) -> tuple:
+        """Snapshot of the tags' generations, read before loading a value to store under them."""
+        with self._lock:
+            return (self._epoch, *(self._generation(tag) for tag in tags))
+
+    def set(self, key, value, ttl: float = None, tags=(), generation: tuple = None) -> bool:
+        """
+            Store a value for ttl seconds (the cache default when None). With a generation
+            from before the value was loaded, the value is dropped if any of its tags was
+            evicted since. Returns whether it was stored.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != (self._epoch, *(self._generations.get(tag) for tag in tags)):
+                return False
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires_at, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+            return True
+
+    def pop(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def evict_tag(self, tag) -> int:
+        """Drop every entry stored with the given tag, returning how many went."""
+        with self._lock:
+            # The next read gives the tag a generation no snapshot has
+            self._generations.pop(tag, None)
+            keys = self._tags.pop(tag, set())
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+            # The new epoch already outdates every snapshot taken before
+            self._generations.clear()
+            self._epoch += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def _generation(self, tag) -> int:
+        generation = self._generations.get(tag)
+        if generation is not None:
+            self._generations.move_to_end(tag)
+            return generation
+        self._last_generation += 1
+        self._generations[tag] = self._last_generation
+        if len(self._generations) > self.maxsize:
+            self._generations.popitem(last=False)
+        return self._last_generation
+
+    def _remove(self, key):
+        _, _, tags = self._data.pop(key, (None, None, ()))
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
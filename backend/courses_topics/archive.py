@@ -0,0 +1,207 @@
+import os
+import io
+import re
+import tarfile
+import zipfile
+from datetime import datetime
+from typing import NamedTuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import StreamingResponse
+from courses_topics import models
+from courses_topics import storage
+from courses_topics.content_cache import content_cache
+
+# Archive downloads streaming at once per process, further requests get a 503
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "8"))
+
+ARCHIVE_MEDIA_TYPES = {
+    "zip": "application/zip",
+    "tar": "application/x-tar",
+}
+
+_active_exports = 0
+
+# DOS timestamps in zip headers only cover these years, tar takes any time after the epoch
+ZIP_EARLIEST = datetime(1980, 1, 1)
+ZIP_LATEST = datetime(2107, 12, 31, 23, 59, 58)
+TAR_EARLIEST = datetime(1970, 1, 2)
+
+
+class ArchiveEntry(NamedTuple):
+    path: str
+    file_id: str
+    digest: str
+    created: object
+
+
+def try_acquire_export() -> bool:
+    global _active_exports
+    if _active_exports >= EXPORT_CONCURRENCY:
+        return False
+    _active_exports += 1
+    return True
+
+
+def release_export():
+    global _active_exports
+    _active_exports -= 1
+
+
+def safe_name(name: str, fallback: str) -> str:
+    # Archive paths come from user supplied names, so no separators or leading dots
+    name = re.sub(r"[\\/\x00-\x1f]", "_", name or "").strip().lstrip(".")
+    return name or fallback
+
+
+async def archive_entries(db: AsyncSession, topic_id: int = None, course_id: int = None, include_unreleased: bool = False) -> list:
+    """
+        List the files of a topic, or of every topic in a course under one folder per topic,
+        with one query. Duplicate names get a numbered suffix.
+    """
+    stmt = (
+        select(
+            models.Contents.content_id,
+            models.Contents.content_name,
+            models.Contents.content_blob,
+            models.Contents.content_created_timestamp,
+            models.ContentBlobs.blob_file_id,
+            models.Topics.topic_id,
+            models.Topics.topic_name
+        )
+        .join(models.Topics, models.Topics.topic_id == models.Contents.topic_id)
+        .outerjoin(models.ContentBlobs, models.ContentBlobs.blob_digest == models.Contents.content_blob)
+        .filter(models.Topics.topic_is_deleted.is_(False))
+        .order_by(models.Topics.topic_id, models.Contents.id)
+    )
+    if topic_id:
+        stmt = stmt.filter(models.Topics.topic_id == topic_id)
+    else:
+        stmt = stmt.filter(models.Topics.course_id == course_id)
+        if not include_unreleased:
+            stmt = stmt.filter(models.Topics.topic_is_released.is_(True))
+
+    entries = []
+    used = set()
+    for row in (await db.execute(stmt)).all():
+        name = safe_name(row.content_name, row.content_id)
+        if not topic_id:
+            name = f"{safe_name(row.topic_name, str(row.topic_id))}/{name}"
+        path, stem, ext, n = name, *os.path.splitext(name), 1
+        while path in used:
+            n += 1
+            path = f"{stem} ({n}){ext}"
+        used.add(path)
+        entries.append(ArchiveEntry(path, row.blob_file_id or row.content_id, row.content_blob, row.content_created_timestamp))
+    return entries
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable target for zipfile that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _entry_time(entry: ArchiveEntry, earliest: datetime, latest: datetime = None) -> datetime:
+    # Contents saved before timestamps were recorded have none, and formats only take a range
+    created = max(entry.created or datetime.now(), earliest)
+    return min(created, latest) if latest else created
+
+
+async def _open(entry: ArchiveEntry):
+    stream = None
+    if entry.digest:
+        stream = await content_cache.fetch(entry.digest, entry.file_id)
+    return stream or await storage.open_download(entry.file_id)
+
+
+async def _zip(entries: list):
+    sink = _Sink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for entry in entries:
+            stream = await _open(entry)
+            if stream is None:
+                continue
+            try:
+                info = zipfile.ZipInfo(entry.path, date_time=_entry_time(entry, ZIP_EARLIEST, ZIP_LATEST).timetuple()[:6])
+                info.external_attr = 0o644 << 16
+                # Known up front so zipfile writes ZIP64 headers for files over 4 GiB
+                info.file_size = stream.length
+                with archive.open(info, mode="w") as dest:
+                    async for chunk in storage.iter_download(stream):
+                        dest.write(chunk)
+                        yield sink.drain()
+            finally:
+                stream.close()
+            yield sink.drain()
+    # Central directory, written when the archive closes
+    yield sink.drain()
+
+
+async def _tar(entries: list):
+    for entry in entries:
+        stream = await _open(entry)
+        if stream is None:
+            continue
+        try:
+            info = tarfile.TarInfo(entry.path)
+            info.size = stream.length
+            info.mtime = int(_entry_time(entry, TAR_EARLIEST).timestamp())
+            info.mode = 0o644
+            yield info.tobuf(format=tarfile.PAX_FORMAT)
+            sent = 0
+            async for chunk in storage.iter_download(stream):
+                sent += len(chunk)
+                yield chunk
+            if sent != stream.length:
+                raise IOError(f"{entry.path} ended after {sent} of {stream.length} bytes")
+        finally:
+            stream.close()
+        yield b"\0" * (-sent % tarfile.BLOCKSIZE)
+    yield b"\0" * (2 * tarfile.BLOCKSIZE)
+
+
+async def stream_archive(entries: list, archive_format: str):
+    """
+        ZIP or tar body built on the fly while each file streams out of storage, so a
+        download holds one storage chunk at a time whatever the archive size. Files are
+        stored uncompressed, course material is mostly PDFs and video already compressed.
+        Storage files are closed synchronously, so also when the client goes away.
+    """
+    body = _zip(entries) if archive_format == "zip" else _tar(entries)
+    async for chunk in body:
+        if chunk:
+            yield chunk
+
+
+class ArchiveResponse(StreamingResponse):
+    """
+        Streams stream_archive and hands back the export slot taken with try_acquire_export
+        once the response is over, however it ends. The body's own cleanup would never run
+        for a client gone before the first chunk, and background tasks are skipped on a
+        disconnect.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            release_export()
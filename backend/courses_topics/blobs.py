@@ -0,0 +1,164 @@
+import os
+import asyncio
+from collections import Counter
+from bson import ObjectId
+from fastapi import UploadFile
+from sqlalchemy import select, update, delete, union, values, column, String, Integer
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from courses_topics import models
+from courses_topics import storage
+
+# Files streamed into storage at the same time by one upload_files call
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+
+
+def new_content_id() -> str:
+    # Each content row gets its own id so rows sharing a blob can still be addressed one by one
+    return str(ObjectId())
+
+
+async def upload_files(files: list, metadata: dict, concurrency: int = UPLOAD_CONCURRENCY, on_stored=None) -> list:
+    """
+        Stream files into storage concurrently, at most `concurrency` at a time, calling
+        on_stored with each StoredFile as it lands. If any upload fails, every file already
+        written is deleted before the error is raised.
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def upload(file: UploadFile):
+        async with slots:
+            stored = await storage.save_upload(file, metadata)
+        if on_stored:
+            on_stored(stored)
+        return stored
+
+    results = await asyncio.gather(*(upload(file) for file in files), return_exceptions=True)
+    stored_files = [result for result in results if isinstance(result, storage.StoredFile)]
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures:
+        await delete_files([stored.file_id for stored in stored_files])
+        raise failures[0]
+    return stored_files
+
+
+async def reference_blobs(db: AsyncSession, stored_files: list):
+    """
+        Take one blob reference per stored file with a single upsert in the caller's
+        transaction. Uploads whose bytes were already stored are deleted, so on
+        rollback the caller only has to delete the files it uploaded.
+    """
+    if not stored_files:
+        return
+
+    copies_by_digest = {}
+    for stored in stored_files:
+        copies_by_digest.setdefault(stored.sha256, []).append(stored)
+
+    # Sorted so concurrent uploads lock shared digests in the same order
+    stmt = insert(models.ContentBlobs).values([
+        {
+            "blob_digest": digest,
+            "blob_file_id": str(copies[0].file_id),
+            "blob_size": copies[0].length,
+            "blob_ref_count": len(copies)
+        }
+        for digest, copies in sorted(copies_by_digest.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.ContentBlobs.blob_digest],
+        set_={"blob_ref_count": models.ContentBlobs.blob_ref_count + stmt.excluded.blob_ref_count}
+    ).returning(models.ContentBlobs.blob_digest, models.ContentBlobs.blob_file_id)
+    kept = {row.blob_digest: row.blob_file_id for row in (await db.execute(stmt)).all()}
+
+    await delete_files([stored.file_id for stored in stored_files if str(stored.file_id) != kept[stored.sha256]])
+
+
+async def release_contents(db: AsyncSession, contents: list) -> list:
+    """
+        Delete content rows and drop their blob references in the caller's transaction.
+        Returns the stored file ids nothing references any more, to be deleted once
+        the transaction has committed.
+    """
+    removed = [(content.content_id, content.content_blob) for content in contents]
+    for content in contents:
+        await db.delete(content)
+    # The content rows must be gone before their blobs can be deleted
+    await db.flush()
+    return await release_blobs(db, removed)
+
+
+async def release_blobs(db: AsyncSession, removed: list) -> list:
+    """
+        Drop one blob reference per removed (content_id, content_blob) row with
+        set-based statements. Returns the stored file ids left unreferenced,
+        legacy contents own their file outright.
+    """
+    freed = [content_id for content_id, digest in removed if digest is None]
+    counts = Counter(digest for _, digest in removed if digest is not None)
+    if not counts:
+        await _drop_texts(db, freed)
+        return freed
+
+    released = values(
+        column("digest", String), column("count", Integer), name="released"
+    ).data(sorted(counts.items()))
+    await db.execute(
+        update(models.ContentBlobs)
+        .where(models.ContentBlobs.blob_digest == released.c.digest)
+        .values(blob_ref_count=models.ContentBlobs.blob_ref_count - released.c.count)
+        .execution_options(synchronize_session=False)
+    )
+    unreferenced = (await db.execute(
+        delete(models.ContentBlobs)
+        .where(models.ContentBlobs.blob_digest.in_(counts), models.ContentBlobs.blob_ref_count <= 0)
+        .returning(models.ContentBlobs.blob_file_id)
+        .execution_options(synchronize_session=False)
+    )).scalars().all()
+    await _drop_texts(db, freed + list(unreferenced))
+    return freed + list(unreferenced)
+
+
+async def _drop_texts(db: AsyncSession, file_ids: list):
+    # Extracted text goes with the last reference to its file
+    if file_ids:
+        await db.execute(
+            delete(models.ContentTexts)
+            .where(models.ContentTexts.text_file_id.in_(file_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def delete_files(file_ids: list) -> int:
+    if not file_ids:
+        return 0
+    return await storage.delete_many(file_ids)
+
+
+def referenced_file_ids(after: str = None):
+    """
+        Every stored file id a row still points at, in byte order so it lines up
+        with storage listings sorted by id whatever the database collation is.
+        With after, only the ids following it, for reading the list in pages.
+    """
+    refs = union(
+        select(models.ContentBlobs.blob_file_id.label("file_id")),
+        select(models.Contents.content_id.label("file_id")).where(models.Contents.content_blob.is_(None))
+    ).subquery()
+    query = select(refs.c.file_id).order_by(refs.c.file_id.collate("C"))
+    if after is not None:
+        query = query.where(refs.c.file_id.collate("C") > after)
+    return query
+
+
+async def resolve_content(db: AsyncSession, content_id: str):
+    """Return (file_id, content row or None) for a content id, legacy ids point at storage directly."""
+    row = (await db.execute(
+        select(models.Contents, models.ContentBlobs.blob_file_id)
+        .outerjoin(models.ContentBlobs, models.ContentBlobs.blob_digest == models.Contents.content_blob)
+        .filter(models.Contents.content_id == content_id)
+        .limit(1)
+    )).first()
+    if row is None or row.blob_file_id is None:
+        return content_id, row.Contents if row else None
+    return row.blob_file_id, row.Contents
@@ -0,0 +1,317 @@
+import os
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+from fastapi.responses import FileResponse
+from prometheus_client import Counter, Gauge
+from starlette.concurrency import run_in_threadpool
+from courses_topics import storage
+
+CONTENT_CACHE_DIR = os.getenv("CONTENT_CACHE_DIR", "/tmp/expanse-content-cache")
+# Total bytes kept on local disk, 0 turns the cache off
+CONTENT_CACHE_MAX_BYTES = int(os.getenv("CONTENT_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Larger files are streamed straight from storage so a single one cannot flush the whole cache
+CONTENT_CACHE_MAX_FILE_BYTES = int(os.getenv("CONTENT_CACHE_MAX_FILE_BYTES", str(CONTENT_CACHE_MAX_BYTES // 8)))
+
+cache_requests = Counter("content_cache_requests_total", "Content cache lookups by result", ["result"])
+cache_evictions = Counter("content_cache_evictions_total", "Files evicted from the content cache")
+cache_evicted_bytes = Counter("content_cache_evicted_bytes_total", "Bytes evicted from the content cache")
+cache_bytes = Gauge("content_cache_bytes", "Bytes currently held by the content cache")
+
+
+class CachedFile(storage.LocalFileStream):
+    """
+        Local copy of a blob held by the content cache. It stays pinned until closed, an
+        eviction meanwhile drops it from the cache but leaves the file on disk for its readers.
+    """
+
+    def __init__(self, cache, digest: str):
+        super().__init__(cache._path(digest), filename=digest)
+        self.digest = digest
+        self._cache = cache
+        self._pinned = True
+        cache._pin(digest)
+
+    def close(self):
+        super().close()
+        if self._pinned:
+            self._pinned = False
+            self._cache._release(self.digest)
+
+
+class CachedFileResponse(FileResponse):
+    """
+        Sends a cached file by path, so a server with the pathsend extension can hand it to
+        sendfile, and releases the file once the response is done or the client went away.
+    """
+
+    def __init__(self, cached: CachedFile, **kwargs):
+        super().__init__(cached.path, stat_result=os.fstat(cached._file.fileno()), **kwargs)
+        # The copy's mtime is when it was cached, the digest ETag is the validator
+        del self.headers["last-modified"]
+        self.cached = cached
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.cached.close()
+
+
+class Fill:
+    """Copy of a blob into the cache in progress, readers wait on it for more bytes."""
+
+    def __init__(self, part: str, length: int):
+        self.part = part
+        self.length = length
+        self.written = 0
+        self.done = False
+        self.error = None
+        self.task = None
+        self._progress = asyncio.Event()
+
+    def advance(self, size: int):
+        self.written += size
+        self._notify()
+
+    def finish(self, error: BaseException = None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        self._progress.set()
+        self._progress = asyncio.Event()
+
+    async def changed(self):
+        await self._progress.wait()
+
+
+class FillingFile:
+    """
+        Download stream over a blob while it is being copied into the cache, so the first
+        request for it is answered as the bytes arrive instead of after the whole copy.
+    """
+
+    def __init__(self, fill: Fill, filename: str):
+        # Opened before the fill can finish, the part file is renamed or removed then
+        self._file = open(fill.part, "rb")
+        self._fill = fill
+        self._pos = 0
+        self.filename = filename
+        self.metadata = {}
+        self.content_type = None
+        self.length = fill.length
+
+    def seek(self, pos: int):
+        self._pos = pos
+
+    async def read(self, size: int = -1) -> bytes:
+        if self._pos >= self.length:
+            return b""
+        while self._fill.written <= self._pos:
+            if self._fill.done:
+                raise OSError(f"Content cache fill stopped at {self._fill.written} of {self.length} bytes") from self._fill.error
+            await self._fill.changed()
+        available = self._fill.written - self._pos
+        size = available if size < 0 else min(size, available)
+        data = await run_in_threadpool(os.pread, self._file.fileno(), size, self._pos)
+        self._pos += len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+def _write(out, chunk: bytes):
+    # Flushed so readers of the part file see every byte counted as written
+    out.write(chunk)
+    out.flush()
+
+
+class ContentCache:
+    """
+        Byte capped LRU cache of blobs on local disk, keyed by sha256 digest so the
+        cached bytes can never go stale. Concurrent misses for one digest share a
+        single fill from storage.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_file_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        # digest -> size, least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._fills = {}
+        # digest -> open CachedFiles, and pinned digests evicted meanwhile whose file is removed on release.
+        # Released from the threadpool too, close_download runs there
+        self._pins = {}
+        self._evicted_pinned = set()
+        self._pin_lock = threading.Lock()
+        if self.max_bytes > 0:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest)
+
+    def _load(self):
+        """Index files left by a previous process, oldest first, and drop half written ones."""
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".part"):
+                os.remove(entry.path)
+            elif entry.is_file():
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, digest, size in sorted(found):
+            self._entries[digest] = size
+            self._bytes += size
+        self._evict()
+
+    def _remove(self, digest: str):
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def _pin(self, digest: str):
+        with self._pin_lock:
+            self._pins[digest] = self._pins.get(digest, 0) + 1
+
+    def _release(self, digest: str):
+        with self._pin_lock:
+            self._pins[digest] -= 1
+            if self._pins[digest]:
+                return
+            del self._pins[digest]
+            if digest not in self._evicted_pinned:
+                return
+            self._evicted_pinned.discard(digest)
+            # Filled again since, the file on disk is the cached copy now
+            if digest not in self._entries:
+                self._remove(digest)
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            digest, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            # Files being sent stay on disk until released, uncounted, so the overshoot is bounded by the responses in flight
+            with self._pin_lock:
+                if digest in self._pins:
+                    self._evicted_pinned.add(digest)
+                else:
+                    self._remove(digest)
+            cache_evictions.inc()
+            cache_evicted_bytes.inc(size)
+        cache_bytes.set(self._bytes)
+
+    def _open(self, digest: str):
+        if digest not in self._entries:
+            return None
+        try:
+            cached = CachedFile(self, digest)
+        except FileNotFoundError:
+            self._bytes -= self._entries.pop(digest)
+            cache_bytes.set(self._bytes)
+            return None
+        self._entries.move_to_end(digest)
+        return cached
+
+    async def _start_fill(self, digest: str, file_id: str):
+        """Open the blob in storage and start copying it, None when it is missing or too large to cache."""
+        stream = await storage.open_download(file_id)
+        if stream is None:
+            return None
+        try:
+            if stream.length > self.max_file_bytes:
+                await storage.close_download(stream)
+                return None
+            fill = Fill(self._path(f"{digest}.{uuid.uuid4().hex}.part"), stream.length)
+            out = open(fill.part, "wb")
+        except BaseException:
+            await storage.close_download(stream)
+            raise
+        fill.task = asyncio.ensure_future(self._copy(digest, stream, out, fill))
+        return fill
+
+    async def _copy(self, digest: str, stream, out, fill: Fill):
+        try:
+            try:
+                with out:
+                    async for chunk in storage.iter_download(stream):
+                        await run_in_threadpool(_write, out, chunk)
+                        fill.advance(len(chunk))
+            finally:
+                await storage.close_download(stream)
+            if fill.written != fill.length:
+                raise OSError(f"Storage returned {fill.written} of {fill.length} bytes")
+            os.replace(fill.part, self._path(digest))
+        except BaseException as e:
+            if os.path.exists(fill.part):
+                os.remove(fill.part)
+            fill.finish(e)
+            print(f"Content cache fill failed for {digest}: {e!r}", flush=True)
+            raise
+        # Nothing awaited from the rename on, so readers see the entry as soon as the part file is gone
+        if digest not in self._entries:
+            self._entries[digest] = fill.length
+            self._bytes += fill.length
+        self._evict()
+        fill.finish()
+
+    def _fill_done(self, digest: str, start, done):
+        if self._fills.get(digest) is start:
+            del self._fills[digest]
+        # Retrieved here too in case every waiter went away before the fill finished
+        if not done.cancelled():
+            done.exception()
+
+    def _fill_started(self, digest: str, start):
+        fill = None if start.cancelled() or start.exception() else start.result()
+        if fill is None:
+            self._fill_done(digest, start, start)
+        else:
+            # Later requests keep joining this fill until the copy is done
+            fill.task.add_done_callback(lambda done: self._fill_done(digest, start, done))
+
+    async def fetch(self, digest: str, file_id: str):
+        """
+            Return a CachedFile for the blob, or on a miss a FillingFile reading it as the cache
+            fills from storage. None means the caller should stream from storage itself: the
+            cache is off, the file is too large or missing, or the fill failed.
+        """
+        if self.max_bytes <= 0:
+            return None
+        cached = self._open(digest)
+        if cached:
+            cache_requests.labels("hit").inc()
+            return cached
+
+        start = self._fills.get(digest)
+        if start is None:
+            cache_requests.labels("miss").inc()
+            start = asyncio.ensure_future(self._start_fill(digest, file_id))
+            self._fills[digest] = start
+            start.add_done_callback(lambda done: self._fill_started(digest, done))
+        else:
+            cache_requests.labels("coalesced").inc()
+
+        try:
+            # Shielded so a client hanging up does not abort the fill other requests wait on
+            fill = await asyncio.shield(start)
+        except Exception as e:
+            print(f"Content cache fill failed for {digest}: {e}", flush=True)
+            return None
+        if fill is None:
+            cache_requests.labels("bypass").inc()
+            return None
+        if fill.done:
+            # Finished already, or failed and the caller goes to storage
+            return self._open(digest)
+        return FillingFile(fill, digest)
+
+
+content_cache = ContentCache(CONTENT_CACHE_DIR, CONTENT_CACHE_MAX_BYTES, CONTENT_CACHE_MAX_FILE_BYTES)
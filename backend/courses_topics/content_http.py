@@ -0,0 +1,131 @@
+import os
+import uuid
+from courses_topics import storage
+
+# Content ids never change once uploaded, so clients may keep their copy for a year
+CONTENT_CACHE_CONTROL = os.getenv("CONTENT_CACHE_CONTROL", "private, max-age=31536000, immutable")
+# More ranges than this are answered with the whole file rather than a long multipart body
+CONTENT_MAX_RANGES = int(os.getenv("CONTENT_MAX_RANGES", "16"))
+
+
+class RangeNotSatisfiable(Exception):
+    """None of the requested byte ranges overlap the file."""
+
+
+def etag_for(file_id) -> str:
+    return f'"{file_id}"'
+
+
+def cache_headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": CONTENT_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against the file's ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def if_range_matches(if_range: str, etag: str) -> bool:
+    # If-Range needs a strong match, anything else means the client's partial copy is stale
+    return if_range is None or if_range.strip() == etag
+
+
+def parse_range(range_header: str, size: int):
+    """
+        Parse a Range header into sorted, merged (start, end) pairs with inclusive ends.
+        Returns None when the header should be ignored and the whole file sent, and
+        raises RangeNotSatisfiable when no range overlaps the file.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        first, dash, last = part.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if not first:
+                # Suffix range: the final N bytes
+                length = int(last)
+                if length > 0 and size > 0:
+                    ranges.append((max(size - length, 0), size - 1))
+                continue
+            start = int(first)
+            end = int(last) if last else None
+        except ValueError:
+            return None
+        if start < 0 or (end is not None and end < start):
+            return None
+        end = size - 1 if end is None else end
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+
+    if len(merged) > CONTENT_MAX_RANGES:
+        return None
+    return merged
+
+
+def content_range(start: int, end: int, size: int) -> str:
+    return f"bytes {start}-{end}/{size}"
+
+
+class MultipartRanges:
+    """multipart/byteranges body for a multi-range request, streamed part by part from storage."""
+
+    def __init__(self, grid_out, ranges: list, media_type: str):
+        self.grid_out = grid_out
+        self.ranges = ranges
+        self.media_type = media_type
+        self.boundary = uuid.uuid4().hex
+        self.size = grid_out.length
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/byteranges; boundary={self.boundary}"
+
+    def _part_header(self, start: int, end: int) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f"Content-Type: {self.media_type}\r\n"
+            f"Content-Range: {content_range(start, end, self.size)}\r\n\r\n"
+        ).encode()
+
+    def _closing(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode()
+
+    @property
+    def content_length(self) -> int:
+        length = len(self._closing())
+        for start, end in self.ranges:
+            length += len(self._part_header(start, end)) + (end - start + 1) + 2
+        return length
+
+    async def __aiter__(self):
+        for start, end in self.ranges:
+            yield self._part_header(start, end)
+            async for chunk in storage.iter_range(self.grid_out, start, end):
+                yield chunk
+            yield b"\r\n"
+        yield self._closing()
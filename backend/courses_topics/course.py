@@ -1,62 +1,100 @@
 import os, sys
 from datetime import datetime
 from typing import Annotated, Optional
-from fastapi import APIRouter, Depends, Request, Header
-from fastapi.responses import JSONResponse, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, Request
+from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-from pymongo import MongoClient
-from gridfs import GridFS
-from bson import ObjectId
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from courses_topics import models
-from courses_topics.database import engine, SessionLocal
-from courses_topics.schema import CourseBase, CourseCreate, CourseResponse, UserEnroll
+from courses_topics import deletion_jobs
+from courses_topics.database import AsyncSessionLocal
+from courses_topics.schema import CourseBase, CourseCreate, CourseResponse, UserEnroll, DeletionJobResponse
+from courses_topics.course_events import publish_course_change, COURSE_CREATED, COURSE_UPDATED, COURSE_DELETED, ENROLLMENT_CHANGED
+from courses_topics.response_cache import response_cache, course_tag, course_topics_tag, topic_tag
 from common.response_format import success_response, error_response
-from common.token_decoder import token_decoder
+from common.pagination import Keyset, InvalidPage, page_size
+from common.auth import user_dependency
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
+
+
+# Orderings for the user's courses: most recent enrollments first, or by name
+COURSES_BY_ENROLLMENT = Keyset("courses.enrolled", models.UserXrefCourse.enrollment_date, models.UserXrefCourse.id, descending=True)
+COURSES_BY_NAME = Keyset("courses.name", models.Courses.course_name, models.Courses.course_id)
+ENROLLMENTS = Keyset("enrollments", models.UserXrefCourse.id)
+
 
-MONGO_URI = os.getenv('MONGO_URL')
-MONGO_DB_NAME = os.getenv('MONGO_DB_NAME')
-client = MongoClient(MONGO_URI)
-db_mongo = client[MONGO_DB_NAME]
-fs = GridFS(db_mongo)
+async def _load_course(course_id: int) -> list:
+    """A course as GET /course returns it, empty when it does not exist."""
+    async with AsyncSessionLocal() as db:
+        db_course = (await db.scalars(select(models.Courses).filter(models.Courses.course_id == course_id, models.Courses.course_is_deleted.is_(False)))).first()
+    return jsonable_encoder([CourseResponse.model_validate(db_course).model_dump()] if db_course else [])
 
 
-"""GET API: to get all the details for a specific course using it's ID"""
+"""GET API: to get all the details for a specific course using it's ID, or mode=all for the user's courses a page at a time"""
 @router.get("/course")
-async def get_course(db: db_dependency, course_id: int = None, mode: str = None, authorization: str = Header(...)):
+async def get_course(
+    db: db_dependency,
+    user_id: user_dependency,
+    course_id: int = None,
+    mode: str = None,
+    cursor: str = None,
+    limit: int = None,
+    order: str = "enrolled",
+    include_topic_counts: bool = False):
     try:
+        next_cursor = None
         if mode=='all' and not course_id:
-            if not authorization.startswith("Bearer "):
+            if order not in ("enrolled", "name"):
                 return JSONResponse(
-                    status_code=401,
-                    content=error_response(message="Invalid Authorization header format")
+                    status_code=400, 
+                    content=error_response(message="Invalid Query Parameters")
                 )
-            token = authorization.split(" ")[1]
-            decoded_payload = token_decoder(token)[1]
-            
-            user_id = decoded_payload.get("sub")
-            if not user_id:
-                return JSONResponse(
-                    status_code=401,
-                    content=error_response(message="User ID not found in token")
+            keyset = COURSES_BY_NAME if order == "name" else COURSES_BY_ENROLLMENT
+
+            # One join instead of loading every enrolled course id first, paged by keyset so
+            # each page is an index range scan however many courses the user is enrolled in
+            columns = [models.Courses, models.UserXrefCourse.enrollment_date, models.UserXrefCourse.id]
+            if include_topic_counts:
+                columns.append(
+                    select(func.count(models.Topics.topic_id))
+                    .where(models.Topics.course_id == models.Courses.course_id, models.Topics.topic_is_deleted.is_(False))
+                    .scalar_subquery()
+                    .label("topic_count")
                 )
-            course_id_lst = db.scalars(select(models.UserXrefCourse.course_id).filter(models.UserXrefCourse.user_id == user_id)).all()
-            result = db.query(models.Courses).filter(models.Courses.course_id.in_(course_id_lst)).all()
+            stmt = (
+                select(*columns)
+                .join(models.UserXrefCourse, models.UserXrefCourse.course_id == models.Courses.course_id)
+                .filter(models.UserXrefCourse.user_id == user_id, models.Courses.course_is_deleted.is_(False))
+            )
+            try:
+                limit = page_size(limit)
+                stmt = keyset.apply(stmt, cursor, limit)
+            except InvalidPage as e:
+                return JSONResponse(status_code=400, content=error_response(message=str(e)))
+
+            rows, next_cursor = keyset.page(
+                (await db.execute(stmt)).all(),
+                limit,
+                key=(lambda row: (row.Courses.course_name, row.Courses.course_id)) if order == "name" else None
+            )
+            response_data = [CourseResponse.model_validate(row.Courses).model_dump() for row in rows]
+            if include_topic_counts:
+                for course_data, row in zip(response_data, rows):
+                    course_data["topic_count"] = row.topic_count
 
         elif mode != 'all' and course_id:
-            result = [db.query(models.Courses).filter(models.Courses.course_id == course_id).first()]
+            response_data = await response_cache.get_or_load(
+                "course", f"course:{course_id}", (course_tag(course_id),), lambda: _load_course(course_id)
+            )
 
         else:
             return JSONResponse(
@@ -64,17 +102,18 @@ async def get_course(db: db_dependency, course_id: int = None, mode: str = None,
                 content=error_response(message="Invalid Query Parameters")
             )
 
-        if not result:
+        if not response_data:
             return JSONResponse(
                 status_code=404, 
                 content=error_response(message="Course Not Found")
             )
-        
+
         return JSONResponse(
             status_code=200,
             content=success_response(
-                data=jsonable_encoder([CourseResponse.model_validate(cor).model_dump() for cor in result]), 
-                message="Course retrieved successfully"
+                data=jsonable_encoder(response_data), 
+                message="Course retrieved successfully",
+                next_cursor=next_cursor
             )
         )
     except Exception as e:
@@ -95,23 +134,8 @@ async def get_course(db: db_dependency, course_id: int = None, mode: str = None,
 
 """POST API: to create a new course..."""
 @router.post("/course")
-async def create_course(course: CourseCreate, db: db_dependency, authorization: str = Header(...)):
+async def create_course(course: CourseCreate, db: db_dependency, user_id: user_dependency):
     try:
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="Invalid Authorization header format")
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="User ID not found in token")
-            )
-
         db_course = models.Courses(
             course_code=course.course_code, 
             course_name=course.course_name, 
@@ -121,19 +145,22 @@ async def create_course(course: CourseCreate, db: db_dependency, authorization:
         )
         try:
             db.add(db_course)
-            db.commit()
-            db.refresh(db_course)
+            await db.commit()
+            await db.refresh(db_course)
 
             db_user_xref_course = models.UserXrefCourse(
                 course_id=db_course.course_id,
                 user_id=user_id
             )
             db.add(db_user_xref_course)
-            db.commit()
-            db.refresh(db_user_xref_course)
+            await publish_course_change(db, COURSE_CREATED, db_course.course_id)
+            await db.commit()
+            await db.refresh(db_user_xref_course)
+            # A lookup before the course existed may have cached it as missing
+            await response_cache.invalidate(course_tag(db_course.course_id))
 
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -172,7 +199,7 @@ async def create_course(course: CourseCreate, db: db_dependency, authorization:
 @router.put("/course")
 async def update_course(course_id: int, course: CourseBase, db: db_dependency):
     try:
-        db_course = db.query(models.Courses).filter(models.Courses.course_id == course_id).first()
+        db_course = (await db.scalars(select(models.Courses).filter(models.Courses.course_id == course_id, models.Courses.course_is_deleted.is_(False)))).first()
         
         if not db_course:
             return JSONResponse(
@@ -187,10 +214,12 @@ async def update_course(course_id: int, course: CourseBase, db: db_dependency):
         db_course.course_updated_timestamp = datetime.now()
 
         try:
-            db.commit()
-            db.refresh(db_course)
+            await publish_course_change(db, COURSE_UPDATED, course_id)
+            await db.commit()
+            await db.refresh(db_course)
+            await response_cache.invalidate(course_tag(course_id))
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -223,35 +252,27 @@ async def update_course(course_id: int, course: CourseBase, db: db_dependency):
 
 
 
-"""DELETE API: to delete any course."""
+"""DELETE API: to delete any course. The course is hidden at once and purged by a background job."""
 @router.delete("/course")
-async def delete_course(course_id: int, db: db_dependency):
+async def delete_course(course_id: int, db: db_dependency, background_tasks: BackgroundTasks):
     try:
-        db_course = db.query(models.Courses).filter(models.Courses.course_id == course_id).first()
+        db_course = (await db.scalars(select(models.Courses).filter(models.Courses.course_id == course_id, models.Courses.course_is_deleted.is_(False)))).first()
         
         if not db_course:
             return JSONResponse(
                 status_code=404, 
                 content=error_response(message="Course Not Found")
             )
-        
-        db_topics = db.query(models.Topics).filter(models.Topics.course_id == course_id).all()
 
         try:
-            db.query(models.UserXrefCourse).filter(models.UserXrefCourse.course_id == course_id).delete()
-
-            for topic in db_topics:
-                db_contents = db.query(models.Contents).filter(models.Contents.topic_id == topic.topic_id).all()
-                for content in db_contents:
-                    if fs.exists({"_id": ObjectId(content.content_id)}):
-                        fs.delete(ObjectId(content.content_id))
-                    db.delete(content)
-                db.delete(topic)
-
-            db.delete(db_course)
-            db.commit()
+            # Its topics are hidden with it, so their cached responses go too
+            topic_ids = (await db.scalars(select(models.Topics.topic_id).filter(models.Topics.course_id == course_id, models.Topics.topic_is_deleted.is_(False)))).all()
+            job = await deletion_jobs.mark_course_deleted(db, db_course)
+            await publish_course_change(db, COURSE_DELETED, course_id)
+            await db.commit()
+            await response_cache.invalidate(course_tag(course_id), course_topics_tag(course_id), *(topic_tag(topic_id) for topic_id in topic_ids))
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -259,13 +280,14 @@ async def delete_course(course_id: int, db: db_dependency):
                 status_code=500,
                 content=error_response(message="Error deleting course", details=detail_dict)
             )
-        
-        return Response(
-            status_code=204,
-            # content=success_response(
-            #     data={},
-            #     message="Course deleted successfully"
-            # )
+
+        background_tasks.add_task(deletion_jobs.run_deletion_job, job.job_id)
+        return JSONResponse(
+            status_code=202,
+            content=success_response(
+                data=jsonable_encoder(DeletionJobResponse.model_validate(job).model_dump()),
+                message="Course deletion started"
+            )
         )
     
     except Exception as e:
@@ -286,49 +308,38 @@ async def delete_course(course_id: int, db: db_dependency):
 
 """POST API: Enroll a user in a course."""
 @router.post("/enrollUser")
-async def enroll_user(enroll: UserEnroll, db: db_dependency, authorization: str = Header(...)):
+async def enroll_user(enroll: UserEnroll, db: db_dependency, auth_user_id: user_dependency):
     try:
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="Invalid Authorization header format")
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        auth_user_id = decoded_payload.get("sub")
-        if not auth_user_id:
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="User ID not found in token")
-            )
-        
-        
         user_id_lst = enroll.user_id if isinstance(enroll.user_id, list) else [enroll.user_id]
         user_id_lst = set(user_id_lst)
 
-        enrolled_user_id_lst = set(db.scalars(select(models.UserXrefCourse.user_id).filter(models.UserXrefCourse.course_id == enroll.course_id)).all())
+        enrolled_user_id_lst = set((await db.scalars(select(models.UserXrefCourse.user_id).filter(models.UserXrefCourse.course_id == enroll.course_id))).all())
 
         to_be_deenrolled_user_ids = enrolled_user_id_lst - user_id_lst
         if auth_user_id in to_be_deenrolled_user_ids:
             to_be_deenrolled_user_ids.remove(auth_user_id)
-        db.query(models.UserXrefCourse).filter(
+        await db.execute(delete(models.UserXrefCourse).where(
             models.UserXrefCourse.user_id.in_(to_be_deenrolled_user_ids), 
             models.UserXrefCourse.course_id == enroll.course_id
-        ).delete()
+        ))
 
         common_user_ids = enrolled_user_id_lst.intersection(user_id_lst)
         user_id_lst = user_id_lst - common_user_ids
 
-        bulk_data = [
-            models.UserXrefCourse(course_id=enroll.course_id, user_id=uid)
-            for uid in user_id_lst
-        ]
-        
         try:
-            db.bulk_save_objects(bulk_data)
-            db.commit()
+            if user_id_lst:
+                # Saves racing on one course can both see a user as new, the unique index keeps a single row
+                stmt = (
+                    insert(models.UserXrefCourse)
+                    .values([{"course_id": enroll.course_id, "user_id": uid} for uid in user_id_lst])
+                    .on_conflict_do_nothing(index_elements=["user_id", "course_id"])
+                    .returning(models.UserXrefCourse.user_id)
+                )
+                user_id_lst = set((await db.scalars(stmt)).all())
+            await publish_course_change(db, ENROLLMENT_CHANGED, enroll.course_id)
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -364,17 +375,27 @@ async def enroll_user(enroll: UserEnroll, db: db_dependency, authorization: str
 
 """GET API: Get all the enrolled students for a course"""
 @router.get("/enrolledUsers")
-async def get_enrolled_users(course_id: int, db: db_dependency):
+async def get_enrolled_users(course_id: int, db: db_dependency, cursor: str = None, limit: int = None):
     try:
-        result = db.scalars(select(models.UserXrefCourse.user_id).filter(models.UserXrefCourse.course_id == course_id)).all()
+        try:
+            limit = page_size(limit)
+            stmt = ENROLLMENTS.apply(
+                select(models.UserXrefCourse.id, models.UserXrefCourse.user_id).filter(models.UserXrefCourse.course_id == course_id),
+                cursor,
+                limit
+            )
+        except InvalidPage as e:
+            return JSONResponse(status_code=400, content=error_response(message=str(e)))
+        rows, next_cursor = ENROLLMENTS.page((await db.execute(stmt)).all(), limit)
 
-        enrolled_users = {"course_id": course_id, "users": result}
+        enrolled_users = {"course_id": course_id, "users": [row.user_id for row in rows]}
             
         return JSONResponse(
             status_code=200, 
             content=success_response(
                 data=enrolled_users, 
-                message="Enrolled Users Fetched"
+                message="Enrolled Users Fetched",
+                next_cursor=next_cursor
             )
         )
     
@@ -390,4 +411,40 @@ async def get_enrolled_users(course_id: int, db: db_dependency):
         return JSONResponse(
             status_code=500, 
             content=error_response(message="Error getting users", details=detail_dict)
-        )
\ No newline at end of file
+        )
+
+
+
+"""GET API: status of a course or topic deletion job"""
+@router.get("/deletionJob")
+async def get_deletion_job(job_id: str, db: db_dependency):
+    try:
+        job = (await db.scalars(select(models.DeletionJobs).filter(models.DeletionJobs.job_id == job_id))).first()
+
+        if not job:
+            return JSONResponse(
+                status_code=404, 
+                content=error_response(message="Deletion Job Not Found")
+            )
+
+        return JSONResponse(
+            status_code=200, 
+            content=success_response(
+                data=jsonable_encoder(DeletionJobResponse.model_validate(job).model_dump()), 
+                message="Deletion job retrieved successfully"
+            )
+        )
+    
+    except Exception as e:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+        detail_dict = {
+            "exception": e,
+            "exception_type": exc_type,
+            "file_name": fname,
+            "line_number": exc_tb.tb_lineno
+        }
+        return JSONResponse(
+            status_code=500, 
+            content=error_response(message="Error getting deletion job", details=detail_dict)
+        )
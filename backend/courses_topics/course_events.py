@@ -0,0 +1,105 @@
+import os
+import json
+import select
+import threading
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from courses_topics.database import engine
+
+COURSE_CHANGES_CHANNEL = "course_changes"
+
+COURSE_CREATED = "COURSE_CREATED"
+COURSE_UPDATED = "COURSE_UPDATED"
+COURSE_DELETED = "COURSE_DELETED"
+ENROLLMENT_CHANGED = "ENROLLMENT_CHANGED"
+
+# LISTEN needs a session of its own, so behind PgBouncer in transaction mode point this at Postgres directly
+POSTGRES_LISTEN_URL = os.getenv("POSTGRES_LISTEN_URL")
+listen_engine = create_engine(POSTGRES_LISTEN_URL, poolclass=NullPool) if POSTGRES_LISTEN_URL else engine
+
+
+async def publish_course_change(db, change_type: str, course_id: int):
+    """
+        Queue a course change notification on the caller's transaction.
+        Postgres only delivers NOTIFY on commit, so a rolled back change is never published.
+    """
+    payload = json.dumps({"change_type": change_type, "course_id": course_id})
+    await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": COURSE_CHANGES_CHANNEL, "payload": payload})
+
+
+class CourseChangeBroadcaster:
+    """
+        LISTENs on the course_changes channel, or the one given, from a background
+        thread and fans every notification out to the subscribed callbacks. The API
+        and the gRPC server run in separate processes, so Postgres carries the events.
+    """
+
+    def __init__(self, poll_interval: float = 5.0, retry_interval: float = 2.0, channel: str = COURSE_CHANGES_CHANNEL):
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self._subscribers = {}
+        self._next_token = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback) -> int:
+        with self._lock:
+            self._next_token += 1
+            self._subscribers[self._next_token] = callback
+            return self._next_token
+
+    def unsubscribe(self, token: int):
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="course-change-listener", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def _dispatch(self, change: dict):
+        with self._lock:
+            callbacks = list(self._subscribers.values())
+        for callback in callbacks:
+            try:
+                callback(change)
+            except Exception as e:
+                print(f"Course change subscriber failed: {e}", flush=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                # Dedicated connection taken out of the pool, LISTEN needs it for its whole life
+                conn = listen_engine.raw_connection()
+                dbapi_conn = conn.driver_connection
+                conn.detach()
+                dbapi_conn.autocommit = True
+                with dbapi_conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+
+                while not self._stop.is_set():
+                    if select.select([dbapi_conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    dbapi_conn.poll()
+                    while dbapi_conn.notifies:
+                        notify = dbapi_conn.notifies.pop(0)
+                        self._dispatch(json.loads(notify.payload))
+            except Exception as e:
+                print(f"Course change listener error: {e}", flush=True)
+                self._stop.wait(self.retry_interval)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+course_changes = CourseChangeBroadcaster()
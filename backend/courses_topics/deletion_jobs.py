@@ -0,0 +1,161 @@
+import os
+import uuid
+import asyncio
+from datetime import timedelta
+from sqlalchemy import select, update, delete, or_, and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from courses_topics import models
+from courses_topics import blobs
+from courses_topics.database import AsyncSessionLocal
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+TARGET_COURSE = "course"
+TARGET_TOPIC = "topic"
+
+# A running job not updated for this long is assumed lost with its worker and may be taken over
+DELETION_JOB_STALE_SECONDS = int(os.getenv("DELETION_JOB_STALE_SECONDS", "600"))
+DELETION_JOB_SWEEP_SECONDS = int(os.getenv("DELETION_JOB_SWEEP_SECONDS", "300"))
+
+# Keeps references to resumed jobs so they are not garbage collected mid-run
+_resumed_jobs = set()
+
+
+def new_deletion_job(target: str, target_id: int, user_id: str = None):
+    return models.DeletionJobs(
+        job_id=uuid.uuid4().hex,
+        job_target=target,
+        job_target_id=target_id,
+        job_status=JOB_PENDING,
+        job_created_by=user_id
+    )
+
+
+async def mark_course_deleted(db: AsyncSession, db_course, user_id: str = None):
+    """Hide the course and its topics in the caller's transaction and queue their purge."""
+    db_course.course_is_deleted = True
+    await db.execute(
+        update(models.Topics)
+        .where(models.Topics.course_id == db_course.course_id)
+        .values(topic_is_deleted=True)
+    )
+    job = new_deletion_job(TARGET_COURSE, db_course.course_id, user_id)
+    db.add(job)
+    return job
+
+
+async def mark_topic_deleted(db: AsyncSession, db_topic, user_id: str = None):
+    """Hide the topic in the caller's transaction and queue its purge."""
+    db_topic.topic_is_deleted = True
+    job = new_deletion_job(TARGET_TOPIC, db_topic.topic_id, user_id)
+    db.add(job)
+    return job
+
+
+async def _claim(db: AsyncSession, job_id: str):
+    stale_before = func.now() - timedelta(seconds=DELETION_JOB_STALE_SECONDS)
+    return (await db.scalars(
+        update(models.DeletionJobs)
+        .where(
+            models.DeletionJobs.job_id == job_id,
+            or_(
+                models.DeletionJobs.job_status == JOB_PENDING,
+                and_(
+                    models.DeletionJobs.job_status == JOB_RUNNING,
+                    models.DeletionJobs.job_updated_timestamp < stale_before
+                )
+            )
+        )
+        .values(job_status=JOB_RUNNING, job_error=None)
+        .returning(models.DeletionJobs)
+    )).first()
+
+
+async def _purge(db: AsyncSession, job) -> list:
+    """Set-based deletes for the job's target, returning the stored files left unreferenced."""
+    if job.job_target == TARGET_COURSE:
+        topic_ids = select(models.Topics.topic_id).where(models.Topics.course_id == job.job_target_id)
+        contents_filter = or_(
+            models.Contents.course_id == job.job_target_id,
+            models.Contents.topic_id.in_(topic_ids)
+        )
+    else:
+        contents_filter = models.Contents.topic_id == job.job_target_id
+
+    removed = (await db.execute(
+        delete(models.Contents)
+        .where(contents_filter)
+        .returning(models.Contents.content_id, models.Contents.content_blob)
+        .execution_options(synchronize_session=False)
+    )).all()
+    freed_file_ids = await blobs.release_blobs(db, [tuple(row) for row in removed])
+
+    if job.job_target == TARGET_COURSE:
+        await db.execute(delete(models.Topics).where(models.Topics.course_id == job.job_target_id))
+        await db.execute(delete(models.UserXrefCourse).where(models.UserXrefCourse.course_id == job.job_target_id))
+        await db.execute(delete(models.Courses).where(models.Courses.course_id == job.job_target_id))
+    else:
+        await db.execute(delete(models.Topics).where(models.Topics.topic_id == job.job_target_id))
+
+    job.job_contents_deleted = len(removed)
+    return freed_file_ids
+
+
+async def run_deletion_job(job_id: str):
+    """Claim and run one deletion job, recording the outcome on the job row."""
+    async with AsyncSessionLocal() as db:
+        job = await _claim(db, job_id)
+        await db.commit()
+        if job is None:
+            return
+
+        try:
+            freed_file_ids = await _purge(db, job)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            await _finish(db, job_id, JOB_FAILED, error=str(e))
+            return
+
+        # Stored files are removed only after the rows referencing them are gone
+        try:
+            files_deleted = await blobs.delete_files(freed_file_ids)
+        except Exception as e:
+            await _finish(db, job_id, JOB_FAILED, error=f"Rows purged, file cleanup failed: {e}")
+            return
+        await _finish(db, job_id, JOB_SUCCEEDED, files_deleted=files_deleted)
+
+
+async def _finish(db: AsyncSession, job_id: str, status: str, error: str = None, files_deleted: int = 0):
+    await db.execute(
+        update(models.DeletionJobs)
+        .where(models.DeletionJobs.job_id == job_id)
+        .values(job_status=status, job_error=error, job_files_deleted=files_deleted)
+    )
+    await db.commit()
+
+
+async def resume_deletion_jobs():
+    """Start jobs left pending or abandoned by a worker that went away."""
+    async with AsyncSessionLocal() as db:
+        job_ids = (await db.scalars(
+            select(models.DeletionJobs.job_id)
+            .where(models.DeletionJobs.job_status.in_([JOB_PENDING, JOB_RUNNING]))
+        )).all()
+    for job_id in job_ids:
+        task = asyncio.create_task(run_deletion_job(job_id))
+        _resumed_jobs.add(task)
+        task.add_done_callback(_resumed_jobs.discard)
+
+
+async def sweep_deletion_jobs():
+    """Resume unfinished jobs at startup and every DELETION_JOB_SWEEP_SECONDS after."""
+    while True:
+        try:
+            await resume_deletion_jobs()
+        except Exception as e:
+            print(f"Deletion job sweep failed: {e}", flush=True)
+        await asyncio.sleep(DELETION_JOB_SWEEP_SECONDS)
@@ -0,0 +1,305 @@
+import os
+import time
+import asyncio
+import tempfile
+import argparse
+import multiprocessing
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import select, update, func, or_, and_, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from courses_topics import models
+from courses_topics import storage
+from courses_topics import text_extraction
+from courses_topics.database import AsyncSessionLocal
+
+TEXT_PENDING = "pending"
+TEXT_RUNNING = "running"
+TEXT_SUCCEEDED = "succeeded"
+TEXT_FAILED = "failed"
+TEXT_UNSUPPORTED = "unsupported"
+
+# Extraction processes per replica, 0 leaves extraction to other replicas
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "1"))
+# Worker processes are replaced after this many files, so parser memory does not pile up
+EXTRACT_TASKS_PER_WORKER = int(os.getenv("EXTRACT_TASKS_PER_WORKER", "50"))
+# Larger files are marked unsupported instead of being copied and parsed
+EXTRACT_MAX_BYTES = int(os.getenv("EXTRACT_MAX_BYTES", str(200 * 1024 * 1024)))
+EXTRACT_MAX_ATTEMPTS = int(os.getenv("EXTRACT_MAX_ATTEMPTS", "3"))
+# Wait before retrying a failed file, doubled after every attempt
+EXTRACT_RETRY_SECONDS = int(os.getenv("EXTRACT_RETRY_SECONDS", "60"))
+EXTRACT_POLL_SECONDS = int(os.getenv("EXTRACT_POLL_SECONDS", "30"))
+# A running row not updated for this long is assumed lost with its replica and claimed again
+EXTRACT_JOB_STALE_SECONDS = int(os.getenv("EXTRACT_JOB_STALE_SECONDS", "1800"))
+# Files from remote storage are copied here for the worker processes to read
+EXTRACT_TMP_DIR = os.getenv("EXTRACT_TMP_DIR", os.path.join(tempfile.gettempdir(), "expanse-extract"))
+EXTRACT_BACKFILL_BATCH = int(os.getenv("EXTRACT_BACKFILL_BATCH", "5000"))
+
+extraction_runs = Counter("content_extraction_runs_total", "Text extraction attempts by outcome", ["outcome"])
+extraction_seconds = Histogram("content_extraction_seconds", "Time to fetch and extract one file")
+extraction_pool_restarts = Counter("content_extraction_pool_restarts_total", "Process pools replaced after a worker died")
+extraction_backlog = Gauge("content_extraction_jobs", "Extraction rows by status, as of the last check", ["status"])
+extraction_oldest_pending = Gauge("content_extraction_oldest_pending_seconds", "Age of the oldest file waiting for extraction")
+
+# Set after uploads commit so an idle worker starts at once instead of at its next poll
+_wakeup = asyncio.Event()
+_pool = None
+
+
+def notify():
+    _wakeup.set()
+
+
+def _sources(content_filter=None):
+    """(file id, content type, name) for the stored files of content rows, one row per content."""
+    blob_rows = (
+        select(models.ContentBlobs.blob_file_id, models.Contents.content_type, models.Contents.content_name)
+        .join(models.Contents, models.Contents.content_blob == models.ContentBlobs.blob_digest)
+    )
+    legacy_rows = (
+        select(models.Contents.content_id, models.Contents.content_type, models.Contents.content_name)
+        .where(models.Contents.content_blob.is_(None))
+    )
+    if content_filter is not None:
+        blob_rows = blob_rows.where(content_filter)
+        legacy_rows = legacy_rows.where(content_filter)
+    return union_all(blob_rows, legacy_rows)
+
+
+def _queue(rows):
+    # Files already queued or extracted, through another content sharing the blob, are left alone
+    return insert(models.ContentTexts).from_select(
+        ["text_file_id", "text_content_type", "text_file_name"], select(rows.subquery())
+    ).on_conflict_do_nothing(index_elements=[models.ContentTexts.text_file_id])
+
+
+async def queue_blobs(db: AsyncSession, digests: list):
+    """Queue extraction for newly referenced blobs in the caller's transaction, call notify() after commit."""
+    if digests:
+        await db.execute(_queue(_sources(models.Contents.content_blob.in_(sorted(set(digests))))))
+
+
+async def backfill(retry_failed: bool = False) -> dict:
+    """
+        Queue every stored file with no extraction row, for content uploaded before the
+        pipeline existed, in batches of content rows. With retry_failed, files that used up
+        their attempts are queued again too.
+    """
+    queued = requeued = 0
+    async with AsyncSessionLocal() as db:
+        last_id = await db.scalar(select(func.max(models.Contents.id))) or 0
+        for start in range(0, last_id, EXTRACT_BACKFILL_BATCH):
+            rows = _sources(and_(models.Contents.id > start, models.Contents.id <= start + EXTRACT_BACKFILL_BATCH))
+            queued += (await db.execute(_queue(rows))).rowcount
+            await db.commit()
+        if retry_failed:
+            requeued = (await db.execute(
+                update(models.ContentTexts)
+                .where(models.ContentTexts.text_status == TEXT_FAILED)
+                .values(text_status=TEXT_PENDING, text_attempts=0, text_error=None, text_next_attempt_timestamp=func.now())
+            )).rowcount
+            await db.commit()
+    return {"queued": queued, "requeued": requeued}
+
+
+async def _claim():
+    """Take the next due row, or one a lost replica left running, skipping rows other replicas hold."""
+    stale_before = func.now() - timedelta(seconds=EXTRACT_JOB_STALE_SECONDS)
+    due = (
+        select(models.ContentTexts.text_file_id)
+        .where(or_(
+            and_(
+                models.ContentTexts.text_status == TEXT_PENDING,
+                models.ContentTexts.text_next_attempt_timestamp <= func.now()
+            ),
+            and_(
+                models.ContentTexts.text_status == TEXT_RUNNING,
+                models.ContentTexts.text_updated_timestamp < stale_before
+            )
+        ))
+        .order_by(models.ContentTexts.text_next_attempt_timestamp)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    async with AsyncSessionLocal() as db:
+        job = (await db.execute(
+            update(models.ContentTexts)
+            .where(models.ContentTexts.text_file_id == due)
+            .values(text_status=TEXT_RUNNING, text_attempts=models.ContentTexts.text_attempts + 1)
+            .returning(
+                models.ContentTexts.text_file_id,
+                models.ContentTexts.text_content_type,
+                models.ContentTexts.text_file_name,
+                models.ContentTexts.text_attempts
+            )
+        )).first()
+        await db.commit()
+    return job
+
+
+async def _finish(file_id: str, **values):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(models.ContentTexts)
+            .where(models.ContentTexts.text_file_id == file_id)
+            .values(**values)
+        )
+        await db.commit()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Spawned rather than forked, forking a process with a running event loop and threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=EXTRACT_TASKS_PER_WORKER
+        )
+    return _pool
+
+
+def _replace_pool(broken: ProcessPoolExecutor):
+    global _pool
+    # Every job running on the broken pool fails at once, only the first replaces it
+    if _pool is broken:
+        _pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        extraction_pool_restarts.inc()
+
+
+async def _spool(stream) -> str:
+    """Copy a stored file to local disk, the worker processes cannot read from storage."""
+    os.makedirs(EXTRACT_TMP_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=EXTRACT_TMP_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            async for chunk in storage.iter_download(stream):
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+async def _extract(job):
+    started = time.monotonic()
+    spooled = None
+    try:
+        if job.text_attempts > EXTRACT_MAX_ATTEMPTS:
+            # Claimed again after its replica died on it every time
+            raise text_extraction.UnsupportedContent(f"Gave up after {EXTRACT_MAX_ATTEMPTS} attempts")
+        # Fails fast on types there is no extractor for, before anything is downloaded
+        text_extraction.content_kind(job.text_content_type, job.text_file_name)
+        stream = await storage.open_download(job.text_file_id)
+        if stream is None:
+            raise FileNotFoundError(f"Stored file {job.text_file_id} is missing")
+        if stream.length > EXTRACT_MAX_BYTES:
+            raise text_extraction.UnsupportedContent("File is larger than the extraction size limit")
+        # Files already on local disk, from the filesystem backend or the content cache, are read in place
+        path = getattr(stream, "path", None)
+        if path is None:
+            path = spooled = await _spool(stream)
+
+        pool = _get_pool()
+        try:
+            text, offsets = await asyncio.get_running_loop().run_in_executor(
+                pool, text_extraction.extract_text, path, job.text_content_type, job.text_file_name
+            )
+        except BrokenProcessPool:
+            _replace_pool(pool)
+            raise RuntimeError("Extraction process died")
+        await _finish(job.text_file_id, text_status=TEXT_SUCCEEDED, text_body=text, text_page_offsets=offsets, text_error=None)
+        extraction_runs.labels(TEXT_SUCCEEDED).inc()
+    except text_extraction.UnsupportedContent as e:
+        await _finish(job.text_file_id, text_status=TEXT_UNSUPPORTED, text_error=str(e))
+        extraction_runs.labels(TEXT_UNSUPPORTED).inc()
+    except Exception as e:
+        if job.text_attempts >= EXTRACT_MAX_ATTEMPTS:
+            await _finish(job.text_file_id, text_status=TEXT_FAILED, text_error=str(e))
+            extraction_runs.labels(TEXT_FAILED).inc()
+        else:
+            delay = EXTRACT_RETRY_SECONDS * 2 ** (job.text_attempts - 1)
+            await _finish(
+                job.text_file_id,
+                text_status=TEXT_PENDING,
+                text_error=str(e),
+                text_next_attempt_timestamp=func.now() + timedelta(seconds=delay)
+            )
+            extraction_runs.labels("retried").inc()
+    finally:
+        if spooled:
+            os.remove(spooled)
+        extraction_seconds.observe(time.monotonic() - started)
+
+
+async def _record_backlog():
+    async with AsyncSessionLocal() as db:
+        counts = dict((await db.execute(
+            select(models.ContentTexts.text_status, func.count())
+            .group_by(models.ContentTexts.text_status)
+        )).all())
+        oldest = await db.scalar(
+            select(func.extract("epoch", func.now() - func.min(models.ContentTexts.text_created_timestamp)))
+            .where(models.ContentTexts.text_status == TEXT_PENDING)
+        )
+    for status in (TEXT_PENDING, TEXT_RUNNING, TEXT_SUCCEEDED, TEXT_FAILED, TEXT_UNSUPPORTED):
+        extraction_backlog.labels(status).set(counts.get(status, 0))
+    extraction_oldest_pending.set(oldest or 0)
+
+
+async def run_extraction_worker():
+    """
+        Keep up to EXTRACT_WORKERS files extracting on the process pool, claiming the next
+        queued file as each one finishes. Replicas share the queue through row locks.
+    """
+    if EXTRACT_WORKERS <= 0:
+        return
+    slots = asyncio.Semaphore(EXTRACT_WORKERS)
+    running = set()
+    backlog_checked = 0
+
+    def done(task):
+        running.discard(task)
+        slots.release()
+
+    try:
+        while True:
+            await slots.acquire()
+            job = None
+            try:
+                if time.monotonic() - backlog_checked >= EXTRACT_POLL_SECONDS:
+                    backlog_checked = time.monotonic()
+                    await _record_backlog()
+                job = await _claim()
+            except Exception as e:
+                print(f"Text extraction claim failed: {e}", flush=True)
+            if job is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(_wakeup.wait(), EXTRACT_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                _wakeup.clear()
+                continue
+            task = asyncio.create_task(_extract(job))
+            running.add(task)
+            task.add_done_callback(done)
+    finally:
+        # Rows left running are claimed again once they go stale
+        for task in running:
+            task.cancel()
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queue text extraction for content uploaded before it existed")
+    parser.add_argument("--retry-failed", action="store_true", help="also queue files that used up their attempts")
+    args = parser.parse_args()
+    print(asyncio.run(backfill(retry_failed=args.retry_failed)))
@@ -1,9 +1,116 @@
+import os
+import signal
+import asyncio
+import queue
 import grpc
 from concurrent import futures
-from courses_topics.check_services_pb2 import EnrollmentResponse, ValidityResponse, CourseNameResponse
+from sqlalchemy import and_, select
+from courses_topics.check_services_pb2 import EnrollmentResponse, ValidityResponse, CourseNameResponse, CourseAccessResponse, \
+    EnrollmentBatchResponse, ValidityBatchResponse, CourseNamesResponse, CourseChange, CourseChangeType
 from courses_topics.check_services_pb2_grpc import CourseServiceServicer, add_CourseServiceServicer_to_server
-from courses_topics.database import SessionLocal
+from courses_topics.database import SessionLocal, AsyncSessionLocal, async_engine
 import courses_topics.models as models
+from courses_topics.course_events import course_changes
+from common.db_pool import DB_POOL_CAPACITY
+from prometheus_client import start_http_server
+
+GRPC_LISTEN_ADDRESS = os.getenv("GRPC_LISTEN_ADDRESS", "[::]:50051")
+# "aio" serves on asyncio with the async engine, "sync" keeps the thread pool server
+GRPC_SERVER_MODE = os.getenv("GRPC_SERVER_MODE", "aio")
+GRPC_MAX_WORKERS = int(os.getenv("GRPC_MAX_WORKERS", "10"))
+# RPCs beyond this limit are rejected with RESOURCE_EXHAUSTED instead of queueing forever
+GRPC_MAX_CONCURRENT_RPCS = int(os.getenv("GRPC_MAX_CONCURRENT_RPCS", "1000"))
+# Upper bound on DB lookups in flight, sized against the database connection pool
+GRPC_DB_CONCURRENCY = int(os.getenv("GRPC_DB_CONCURRENCY", str(DB_POOL_CAPACITY)))
+GRPC_SHUTDOWN_GRACE_SECONDS = float(os.getenv("GRPC_SHUTDOWN_GRACE_SECONDS", "10"))
+# Pool metrics of the gRPC process, which does not share the API's /metrics endpoint
+GRPC_METRICS_PORT = int(os.getenv("GRPC_METRICS_PORT", "9464"))
+
+# Clients keep pooled channels alive with pings, so let them ping without active calls
+SERVER_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_ping_interval_without_data_ms", 10000),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+
+# Courses waiting for their deletion job to purge them no longer exist for other services
+live_course = models.Courses.course_is_deleted.is_(False)
+
+
+# Queries shared by the thread pool and asyncio servicers. Enrollments are joined to their
+# course, they outlive its soft delete until the purge removes them
+def enrollment_stmt(user_id: str, course_id: int):
+    return select(models.UserXrefCourse.id).join(
+        models.Courses, models.Courses.course_id == models.UserXrefCourse.course_id
+    ).filter(
+        models.UserXrefCourse.user_id == user_id,
+        models.UserXrefCourse.course_id == course_id,
+        live_course
+    ).limit(1)
+
+
+def validity_stmt(course_id: int):
+    return select(models.Courses.course_id).filter(models.Courses.course_id == course_id, live_course)
+
+
+def course_name_stmt(course_id: int):
+    return select(models.Courses.course_name).filter(models.Courses.course_id == course_id, live_course)
+
+
+def course_access_stmt(user_id: str, course_id: int):
+    """
+        The course row is outer joined with the user's enrollment so a missing
+        row means an invalid course and a NULL enrollment means not enrolled.
+    """
+    return select(models.Courses.course_name, models.UserXrefCourse.id).outerjoin(
+        models.UserXrefCourse,
+        and_(
+            models.UserXrefCourse.course_id == models.Courses.course_id,
+            models.UserXrefCourse.user_id == user_id
+        )
+    ).filter(models.Courses.course_id == course_id, live_course).limit(1)
+
+
+def enrollment_batch_stmt(user_id: str, course_ids: set):
+    return select(models.UserXrefCourse.course_id).join(
+        models.Courses, models.Courses.course_id == models.UserXrefCourse.course_id
+    ).filter(
+        models.UserXrefCourse.user_id == user_id,
+        models.UserXrefCourse.course_id.in_(course_ids),
+        live_course
+    )
+
+
+def validity_batch_stmt(course_ids: set):
+    return select(models.Courses.course_id).filter(models.Courses.course_id.in_(course_ids), live_course)
+
+
+def course_names_stmt(course_ids: set):
+    return select(models.Courses.course_id, models.Courses.course_name).filter(
+        models.Courses.course_id.in_(course_ids),
+        live_course
+    )
+
+
+def course_access_response(row):
+    if row is None:
+        return CourseAccessResponse(is_valid=False, is_enrolled=False)
+    return CourseAccessResponse(
+        is_valid=True,
+        is_enrolled=row.id is not None,
+        course_name=row.course_name
+    )
+
+
+def course_change_message(change: dict):
+    return CourseChange(
+        change_type=CourseChangeType.Value(change["change_type"]),
+        course_id=change["course_id"]
+    )
+
 
 class CourseService(CourseServiceServicer):
     """Implementation of the CourseService gRPC server."""
@@ -19,10 +126,7 @@ class CourseService(CourseServiceServicer):
         db = SessionLocal()
         try:
             # Query the User-Course mapping table
-            is_enrolled = db.query(models.UserXrefCourse).filter(
-                models.UserXrefCourse.user_id == user_id,
-                models.UserXrefCourse.course_id == course_id
-            ).first() is not None  # Check if a record exists
+            is_enrolled = db.execute(enrollment_stmt(user_id, course_id)).first() is not None
 
             # Return the response
             return EnrollmentResponse(is_enrolled=is_enrolled)
@@ -37,9 +141,7 @@ class CourseService(CourseServiceServicer):
 
         db = SessionLocal()
         try:
-            is_valid = db.query(models.Courses).filter(
-                models.Courses.course_id == course_id
-            ).first() is not None
+            is_valid = db.execute(validity_stmt(course_id)).first() is not None
 
             return ValidityResponse(is_valid=is_valid)
         finally:
@@ -52,19 +154,184 @@ class CourseService(CourseServiceServicer):
         course_id = request.course_id
         db = SessionLocal()
         try:
-            course_name = db.query(models.Courses.course_name).filter(models.Courses.course_id == course_id).scalar()
+            course_name = db.execute(course_name_stmt(course_id)).scalar()
             return CourseNameResponse(course_name=course_name)
         finally:
             db.close()
 
+    def AuthorizeCourseAccess(self, request, context):
+        """
+            Answers validity, enrollment and course name for a user in one query.
+        """
+        db = SessionLocal()
+        try:
+            row = db.execute(course_access_stmt(request.user_id, request.course_id)).first()
+            return course_access_response(row)
+        finally:
+            db.close()
+
+    def CheckEnrollmentBatch(self, request, context):
+        """
+            Check a user's enrollment in many courses with one IN query.
+        """
+        course_ids = set(request.course_ids)
+        db = SessionLocal()
+        try:
+            enrolled_ids = set(db.scalars(enrollment_batch_stmt(request.user_id, course_ids)).all()) if course_ids else set()
+            return EnrollmentBatchResponse(is_enrolled={cid: cid in enrolled_ids for cid in course_ids})
+        finally:
+            db.close()
+
+    def CheckValidityBatch(self, request, context):
+        """
+            Check whether many courses are present in DB with one IN query.
+        """
+        course_ids = set(request.course_ids)
+        db = SessionLocal()
+        try:
+            valid_ids = set(db.scalars(validity_batch_stmt(course_ids)).all()) if course_ids else set()
+            return ValidityBatchResponse(is_valid={cid: cid in valid_ids for cid in course_ids})
+        finally:
+            db.close()
+
+    def CourseNames(self, request, context):
+        """
+            Returns the course names for many course ids with one IN query.
+        """
+        course_ids = set(request.course_ids)
+        db = SessionLocal()
+        try:
+            rows = db.execute(course_names_stmt(course_ids)).all() if course_ids else []
+            return CourseNamesResponse(course_names={row.course_id: row.course_name for row in rows})
+        finally:
+            db.close()
+
+    def WatchCourseChanges(self, request, context):
+        """
+            Streams course and enrollment changes so clients can evict cached lookups.
+            Every open stream holds a worker thread, prefer the aio server for many watchers.
+        """
+        changes = queue.Queue()
+        token = course_changes.subscribe(changes.put)
+        try:
+            while context.is_active():
+                try:
+                    yield course_change_message(changes.get(timeout=1.0))
+                except queue.Empty:
+                    continue
+        finally:
+            course_changes.unsubscribe(token)
+
+
+class AsyncCourseService(CourseServiceServicer):
+    """
+        asyncio implementation of the CourseService backed by the async engine.
+        A semaphore bounds the DB lookups in flight so bursts wait for a free
+        connection instead of exhausting the pool.
+    """
+
+    def __init__(self, db_concurrency: int = GRPC_DB_CONCURRENCY):
+        self._db_slots = asyncio.Semaphore(db_concurrency)
+
+    async def _execute(self, stmt):
+        async with self._db_slots, AsyncSessionLocal() as db:
+            return await db.execute(stmt)
+
+    async def CheckEnrollment(self, request, context):
+        result = await self._execute(enrollment_stmt(request.user_id, request.course_id))
+        return EnrollmentResponse(is_enrolled=result.first() is not None)
+
+    async def CheckValidity(self, request, context):
+        result = await self._execute(validity_stmt(request.course_id))
+        return ValidityResponse(is_valid=result.first() is not None)
+
+    async def CourseName(self, request, context):
+        result = await self._execute(course_name_stmt(request.course_id))
+        return CourseNameResponse(course_name=result.scalar())
+
+    async def AuthorizeCourseAccess(self, request, context):
+        result = await self._execute(course_access_stmt(request.user_id, request.course_id))
+        return course_access_response(result.first())
+
+    async def CheckEnrollmentBatch(self, request, context):
+        course_ids = set(request.course_ids)
+        enrolled_ids = set()
+        if course_ids:
+            result = await self._execute(enrollment_batch_stmt(request.user_id, course_ids))
+            enrolled_ids = set(result.scalars().all())
+        return EnrollmentBatchResponse(is_enrolled={cid: cid in enrolled_ids for cid in course_ids})
+
+    async def CheckValidityBatch(self, request, context):
+        course_ids = set(request.course_ids)
+        valid_ids = set()
+        if course_ids:
+            result = await self._execute(validity_batch_stmt(course_ids))
+            valid_ids = set(result.scalars().all())
+        return ValidityBatchResponse(is_valid={cid: cid in valid_ids for cid in course_ids})
+
+    async def CourseNames(self, request, context):
+        course_ids = set(request.course_ids)
+        rows = []
+        if course_ids:
+            result = await self._execute(course_names_stmt(course_ids))
+            rows = result.all()
+        return CourseNamesResponse(course_names={row.course_id: row.course_name for row in rows})
+
+    async def WatchCourseChanges(self, request, context):
+        loop = asyncio.get_running_loop()
+        changes = asyncio.Queue()
+        token = course_changes.subscribe(lambda change: loop.call_soon_threadsafe(changes.put_nowait, change))
+        try:
+            while True:
+                yield course_change_message(await changes.get())
+        finally:
+            course_changes.unsubscribe(token)
+
+
 def serve():
     """Start the gRPC server."""
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=GRPC_MAX_WORKERS),
+        options=SERVER_OPTIONS,
+        maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS
+    )
     add_CourseServiceServicer_to_server(CourseService(), server)
-    server.add_insecure_port('[::]:50051')
-    print("gRPC server is running on port 50051...", flush=True)
+    server.add_insecure_port(GRPC_LISTEN_ADDRESS)
+    course_changes.start()
+    print(f"gRPC server is running on {GRPC_LISTEN_ADDRESS}...", flush=True)
     server.start()
     server.wait_for_termination()
 
+
+async def serve_async():
+    """Start the asyncio gRPC server and stop it gracefully on SIGINT/SIGTERM."""
+    server = grpc.aio.server(
+        options=SERVER_OPTIONS,
+        maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS
+    )
+    add_CourseServiceServicer_to_server(AsyncCourseService(), server)
+    server.add_insecure_port(GRPC_LISTEN_ADDRESS)
+    course_changes.start()
+    await server.start()
+    print(f"gRPC aio server is running on {GRPC_LISTEN_ADDRESS}...", flush=True)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    await stop_event.wait()
+
+    # Refuse new RPCs and let in-flight ones finish within the grace period
+    print("gRPC aio server shutting down...", flush=True)
+    await server.stop(GRPC_SHUTDOWN_GRACE_SECONDS)
+    course_changes.stop()
+    await async_engine.dispose()
+
+
 if __name__ == "__main__":
-    serve()
+    if GRPC_METRICS_PORT:
+        start_http_server(GRPC_METRICS_PORT)
+    if GRPC_SERVER_MODE == "sync":
+        serve()
+    else:
+        asyncio.run(serve_async())
@@ -0,0 +1,266 @@
+import os
+import time
+import uuid
+import asyncio
+import tempfile
+import zipfile
+import mimetypes
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from fastapi import UploadFile
+from sqlalchemy import update, insert, func
+from starlette.concurrency import run_in_threadpool
+from courses_topics import models
+from courses_topics import blobs
+from courses_topics import storage
+from courses_topics import extraction_jobs
+from courses_topics.response_cache import response_cache, course_topics_tag, topic_tag
+from courses_topics.database import AsyncSessionLocal
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# Uploaded archives wait here until their job has stored every file
+IMPORT_TMP_DIR = os.getenv("IMPORT_TMP_DIR", os.path.join(tempfile.gettempdir(), "expanse-imports"))
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+# Limits on what an archive claims to hold, checked before anything is extracted
+IMPORT_MAX_UNCOMPRESSED_BYTES = int(os.getenv("IMPORT_MAX_UNCOMPRESSED_BYTES", str(10 * 1024 * 1024 * 1024)))
+IMPORT_MAX_FILES = int(os.getenv("IMPORT_MAX_FILES", "10000"))
+# Archive members inflated and stored at the same time by one job
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "8"))
+IMPORT_PROGRESS_SECONDS = float(os.getenv("IMPORT_PROGRESS_SECONDS", "2"))
+# Archives only exist on the replica that accepted them, so a job it stopped updating cannot be resumed
+IMPORT_JOB_STALE_SECONDS = int(os.getenv("IMPORT_JOB_STALE_SECONDS", "600"))
+IMPORT_JOB_SWEEP_SECONDS = int(os.getenv("IMPORT_JOB_SWEEP_SECONDS", "300"))
+
+# Archives this process is importing right now, which the sweep must leave alone
+_active_archives = set()
+
+
+class ArchiveRejected(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class ImportPlan(NamedTuple):
+    topics: list        # topic names in archive order
+    files: list         # (topic name, content name, ZipInfo)
+    total_bytes: int
+
+
+def plan_import(path: str) -> ImportPlan:
+    """
+        Read the archive's central directory: every top level folder becomes a topic and
+        every file below it one of its contents. Files outside a folder, folders and
+        hidden files are skipped.
+    """
+    if not zipfile.is_zipfile(path):
+        raise ArchiveRejected("Archive is not a zip file")
+    topics, files, total_bytes = [], [], 0
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            parts = [part for part in info.filename.replace("\\", "/").split("/") if part]
+            if info.is_dir() or len(parts) < 2 or parts[0] == "__MACOSX" or any(part.startswith(".") for part in parts):
+                continue
+            topic_name, content_name = parts[0], "/".join(parts[1:])
+            if topic_name not in topics:
+                topics.append(topic_name)
+            files.append((topic_name, content_name, info))
+            total_bytes += info.file_size
+    if not files:
+        raise ArchiveRejected("Archive has no files inside topic folders")
+    if len(files) > IMPORT_MAX_FILES:
+        raise ArchiveRejected(f"Archive holds more than {IMPORT_MAX_FILES} files", 413)
+    if total_bytes > IMPORT_MAX_UNCOMPRESSED_BYTES:
+        raise ArchiveRejected("Archive expands past the import size limit", 413)
+    return ImportPlan(topics, files, total_bytes)
+
+
+async def save_archive(file: UploadFile) -> str:
+    """Copy the uploaded archive to local disk, zip needs a seekable file to find its directory."""
+    os.makedirs(IMPORT_TMP_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_TMP_DIR, f"{uuid.uuid4().hex}.zip")
+    size = 0
+    try:
+        with open(path, "wb") as out:
+            while chunk := await file.read(storage.STORAGE_CHUNK_SIZE):
+                size += len(chunk)
+                if size > IMPORT_MAX_BYTES:
+                    raise ArchiveRejected("Archive is larger than the import size limit", 413)
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def new_import_job(course_id: int, archive_name: str, plan: ImportPlan, user_id: str = None):
+    return models.ImportJobs(
+        job_id=uuid.uuid4().hex,
+        job_course_id=course_id,
+        job_archive_name=archive_name,
+        job_status=JOB_PENDING,
+        job_files_total=len(plan.files),
+        job_bytes_total=plan.total_bytes,
+        job_created_by=user_id
+    )
+
+
+class _ArchiveMember:
+    """UploadFile stand-in that inflates one archive member as it is read, in the threadpool."""
+
+    def __init__(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo, filename: str):
+        self.filename = filename
+        self.content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        self._archive = archive
+        self._info = info
+        self._handle = None
+
+    async def read(self, size: int = -1) -> bytes:
+        # Opened on first read so only members being stored hold a decompressor
+        if self._handle is None:
+            self._handle = await run_in_threadpool(self._archive.open, self._info)
+        data = await run_in_threadpool(self._handle.read, size)
+        if not data:
+            self._handle.close()
+        return data
+
+
+async def _update(job_id: str, **values):
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(models.ImportJobs).where(models.ImportJobs.job_id == job_id).values(**values))
+        await db.commit()
+
+
+async def _report_progress(job_id: str, progress: dict):
+    while True:
+        await asyncio.sleep(IMPORT_PROGRESS_SECONDS)
+        await _update(job_id, job_files_done=progress["files"], job_bytes_done=progress["bytes"])
+
+
+async def run_import_job(job_id: str, path: str, archive_name: str, course_id: int, topic_is_released: bool, user_id: str):
+    """
+        Store every archive member concurrently, then create the topics and contents in a
+        single transaction. Progress is written to the job row while files are stored.
+    """
+    stored_files = []
+    _active_archives.add(path)
+    try:
+        await _update(job_id, job_status=JOB_RUNNING)
+        plan = await run_in_threadpool(plan_import, path)
+
+        progress = {"files": 0, "bytes": 0}
+
+        def on_stored(stored: storage.StoredFile):
+            progress["files"] += 1
+            progress["bytes"] += stored.length
+
+        with zipfile.ZipFile(path) as archive:
+            members = [_ArchiveMember(archive, info, content_name) for _, content_name, info in plan.files]
+            reporter = asyncio.create_task(_report_progress(job_id, progress))
+            try:
+                stored_files = await blobs.upload_files(
+                    members,
+                    metadata={"uploader": user_id, "course_id": course_id},
+                    concurrency=IMPORT_CONCURRENCY,
+                    on_stored=on_stored
+                )
+            finally:
+                reporter.cancel()
+
+        async with AsyncSessionLocal() as db:
+            try:
+                db_topics = {
+                    name: models.Topics(
+                        topic_name=name,
+                        topic_description=f"Imported from {archive_name}",
+                        course_id=course_id,
+                        topic_is_released=topic_is_released,
+                        topic_created_by=user_id,
+                        topic_updated_by=user_id,
+                        topic_created_timestamp=datetime.now(),
+                        topic_updated_timestamp=datetime.now()
+                    )
+                    for name in plan.topics
+                }
+                db.add_all(db_topics.values())
+                await db.flush()
+                await blobs.reference_blobs(db, stored_files)
+
+                content_rows = [
+                    {
+                        "course_id": course_id,
+                        "topic_id": db_topics[topic_name].topic_id,
+                        "content_id": blobs.new_content_id(),
+                        "content_blob": stored.sha256,
+                        "content_name": member.filename,
+                        "content_type": member.content_type,
+                        "content_created_by": user_id,
+                        "content_updated_by": user_id,
+                        "content_created_timestamp": datetime.now(),
+                        "content_updated_timestamp": datetime.now()
+                    }
+                    for (topic_name, _, _), member, stored in zip(plan.files, members, stored_files)
+                ]
+                await db.execute(insert(models.Contents), content_rows)
+                await extraction_jobs.queue_blobs(db, [stored.sha256 for stored in stored_files])
+                # Marked done in the same transaction, so a succeeded job always has its rows
+                await db.execute(
+                    update(models.ImportJobs)
+                    .where(models.ImportJobs.job_id == job_id)
+                    .values(
+                        job_status=JOB_SUCCEEDED,
+                        job_files_done=len(stored_files),
+                        job_bytes_done=progress["bytes"],
+                        job_topics_created=len(db_topics)
+                    )
+                )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+            extraction_jobs.notify()
+            await response_cache.invalidate(course_topics_tag(course_id), *(topic_tag(topic.topic_id) for topic in db_topics.values()))
+    except Exception as e:
+        # Nothing was committed, so every stored file goes, including new blobs
+        await blobs.delete_files([stored.file_id for stored in stored_files])
+        message = e.message if isinstance(e, ArchiveRejected) else str(e)
+        await _update(job_id, job_status=JOB_FAILED, job_error=message)
+    finally:
+        _active_archives.discard(path)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def fail_stale_import_jobs():
+    """Fail jobs whose replica stopped reporting progress, and drop archives nobody is importing."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(models.ImportJobs)
+            .where(
+                models.ImportJobs.job_status.in_([JOB_PENDING, JOB_RUNNING]),
+                models.ImportJobs.job_updated_timestamp < func.now() - timedelta(seconds=IMPORT_JOB_STALE_SECONDS)
+            )
+            .values(job_status=JOB_FAILED, job_error="Import stopped before it finished")
+        )
+        await db.commit()
+
+    if os.path.isdir(IMPORT_TMP_DIR):
+        cutoff = time.time() - IMPORT_JOB_STALE_SECONDS
+        for entry in os.scandir(IMPORT_TMP_DIR):
+            if entry.path not in _active_archives and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+
+async def sweep_import_jobs():
+    """Fail stale import jobs every IMPORT_JOB_SWEEP_SECONDS."""
+    while True:
+        try:
+            await fail_stale_import_jobs()
+        except Exception as e:
+            print(f"Import job sweep failed: {e}", flush=True)
+        await asyncio.sleep(IMPORT_JOB_SWEEP_SECONDS)
@@ -1,11 +1,43 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from courses_topics import models
+from prometheus_client import make_asgi_app
+from common.auth import register_auth_error_handler
+from common.migrations import upgrade_database
 from courses_topics.database import engine
 from courses_topics.course import router as course_router
 from courses_topics.topics import router as topic_router
+from courses_topics.deletion_jobs import sweep_deletion_jobs
+from courses_topics.reconcile import reconcile_periodically
+from courses_topics.import_jobs import sweep_import_jobs
+from courses_topics.extraction_jobs import run_extraction_worker
+from courses_topics.response_cache import response_cache
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Picks up deletion jobs a previous worker accepted but never finished
+    sweeper = asyncio.create_task(sweep_deletion_jobs())
+    # Removes stored files no row references any more, and reports rows whose file is gone
+    reconciler = asyncio.create_task(reconcile_periodically())
+    # Fails imports whose replica went away, their archives went with it
+    import_sweeper = asyncio.create_task(sweep_import_jobs())
+    # Extracts text from uploaded files on a process pool, for search indexing
+    extractor = asyncio.create_task(run_extraction_worker())
+    # Listens for response cache invalidations made on other replicas
+    response_cache.start()
+    yield
+    response_cache.stop()
+    sweeper.cancel()
+    reconciler.cancel()
+    import_sweeper.cancel()
+    extractor.cancel()
+
+app = FastAPI(lifespan=lifespan)
+
+register_auth_error_handler(app)
 
 origins = [
     "http://localhost:3000",
@@ -20,7 +52,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-models.Base.metadata.create_all(bind=engine)
+# Schema comes from the migrations, replicas starting together apply them once
+upgrade_database(engine, os.path.dirname(__file__))
 
 app.include_router(course_router)
 app.include_router(topic_router)
+
+# Prometheus scrape endpoint, includes the database pool metrics
+app.mount("/metrics", make_asgi_app())
@@ -0,0 +1,4 @@
+from common.migrations import run_env
+from courses_topics import models
+
+run_env(models.Base.metadata)
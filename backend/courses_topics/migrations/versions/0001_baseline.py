@@ -0,0 +1,165 @@
+"""Schema as create_all built it before migrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Only creates the tables a database is missing. Tables create_all made earlier predate
+the content and soft delete columns, 0003 and 0004 add those.
+"""
+import sqlalchemy as sa
+from alembic import op
+from common.migrations import missing_tables
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TABLES = (
+    "courses", "topics", "content_blobs", "topics_xref_contents", "user_xref_course",
+    "deletion_jobs", "import_jobs", "content_texts"
+)
+
+
+def _indexes(table: str, *columns):
+    for column in columns:
+        op.create_index(f"ix_{table}_{column}", table, [column])
+
+
+def upgrade():
+    missing = missing_tables(*TABLES)
+
+    if "courses" in missing:
+        op.create_table(
+            "courses",
+            sa.Column("course_id", sa.Integer, primary_key=True),
+            sa.Column("course_code", sa.String, nullable=False, unique=True),
+            sa.Column("course_name", sa.String, nullable=False),
+            sa.Column("course_description", sa.String, nullable=False),
+            sa.Column("course_created_by", sa.String, nullable=False),
+            sa.Column("course_created_timestamp", sa.DateTime, nullable=False),
+            sa.Column("course_updated_by", sa.String, nullable=False),
+            sa.Column("course_updated_timestamp", sa.DateTime, nullable=False),
+            sa.Column("course_is_deleted", sa.Boolean, nullable=False),
+        )
+        _indexes(
+            "courses", "course_id", "course_name", "course_description", "course_created_by",
+            "course_created_timestamp", "course_updated_by", "course_updated_timestamp", "course_is_deleted"
+        )
+
+    if "topics" in missing:
+        op.create_table(
+            "topics",
+            sa.Column("topic_id", sa.Integer, primary_key=True),
+            sa.Column("topic_name", sa.String, nullable=False),
+            sa.Column("topic_description", sa.String, nullable=False),
+            sa.Column("course_id", sa.Integer, sa.ForeignKey("courses.course_id")),
+            sa.Column("topic_is_released", sa.Boolean, nullable=False),
+            sa.Column("topic_created_by", sa.String, nullable=False),
+            sa.Column("topic_created_timestamp", sa.DateTime, nullable=False),
+            sa.Column("topic_updated_by", sa.String, nullable=False),
+            sa.Column("topic_updated_timestamp", sa.DateTime, nullable=False),
+            sa.Column("topic_is_deleted", sa.Boolean, nullable=False),
+        )
+        _indexes(
+            "topics", "topic_id", "topic_name", "topic_description", "topic_is_released", "topic_created_by",
+            "topic_created_timestamp", "topic_updated_by", "topic_updated_timestamp", "topic_is_deleted"
+        )
+
+    if "content_blobs" in missing:
+        op.create_table(
+            "content_blobs",
+            sa.Column("blob_digest", sa.String, primary_key=True),
+            sa.Column("blob_file_id", sa.String, nullable=False, unique=True),
+            sa.Column("blob_size", sa.BigInteger, nullable=False),
+            sa.Column("blob_ref_count", sa.Integer, nullable=False),
+            sa.Column("blob_created_timestamp", sa.DateTime, nullable=False),
+        )
+
+    if "topics_xref_contents" in missing:
+        op.create_table(
+            "topics_xref_contents",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("course_id", sa.Integer, sa.ForeignKey("courses.course_id")),
+            sa.Column("topic_id", sa.Integer, sa.ForeignKey("topics.topic_id")),
+            sa.Column("content_id", sa.String, nullable=False),
+            sa.Column("content_blob", sa.String, sa.ForeignKey("content_blobs.blob_digest"), nullable=True),
+            sa.Column("content_name", sa.String, nullable=True),
+            sa.Column("content_type", sa.String, nullable=True),
+            sa.Column("content_created_by", sa.String, nullable=False),
+            sa.Column("content_created_timestamp", sa.DateTime, nullable=False),
+            sa.Column("content_updated_by", sa.String, nullable=False),
+            sa.Column("content_updated_timestamp", sa.DateTime, nullable=False),
+        )
+        _indexes(
+            "topics_xref_contents", "id", "content_id", "content_blob", "content_created_by",
+            "content_created_timestamp", "content_updated_by", "content_updated_timestamp"
+        )
+
+    if "user_xref_course" in missing:
+        op.create_table(
+            "user_xref_course",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.String, nullable=False),
+            sa.Column("course_id", sa.Integer, sa.ForeignKey("courses.course_id")),
+            sa.Column("enrollment_date", sa.DateTime, nullable=False),
+        )
+        _indexes("user_xref_course", "id", "user_id", "enrollment_date")
+
+    if "deletion_jobs" in missing:
+        op.create_table(
+            "deletion_jobs",
+            sa.Column("job_id", sa.String, primary_key=True),
+            sa.Column("job_target", sa.String, nullable=False),
+            sa.Column("job_target_id", sa.Integer, nullable=False),
+            sa.Column("job_status", sa.String, nullable=False),
+            sa.Column("job_error", sa.String, nullable=True),
+            sa.Column("job_contents_deleted", sa.Integer, nullable=False),
+            sa.Column("job_files_deleted", sa.Integer, nullable=False),
+            sa.Column("job_created_by", sa.String, nullable=True),
+            sa.Column("job_created_timestamp", sa.DateTime, nullable=False),
+            sa.Column("job_updated_timestamp", sa.DateTime, nullable=False),
+        )
+        _indexes("deletion_jobs", "job_target_id", "job_status")
+
+    if "import_jobs" in missing:
+        op.create_table(
+            "import_jobs",
+            sa.Column("job_id", sa.String, primary_key=True),
+            sa.Column("job_course_id", sa.Integer, nullable=False),
+            sa.Column("job_archive_name", sa.String, nullable=True),
+            sa.Column("job_status", sa.String, nullable=False),
+            sa.Column("job_error", sa.String, nullable=True),
+            sa.Column("job_files_total", sa.Integer, nullable=False),
+            sa.Column("job_files_done", sa.Integer, nullable=False),
+            sa.Column("job_bytes_total", sa.BigInteger, nullable=False),
+            sa.Column("job_bytes_done", sa.BigInteger, nullable=False),
+            sa.Column("job_topics_created", sa.Integer, nullable=False),
+            sa.Column("job_created_by", sa.String, nullable=True),
+            sa.Column("job_created_timestamp", sa.DateTime, nullable=False),
+            sa.Column("job_updated_timestamp", sa.DateTime, nullable=False),
+        )
+        _indexes("import_jobs", "job_course_id", "job_status")
+
+    if "content_texts" in missing:
+        op.create_table(
+            "content_texts",
+            sa.Column("text_file_id", sa.String, primary_key=True),
+            sa.Column("text_content_type", sa.String, nullable=True),
+            sa.Column("text_file_name", sa.String, nullable=True),
+            sa.Column("text_status", sa.String, nullable=False),
+            sa.Column("text_attempts", sa.Integer, nullable=False),
+            sa.Column("text_next_attempt_timestamp", sa.DateTime, nullable=False),
+            sa.Column("text_error", sa.String, nullable=True),
+            sa.Column("text_body", sa.Text, nullable=True),
+            sa.Column("text_page_offsets", sa.ARRAY(sa.Integer), nullable=True),
+            sa.Column("text_created_timestamp", sa.DateTime, nullable=False),
+            sa.Column("text_updated_timestamp", sa.DateTime, nullable=False),
+        )
+        _indexes("content_texts", "text_status", "text_next_attempt_timestamp")
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_table(table)
@@ -0,0 +1,74 @@
+"""Drop indexes no query uses, add composites for the real lookups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Every insert and most updates wrote to an index per column, including free text and
+timestamps nothing filters on, while the lookups that matter had none: topics by
+course, contents by topic and enrollments by user and course.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Single column indexes from 0001, the ones on primary keys duplicate the primary key index
+DROPPED = {
+    "courses": (
+        "course_id", "course_name", "course_description", "course_created_by",
+        "course_created_timestamp", "course_updated_by", "course_updated_timestamp", "course_is_deleted"
+    ),
+    "topics": (
+        "topic_id", "topic_name", "topic_description", "topic_is_released", "topic_created_by",
+        "topic_created_timestamp", "topic_updated_by", "topic_updated_timestamp", "topic_is_deleted"
+    ),
+    "topics_xref_contents": (
+        "id", "content_created_by", "content_created_timestamp", "content_updated_by", "content_updated_timestamp"
+    ),
+    "user_xref_course": ("id", "user_id", "enrollment_date"),
+    "deletion_jobs": ("job_target_id",),
+    "import_jobs": ("job_course_id",),
+    "content_texts": ("text_status", "text_next_attempt_timestamp"),
+}
+
+# name, table, columns, unique
+ADDED = (
+    # GET /topics?mode=all keyset and the deletion job's purge by course
+    ("ix_topics_course_id_topic_id", "topics", ["course_id", "topic_id"], False),
+    # Content ids aggregated per topic, in upload order
+    ("ix_topics_xref_contents_topic_id_id", "topics_xref_contents", ["topic_id", "id"], False),
+    ("ix_topics_xref_contents_course_id", "topics_xref_contents", ["course_id"], False),
+    # Enrollment checks from the other services, and a user is enrolled in a course at most once
+    ("ux_user_xref_course_user_id_course_id", "user_xref_course", ["user_id", "course_id"], True),
+    # GET /course?mode=all keyset, most recent enrollments first
+    ("ix_user_xref_course_user_id_enrollment_date_id", "user_xref_course", ["user_id", "enrollment_date", "id"], False),
+    # GET /enrolledUsers keyset and enrollUser
+    ("ix_user_xref_course_course_id_id", "user_xref_course", ["course_id", "id"], False),
+    # Extraction worker claims the earliest due row of a status
+    ("ix_content_texts_text_status_text_next_attempt_timestamp", "content_texts", ["text_status", "text_next_attempt_timestamp"], False),
+)
+
+
+def upgrade():
+    for table, columns in DROPPED.items():
+        for column in columns:
+            op.drop_index(f"ix_{table}_{column}", table_name=table, if_exists=True)
+
+    # Keep the earliest enrollment of any duplicates so the unique index can be built
+    op.execute(
+        "DELETE FROM user_xref_course duplicate USING user_xref_course kept "
+        "WHERE duplicate.user_id = kept.user_id AND duplicate.course_id = kept.course_id AND duplicate.id > kept.id"
+    )
+    for name, table, columns, unique in ADDED:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _, _ in reversed(ADDED):
+        op.drop_index(name, table_name=table, if_exists=True)
+    for table, columns in DROPPED.items():
+        for column in columns:
+            op.create_index(f"ix_{table}_{column}", table, [column], if_not_exists=True)
@@ -0,0 +1,40 @@
+"""Add the deduplication columns to contents that predate them
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+Contents stored by sha256 point at their blob and carry their own name and type.
+Rows from before deduplication keep NULL in all three, which the service reads as
+content whose content_id is the stored file id.
+"""
+import sqlalchemy as sa
+from alembic import op
+from common.migrations import missing_columns
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+COLUMNS = ("content_blob", "content_name", "content_type")
+
+
+def upgrade():
+    missing = missing_columns("topics_xref_contents", *COLUMNS)
+
+    if "content_blob" in missing:
+        op.add_column("topics_xref_contents", sa.Column("content_blob", sa.String, nullable=True))
+        op.create_foreign_key(
+            "topics_xref_contents_content_blob_fkey", "topics_xref_contents", "content_blobs",
+            ["content_blob"], ["blob_digest"]
+        )
+        op.create_index("ix_topics_xref_contents_content_blob", "topics_xref_contents", ["content_blob"], if_not_exists=True)
+    for column in ("content_name", "content_type"):
+        if column in missing:
+            op.add_column("topics_xref_contents", sa.Column(column, sa.String, nullable=True))
+
+
+def downgrade():
+    # Every database at this revision has the columns, 0001 creates them on new ones
+    pass
@@ -0,0 +1,36 @@
+"""Add the soft delete flags to courses and topics that predate them
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Every course and topic existing before deletion jobs is live, so the flags are
+backfilled with false.
+"""
+import sqlalchemy as sa
+from alembic import op
+from common.migrations import missing_columns
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# table, column
+COLUMNS = (
+    ("courses", "course_is_deleted"),
+    ("topics", "topic_is_deleted"),
+)
+
+
+def upgrade():
+    for table, column in COLUMNS:
+        if column in missing_columns(table, column):
+            # The default fills existing rows, new ones get theirs from the model like tables 0001 created
+            op.add_column(table, sa.Column(column, sa.Boolean, nullable=False, server_default=sa.false()))
+            op.alter_column(table, column, server_default=None)
+
+
+def downgrade():
+    # Every database at this revision has the columns, 0001 creates them on new ones
+    pass
@@ -1,56 +1,146 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime
+from sqlalchemy import ARRAY, BigInteger, Boolean, Column, ForeignKey, Index, Integer, String, Text, DateTime
 from sqlalchemy.sql import func
 from courses_topics.database import Base
 
+# Indexes only where a query filters or sorts, every one is written on each insert.
+# Schema changes go through the migrations in courses_topics/migrations
+
 
 class Courses(Base):
     __tablename__ = "courses"
 
-    course_id = Column(Integer, primary_key=True, index=True)
+    course_id = Column(Integer, primary_key=True)
     course_code = Column(String, nullable=False, unique=True)
-    course_name = Column(String, nullable=False, index=True)
-    course_description = Column(String, nullable=False, index=True)
-    course_created_by = Column(String, nullable=False, index=True)
-    course_created_timestamp = Column(DateTime, default=func.now(), nullable=False, index=True)
-    course_updated_by = Column(String, nullable=False, index=True)
-    course_updated_timestamp = Column(DateTime, default=func.now(), nullable=False, index=True)
+    course_name = Column(String, nullable=False)
+    course_description = Column(String, nullable=False)
+    course_created_by = Column(String, nullable=False)
+    course_created_timestamp = Column(DateTime, default=func.now(), nullable=False)
+    course_updated_by = Column(String, nullable=False)
+    course_updated_timestamp = Column(DateTime, default=func.now(), nullable=False)
+    # Set as soon as deletion is requested, the rows themselves are purged by a deletion job
+    course_is_deleted = Column(Boolean, default=False, nullable=False)
 
 
 class Topics(Base):
     __tablename__ = "topics"
-
-    topic_id = Column(Integer, primary_key=True, index=True)
-    topic_name = Column(String, nullable=False, index=True)
-    topic_description = Column(String, nullable=False, index=True)
+    __table_args__ = (
+        # GET /topics?mode=all keyset and the deletion job's purge by course
+        Index("ix_topics_course_id_topic_id", "course_id", "topic_id"),
+    )
+
+    topic_id = Column(Integer, primary_key=True)
+    topic_name = Column(String, nullable=False)
+    topic_description = Column(String, nullable=False)
     course_id = Column(Integer, ForeignKey("courses.course_id"))
-    topic_is_released = Column(Boolean, default=False, nullable=False, index=True)
-    topic_created_by = Column(String, nullable=False, index=True)
-    topic_created_timestamp = Column(DateTime, default=func.now(), nullable=False, index=True)
-    topic_updated_by = Column(String, nullable=False, index=True)
-    topic_updated_timestamp = Column(DateTime, default=func.now(), nullable=False, index=True)
+    topic_is_released = Column(Boolean, default=False, nullable=False)
+    topic_created_by = Column(String, nullable=False)
+    topic_created_timestamp = Column(DateTime, default=func.now(), nullable=False)
+    topic_updated_by = Column(String, nullable=False)
+    topic_updated_timestamp = Column(DateTime, default=func.now(), nullable=False)
+    topic_is_deleted = Column(Boolean, default=False, nullable=False)
+
+
+class ContentBlobs(Base):
+    __tablename__ = "content_blobs"
+
+    # Uploaded bytes are stored once per sha256 digest and shared by every content row holding them
+    blob_digest = Column(String, primary_key=True)
+    blob_file_id = Column(String, nullable=False, unique=True)
+    blob_size = Column(BigInteger, nullable=False)
+    blob_ref_count = Column(Integer, default=0, nullable=False)
+    blob_created_timestamp = Column(DateTime, default=func.now(), nullable=False)
 
 
 class Contents(Base):
     __tablename__ = "topics_xref_contents"
+    __table_args__ = (
+        # Content ids aggregated per topic, in upload order
+        Index("ix_topics_xref_contents_topic_id_id", "topic_id", "id"),
+        Index("ix_topics_xref_contents_course_id", "course_id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     course_id = Column(Integer, ForeignKey("courses.course_id"))
     topic_id = Column(Integer, ForeignKey("topics.topic_id"))
     content_id = Column(String, default=False, nullable=False, index=True)
-    content_created_by = Column(String, nullable=False, index=True)
-    content_created_timestamp = Column(DateTime, default=func.now(), nullable=False, index=True)
-    content_updated_by = Column(String, nullable=False, index=True)
-    content_updated_timestamp = Column(DateTime, default=func.now(), nullable=False, index=True)
+    # NULL for contents uploaded before deduplication, whose content_id is the GridFS file id
+    content_blob = Column(String, ForeignKey("content_blobs.blob_digest"), nullable=True, index=True)
+    content_name = Column(String, nullable=True)
+    content_type = Column(String, nullable=True)
+    content_created_by = Column(String, nullable=False)
+    content_created_timestamp = Column(DateTime, default=func.now(), nullable=False)
+    content_updated_by = Column(String, nullable=False)
+    content_updated_timestamp = Column(DateTime, default=func.now(), nullable=False)
 
 
 class UserXrefCourse(Base):
     __tablename__ = "user_xref_course"
-
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, nullable=False, index=True)
+    __table_args__ = (
+        # Enrollment checks from the other services, and a user is enrolled in a course at most once
+        Index("ux_user_xref_course_user_id_course_id", "user_id", "course_id", unique=True),
+        # GET /course?mode=all keyset, most recent enrollments first
+        Index("ix_user_xref_course_user_id_enrollment_date_id", "user_id", "enrollment_date", "id"),
+        # GET /enrolledUsers keyset and enrollUser
+        Index("ix_user_xref_course_course_id_id", "course_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String, nullable=False)
     course_id = Column(Integer, ForeignKey("courses.course_id"))
-    enrollment_date = Column(DateTime, default=func.now(), nullable=False, index=True)
-
-
-
-
+    enrollment_date = Column(DateTime, default=func.now(), nullable=False)
+
+
+class DeletionJobs(Base):
+    __tablename__ = "deletion_jobs"
+
+    job_id = Column(String, primary_key=True)
+    job_target = Column(String, nullable=False)             # "course" or "topic"
+    job_target_id = Column(Integer, nullable=False)
+    job_status = Column(String, default="pending", nullable=False, index=True)
+    job_error = Column(String, nullable=True)
+    job_contents_deleted = Column(Integer, default=0, nullable=False)
+    job_files_deleted = Column(Integer, default=0, nullable=False)
+    job_created_by = Column(String, nullable=True)
+    job_created_timestamp = Column(DateTime, default=func.now(), nullable=False)
+    job_updated_timestamp = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class ImportJobs(Base):
+    __tablename__ = "import_jobs"
+
+    job_id = Column(String, primary_key=True)
+    job_course_id = Column(Integer, nullable=False)
+    job_archive_name = Column(String, nullable=True)
+    job_status = Column(String, default="pending", nullable=False, index=True)
+    job_error = Column(String, nullable=True)
+    job_files_total = Column(Integer, default=0, nullable=False)
+    job_files_done = Column(Integer, default=0, nullable=False)
+    job_bytes_total = Column(BigInteger, default=0, nullable=False)
+    job_bytes_done = Column(BigInteger, default=0, nullable=False)
+    job_topics_created = Column(Integer, default=0, nullable=False)
+    job_created_by = Column(String, nullable=True)
+    job_created_timestamp = Column(DateTime, default=func.now(), nullable=False)
+    job_updated_timestamp = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class ContentTexts(Base):
+    __tablename__ = "content_texts"
+    __table_args__ = (
+        # The worker claims the earliest due row of a status
+        Index("ix_content_texts_text_status_text_next_attempt_timestamp", "text_status", "text_next_attempt_timestamp"),
+    )
+
+    # One row per stored file, so contents sharing a blob are extracted once.
+    # Doubles as the extraction queue until text_status leaves "pending"
+    text_file_id = Column(String, primary_key=True)
+    text_content_type = Column(String, nullable=True)
+    text_file_name = Column(String, nullable=True)
+    text_status = Column(String, default="pending", nullable=False)
+    text_attempts = Column(Integer, default=0, nullable=False)
+    text_next_attempt_timestamp = Column(DateTime, default=func.now(), nullable=False)
+    text_error = Column(String, nullable=True)
+    text_body = Column(Text, nullable=True)
+    # Character offset in text_body where each page or slide starts
+    text_page_offsets = Column(ARRAY(Integer), nullable=True)
+    text_created_timestamp = Column(DateTime, default=func.now(), nullable=False)
+    text_updated_timestamp = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,193 @@
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from prometheus_client import Counter, Gauge
+from sqlalchemy import select, func
+from courses_topics import models
+from courses_topics import blobs
+from courses_topics import storage
+from courses_topics import import_jobs
+from courses_topics.database import AsyncSessionLocal
+
+RECONCILE_INTERVAL_SECONDS = int(os.getenv("RECONCILE_INTERVAL_SECONDS", "3600"))
+# Files younger than this may belong to an upload whose rows are not committed yet.
+# Import jobs commit their rows only once every file is stored, so while one is pending
+# or running nothing stored since it was created counts as an orphan either
+RECONCILE_GRACE_SECONDS = int(os.getenv("RECONCILE_GRACE_SECONDS", "3600"))
+RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", "500"))
+# Orphans deleted per second, so a large cleanup does not compete with user traffic
+RECONCILE_DELETE_RATE = float(os.getenv("RECONCILE_DELETE_RATE", "100"))
+# Report orphans without deleting anything
+RECONCILE_DRY_RUN = os.getenv("RECONCILE_DRY_RUN", "false").lower() == "true"
+
+# Advisory lock key shared by every replica so only one of them reconciles at a time
+RECONCILE_LOCK_KEY = 7305001
+
+reconcile_runs = Counter("storage_reconcile_runs_total", "Reconciliation runs by outcome", ["outcome"])
+orphan_files = Counter("storage_orphan_files_total", "Stored files no row references", ["action"])
+orphan_chunks_deleted = Counter("storage_orphan_chunks_deleted_total", "Chunks deleted whose file document was missing")
+orphan_bytes_reclaimed = Counter("storage_orphan_bytes_reclaimed_total", "Bytes freed by deleting orphaned files")
+dangling_references = Gauge("storage_dangling_references", "File ids referenced by rows but missing from storage, as of the last run")
+reconcile_last_success = Gauge("storage_reconcile_last_success_timestamp_seconds", "When the last reconciliation finished")
+
+
+class _Reconciliation:
+    """Collects orphans found by the merge join and deletes them in rate limited batches."""
+
+    def __init__(self, dry_run: bool, grace_seconds: float):
+        self.dry_run = dry_run
+        self.cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+        self.pending_files = []
+        self.pending_chunks = []
+        self.stats = {"files": 0, "bytes": 0, "chunks": 0, "dangling": 0, "skipped": 0}
+        self.dangling_sample = []
+
+    def _settled(self, file_id: str, upload_date) -> bool:
+        # Chunk-only orphans have no upload date, the id still records when the upload began
+        created = upload_date or ObjectId(file_id).generation_time
+        # MongoDB hands back naive UTC datetimes
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=timezone.utc)
+        return created < self.cutoff
+
+    async def orphan_file(self, file_id: str, length: int, upload_date):
+        if not self._settled(file_id, upload_date):
+            self.stats["skipped"] += 1
+            return
+        self.pending_files.append((file_id, length or 0))
+        if len(self.pending_files) >= RECONCILE_BATCH_SIZE:
+            await self.flush_files()
+
+    async def orphan_chunks(self, file_id: str, chunk_count: int):
+        if not self._settled(file_id, None):
+            self.stats["skipped"] += 1
+            return
+        self.pending_chunks.append((file_id, chunk_count))
+        if len(self.pending_chunks) >= RECONCILE_BATCH_SIZE:
+            await self.flush_chunks()
+
+    def dangling(self, file_id: str):
+        self.stats["dangling"] += 1
+        if len(self.dangling_sample) < 20:
+            self.dangling_sample.append(file_id)
+
+    async def flush_files(self):
+        batch, self.pending_files = self.pending_files, []
+        if not batch:
+            return
+        size = sum(length for _, length in batch)
+        self.stats["files"] += len(batch)
+        self.stats["bytes"] += size
+        if self.dry_run:
+            orphan_files.labels("reported").inc(len(batch))
+            return
+        await storage.delete_many([file_id for file_id, _ in batch])
+        orphan_files.labels("deleted").inc(len(batch))
+        orphan_bytes_reclaimed.inc(size)
+        await asyncio.sleep(len(batch) / RECONCILE_DELETE_RATE)
+
+    async def flush_chunks(self):
+        batch, self.pending_chunks = self.pending_chunks, []
+        if not batch:
+            return
+        self.stats["chunks"] += sum(count for _, count in batch)
+        if self.dry_run:
+            return
+        deleted = await storage.delete_chunks([file_id for file_id, _ in batch])
+        orphan_chunks_deleted.inc(deleted)
+        await asyncio.sleep(len(batch) / RECONCILE_DELETE_RATE)
+
+
+async def _grace_seconds() -> float:
+    """RECONCILE_GRACE_SECONDS, or longer to reach back to the oldest import job still storing files."""
+    async with AsyncSessionLocal() as db:
+        # Measured against the database clock, which stamped the job
+        import_age = await db.scalar(
+            select(func.extract("epoch", func.localtimestamp() - func.min(models.ImportJobs.job_created_timestamp)))
+            .where(models.ImportJobs.job_status.in_([import_jobs.JOB_PENDING, import_jobs.JOB_RUNNING]))
+        )
+    return max(RECONCILE_GRACE_SECONDS, float(import_age or 0))
+
+
+async def _referenced_file_ids(batch_size: int):
+    """Referenced file ids in id order, each page read in a short transaction of its own."""
+    after = None
+    while True:
+        async with AsyncSessionLocal() as db:
+            page = (await db.scalars(blobs.referenced_file_ids(after).limit(batch_size))).all()
+        for file_id in page:
+            yield file_id
+        if len(page) < batch_size:
+            return
+        after = page[-1]
+
+
+async def reconcile(dry_run: bool = RECONCILE_DRY_RUN):
+    """
+        Merge join stored files, GridFS chunks and the file ids rows reference, all streamed
+        in file id order, so memory stays bounded by the batch size however large either side is.
+        Orphaned files and chunks are deleted, dangling references are only reported.
+        Returns the run's counts, or None when another replica holds the lock.
+    """
+    async with AsyncSessionLocal() as lock_db:
+        # A transaction level lock, so it also holds behind PgBouncer in transaction mode.
+        # Its transaction runs nothing else and holds no snapshot through the run's sleeps
+        if not await lock_db.scalar(select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_KEY))):
+            return None
+
+        run = _Reconciliation(dry_run, await _grace_seconds())
+        files = storage.iter_files(RECONCILE_BATCH_SIZE)
+        chunks = storage.iter_chunk_owners(RECONCILE_BATCH_SIZE)
+        refs = _referenced_file_ids(RECONCILE_BATCH_SIZE)
+
+        file_head = await anext(files, None)
+        chunk_head = await anext(chunks, None)
+        ref_head = await anext(refs, None)
+        while file_head or chunk_head or ref_head:
+            key = min(k for k in (file_head and file_head[0], chunk_head and chunk_head[0], ref_head) if k)
+            in_files = file_head is not None and file_head[0] == key
+            in_chunks = chunk_head is not None and chunk_head[0] == key
+            referenced = ref_head == key
+
+            if in_files and not referenced:
+                await run.orphan_file(*file_head)
+            elif in_chunks and not referenced and not in_files:
+                await run.orphan_chunks(*chunk_head)
+            elif referenced and not in_files:
+                run.dangling(key)
+
+            if in_files:
+                file_head = await anext(files, None)
+            if in_chunks:
+                chunk_head = await anext(chunks, None)
+            if referenced:
+                ref_head = await anext(refs, None)
+
+        await run.flush_files()
+        await run.flush_chunks()
+        await lock_db.commit()
+
+    dangling_references.set(run.stats["dangling"])
+    if run.dangling_sample:
+        print(f"Dangling content references, first {len(run.dangling_sample)}: {run.dangling_sample}", flush=True)
+    return run.stats
+
+
+async def reconcile_periodically():
+    """Reconcile storage every RECONCILE_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+        try:
+            stats = await reconcile()
+            if stats is not None:
+                reconcile_runs.labels("succeeded").inc()
+                reconcile_last_success.set_to_current_time()
+                print(f"Storage reconciliation finished: {stats}", flush=True)
+        except Exception as e:
+            reconcile_runs.labels("failed").inc()
+            print(f"Storage reconciliation failed: {e}", flush=True)
+
+
+if __name__ == "__main__":
+    print(asyncio.run(reconcile()))
@@ -0,0 +1,193 @@
+import os
+import json
+import asyncio
+from prometheus_client import Counter
+from sqlalchemy import text
+from common.ttl_cache import TTLCache
+from courses_topics.database import async_engine
+from courses_topics.course_events import CourseChangeBroadcaster
+
+# memory keeps responses in each replica, redis shares them between replicas, off turns the cache off
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+# Also bounds staleness on a replica that missed an invalidation while its listener was down
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+# Responses held by the memory backend, least recently used go first
+RESPONSE_CACHE_MAXSIZE = int(os.getenv("RESPONSE_CACHE_MAXSIZE", "10000"))
+
+# Hit ratio is hit over all results of one cache
+cache_requests = Counter("response_cache_requests_total", "Response cache lookups by cache and result", ["cache", "result"])
+cache_invalidations = Counter("response_cache_invalidations_total", "Tags invalidated in the response cache")
+
+# Carries memory backend invalidations to the other replicas
+RESPONSE_CACHE_CHANNEL = "response_cache_invalidations"
+# Tags per NOTIFY, Postgres caps a payload at 8000 bytes
+NOTIFY_BATCH = 200
+
+
+def course_tag(course_id: int) -> str:
+    return f"course:{course_id}"
+
+
+def course_topics_tag(course_id: int) -> str:
+    # Every page of a course's topic list
+    return f"course-topics:{course_id}"
+
+
+def topic_tag(topic_id: int) -> str:
+    return f"topic:{topic_id}"
+
+
+class CacheBackend:
+    """
+        Interface every response cache backend implements. Entries are [versions, value]
+        pairs of JSON types, stored under string keys. Tags only have a version, which
+        bump changes to a value it never had before.
+    """
+
+    async def lookup(self, key: str, tags: tuple) -> tuple:
+        """Return the entry stored under key or None, and the current version of every tag."""
+        raise NotImplementedError
+
+    async def store(self, key: str, entry: list, ttl: float):
+        raise NotImplementedError
+
+    async def bump(self, tags: tuple):
+        raise NotImplementedError
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """
+        Entries in an LRU of each replica. Bumps apply here at once and reach the other
+        replicas through Postgres NOTIFY, which every replica LISTENs for once started.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        # Tag versions are the generations of the entries' cache, bounded by its LRU like the
+        # entries. A bumped or dropped tag comes back with a version no entry was stored under
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._listener = CourseChangeBroadcaster(channel=RESPONSE_CACHE_CHANNEL)
+        self._listener.subscribe(lambda message: self._bump_local(message["tags"]))
+
+    async def lookup(self, key: str, tags: tuple) -> tuple:
+        return self._entries.get(key, None), self._entries.generation(tags)[1:]
+
+    async def store(self, key: str, entry: list, ttl: float):
+        self._entries.set(key, entry, ttl=ttl)
+
+    def _bump_local(self, tags):
+        # Also called from the listener thread
+        for tag in tags:
+            self._entries.evict_tag(tag)
+
+    async def bump(self, tags: tuple):
+        self._bump_local(tags)
+        tags = list(tags)
+        async with async_engine.connect() as conn:
+            for i in range(0, len(tags), NOTIFY_BATCH):
+                payload = json.dumps({"tags": tags[i:i + NOTIFY_BATCH]})
+                await conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": RESPONSE_CACHE_CHANNEL, "payload": payload})
+            await conn.commit()
+
+    def start(self):
+        self._listener.start()
+
+    def stop(self):
+        self._listener.stop()
+
+
+class ResponseCache:
+    """
+        Read-through cache for GET responses. Every entry records the version of each tag
+        it was loaded under, and invalidating a tag bumps its version, so a load that raced
+        a write is never served once the write has invalidated it. Concurrent misses for one
+        key share a single load. Backend errors are logged and the request goes to the database.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._loads = {}
+
+    async def get_or_load(self, cache: str, key: str, tags: tuple, load):
+        """
+            Return the cached value for key, or await load() to fill it. load must use a
+            database session of its own, since requests that coalesce onto it share the result.
+        """
+        if self.backend is None:
+            return await load()
+        try:
+            entry, versions = await self.backend.lookup(key, tags)
+        except Exception as e:
+            print(f"Response cache lookup failed for {key}: {e}", flush=True)
+            cache_requests.labels(cache, "error").inc()
+            return await load()
+
+        if entry is not None and tuple(entry[0]) == versions:
+            cache_requests.labels(cache, "hit").inc()
+            return entry[1]
+
+        load_key = (key, versions)
+        task = self._loads.get(load_key)
+        if task is None:
+            cache_requests.labels(cache, "miss").inc()
+            task = asyncio.ensure_future(self._load(key, versions, load))
+            self._loads[load_key] = task
+            task.add_done_callback(lambda done: self._load_done(load_key, done))
+        else:
+            cache_requests.labels(cache, "coalesced").inc()
+        # Shielded so a client hanging up does not abort the load other requests wait on
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, versions: tuple, load):
+        value = await load()
+        try:
+            await self.backend.store(key, [list(versions), value], self.ttl)
+        except Exception as e:
+            print(f"Response cache store failed for {key}: {e}", flush=True)
+        return value
+
+    def _load_done(self, load_key: tuple, task):
+        self._loads.pop(load_key, None)
+        # Retrieved here too in case every waiter went away before the load finished
+        if not task.cancelled():
+            task.exception()
+
+    async def invalidate(self, *tags):
+        """Drop every response loaded under any of the tags, call once the change is committed."""
+        if self.backend is None or not tags:
+            return
+        try:
+            await self.backend.bump(tags)
+            cache_invalidations.inc(len(tags))
+        except Exception as e:
+            # Entries stay until their TTL runs out
+            print(f"Response cache invalidation failed for {tags}: {e}", flush=True)
+
+    def start(self):
+        if self.backend is not None:
+            self.backend.start()
+
+    def stop(self):
+        if self.backend is not None:
+            self.backend.stop()
+
+
+def _create_backend(backend: str) -> CacheBackend:
+    # Backends import their client libraries only when selected
+    if backend == "off":
+        return None
+    if backend == "memory":
+        return MemoryBackend(RESPONSE_CACHE_MAXSIZE, RESPONSE_CACHE_TTL_SECONDS)
+    if backend == "redis":
+        from courses_topics.response_cache_redis import RedisBackend
+        return RedisBackend()
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {backend}")
+
+
+response_cache = ResponseCache(_create_backend(RESPONSE_CACHE_BACKEND), RESPONSE_CACHE_TTL_SECONDS)
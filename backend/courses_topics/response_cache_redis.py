@@ -0,0 +1,51 @@
+import os
+import json
+import time
+import redis.asyncio as redis
+from courses_topics.response_cache import CacheBackend
+
+# Any server speaking the Redis protocol, such as Valkey or KeyDB
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_REDIS_PREFIX = os.getenv("RESPONSE_CACHE_REDIS_PREFIX", "expanse:response:")
+# Tag versions outlive the entries they guard, one that expires just makes those entries miss
+RESPONSE_CACHE_VERSION_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_VERSION_TTL_SECONDS", str(24 * 60 * 60)))
+
+
+class RedisBackend(CacheBackend):
+    """Entries and tag versions on a Redis server shared by every replica, one round trip per hit."""
+
+    def __init__(self):
+        self._client = redis.from_url(REDIS_URL)
+
+    def _entry_key(self, key: str) -> str:
+        return f"{RESPONSE_CACHE_REDIS_PREFIX}entry:{key}"
+
+    def _version_key(self, tag: str) -> str:
+        return f"{RESPONSE_CACHE_REDIS_PREFIX}version:{tag}"
+
+    async def lookup(self, key: str, tags: tuple) -> tuple:
+        values = await self._client.mget([self._entry_key(key), *(self._version_key(tag) for tag in tags)])
+        entry, versions = values[0], list(values[1:])
+        missing = [i for i, version in enumerate(versions) if version is None]
+        if missing:
+            # Versions start at the current time rather than 0, so a version Redis evicted or
+            # expired comes back as a value no entry was stored under
+            async with self._client.pipeline(transaction=False) as pipe:
+                for i in missing:
+                    pipe.set(self._version_key(tags[i]), time.time_ns(), nx=True, ex=RESPONSE_CACHE_VERSION_TTL_SECONDS)
+                for i in missing:
+                    pipe.get(self._version_key(tags[i]))
+                results = await pipe.execute()
+            for i, version in zip(missing, results[len(missing):]):
+                versions[i] = version
+        return (json.loads(entry) if entry is not None else None), tuple(int(version) for version in versions)
+
+    async def store(self, key: str, entry: list, ttl: float):
+        await self._client.set(self._entry_key(key), json.dumps(entry), px=int(ttl * 1000))
+
+    async def bump(self, tags: tuple):
+        async with self._client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(self._version_key(tag))
+                pipe.expire(self._version_key(tag), RESPONSE_CACHE_VERSION_TTL_SECONDS)
+            await pipe.execute()
@@ -35,6 +35,12 @@ class TopicBase(BaseModel):
 class TopicCreate(TopicBase):
     pass
 
+class TopicUploadForm(BaseModel):
+    topic_name: str
+    topic_description: str
+    course_id: int
+    topic_is_released: bool
+
 class TopicResponse(TopicBase):
     topic_id: Optional[int] = None
     topic_created_by: Optional[str] = None
@@ -54,6 +60,41 @@ class ContentBase(BaseModel):
     class Config:
         from_attributes=True
 
+class ContentUploadForm(BaseModel):
+    course_id: int
+    topic_id: int
+
+
+class DeletionJobResponse(BaseModel):
+    job_id: Optional[str] = None
+    job_target: Optional[str] = None
+    job_target_id: Optional[int] = None
+    job_status: Optional[str] = None
+    job_error: Optional[str] = None
+    job_contents_deleted: Optional[int] = None
+    job_files_deleted: Optional[int] = None
+    job_created_timestamp: Optional[datetime] = None
+    job_updated_timestamp: Optional[datetime] = None
+    class Config:
+        from_attributes=True
+
+
+class ImportJobResponse(BaseModel):
+    job_id: Optional[str] = None
+    job_course_id: Optional[int] = None
+    job_archive_name: Optional[str] = None
+    job_status: Optional[str] = None
+    job_error: Optional[str] = None
+    job_files_total: Optional[int] = None
+    job_files_done: Optional[int] = None
+    job_bytes_total: Optional[int] = None
+    job_bytes_done: Optional[int] = None
+    job_topics_created: Optional[int] = None
+    job_created_timestamp: Optional[datetime] = None
+    job_updated_timestamp: Optional[datetime] = None
+    class Config:
+        from_attributes=True
+
 
 class UserEnroll(BaseModel):
     course_id: Optional[int] = None
@@ -0,0 +1,193 @@
+import os
+import re
+from typing import NamedTuple
+from bson import ObjectId
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+# gridfs, filesystem or s3
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "gridfs")
+# Older backend still holding files after a switch, read and cleaned up but never written to
+STORAGE_FALLBACK_BACKEND = os.getenv("STORAGE_FALLBACK_BACKEND", "")
+# Uploads and downloads move through the event loop one chunk at a time
+STORAGE_CHUNK_SIZE = int(os.getenv("STORAGE_CHUNK_SIZE", str(1024 * 1024)))
+
+# Ids per delete_many round trip when many files are removed at once
+STORAGE_DELETE_BATCH = int(os.getenv("STORAGE_DELETE_BATCH", "1000"))
+
+
+class StoredFile(NamedTuple):
+    file_id: str
+    sha256: str
+    length: int
+
+
+def new_file_id() -> str:
+    # ObjectId strings on every backend, so ids sort by creation time and fit the content_id column
+    return str(ObjectId())
+
+
+def is_file_id(file_id) -> bool:
+    """
+        Whether file_id has the shape new_file_id gives ids. Ids reach the stores from
+        request parameters, so anything else is refused before it becomes a path or key.
+    """
+    return isinstance(file_id, str) and re.fullmatch(r"[0-9a-f]{24}", file_id) is not None
+
+
+class BlobStore:
+    """
+        Interface every storage backend implements. Files are addressed by string ids.
+        Downloads are file-like streams shaped after GridOut: length, filename, metadata
+        and content_type attributes, seek(pos), an awaitable read(size) and close().
+    """
+
+    async def save_upload(self, file: UploadFile, metadata: dict) -> StoredFile:
+        """Stream an uploaded file into storage, hashing it on the way through."""
+        raise NotImplementedError
+
+    async def open_download(self, file_id: str):
+        """Open a stored file for streaming, None when it does not exist."""
+        raise NotImplementedError
+
+    async def delete_many(self, file_ids: list) -> int:
+        """Delete files in bulk, returning how many were removed."""
+        raise NotImplementedError
+
+    async def iter_files(self, batch_size: int):
+        """Yield (file_id, length, upload_date) for every stored file in file id order."""
+        raise NotImplementedError
+        yield
+
+    async def iter_chunk_owners(self, batch_size: int):
+        """Yield (file_id, chunk_count) in file id order, for backends storing chunks apart from files."""
+        return
+        yield
+
+    async def delete_chunks(self, file_ids: list) -> int:
+        return 0
+
+
+class LocalFileStream:
+    """Download stream over a file on local disk, reads run in the threadpool."""
+
+    def __init__(self, path: str, filename: str = None, metadata: dict = None):
+        # Opened up front so the file stays readable if its name is unlinked mid-stream
+        self._file = open(path, "rb")
+        self.path = path
+        self.filename = filename
+        self.metadata = metadata or {}
+        self.content_type = None
+        self.length = os.fstat(self._file.fileno()).st_size
+
+    def seek(self, pos: int):
+        self._file.seek(pos)
+
+    async def read(self, size: int = -1) -> bytes:
+        return await run_in_threadpool(self._file.read, size)
+
+    def close(self):
+        self._file.close()
+
+
+def content_type(stream) -> str:
+    # Files written through the legacy GridFS API keep contentType on the file document
+    metadata = stream.metadata or {}
+    return metadata.get("contentType") or stream.content_type or "application/octet-stream"
+
+
+async def close_download(stream):
+    """Release what an open download holds, in the threadpool since closing a GridOut may talk to MongoDB."""
+    await run_in_threadpool(stream.close)
+
+
+async def closing(stream, body):
+    """
+        Yield the body of a response, then close the download it reads from. The close is
+        synchronous so it also runs when the response is cancelled by a client going away.
+    """
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        stream.close()
+
+
+async def iter_download(stream):
+    while chunk := await stream.read(STORAGE_CHUNK_SIZE):
+        yield chunk
+
+
+async def iter_range(stream, start: int, end: int):
+    """Yield bytes start..end inclusive, seeking so only the part covering them is fetched."""
+    stream.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        chunk = await stream.read(min(STORAGE_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def _create_store(backend: str) -> BlobStore:
+    # Backends import their client libraries only when selected
+    if backend == "gridfs":
+        from courses_topics.storage_gridfs import GridFSStore
+        return GridFSStore()
+    if backend == "filesystem":
+        from courses_topics.storage_fs import FileSystemStore
+        return FileSystemStore()
+    if backend == "s3":
+        from courses_topics.storage_s3 import S3Store
+        return S3Store()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+async def _merge_sorted(streams: list):
+    """Merge async iterators of tuples already sorted by their first element."""
+    heads = [await anext(stream, None) for stream in streams]
+    while any(head is not None for head in heads):
+        i = min((i for i, head in enumerate(heads) if head is not None), key=lambda i: heads[i][0])
+        yield heads[i]
+        heads[i] = await anext(streams[i], None)
+
+
+store = _create_store(STORAGE_BACKEND)
+stores = [store]
+if STORAGE_FALLBACK_BACKEND and STORAGE_FALLBACK_BACKEND != STORAGE_BACKEND:
+    stores.append(_create_store(STORAGE_FALLBACK_BACKEND))
+
+
+async def save_upload(file: UploadFile, metadata: dict) -> StoredFile:
+    return await store.save_upload(file, metadata)
+
+
+async def open_download(file_id: str):
+    for backend in stores:
+        stream = await backend.open_download(file_id)
+        if stream is not None:
+            return stream
+    return None
+
+
+async def delete_many(file_ids: list) -> int:
+    deleted = 0
+    for backend in stores:
+        deleted += await backend.delete_many(file_ids)
+    return deleted
+
+
+def iter_files(batch_size: int):
+    return _merge_sorted([backend.iter_files(batch_size) for backend in stores])
+
+
+def iter_chunk_owners(batch_size: int):
+    return _merge_sorted([backend.iter_chunk_owners(batch_size) for backend in stores])
+
+
+async def delete_chunks(file_ids: list) -> int:
+    deleted = 0
+    for backend in stores:
+        deleted += await backend.delete_chunks(file_ids)
+    return deleted
@@ -0,0 +1,106 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from courses_topics.storage import BlobStore, StoredFile, LocalFileStream, new_file_id, is_file_id, STORAGE_CHUNK_SIZE
+
+# Usually a volume shared by every replica
+STORAGE_FS_ROOT = os.getenv("STORAGE_FS_ROOT", "/var/lib/expanse/content")
+
+
+class FileSystemStore(BlobStore):
+    """
+        Files on a POSIX filesystem. Each file sits in a directory named after the first
+        four characters of its ObjectId, which only change every ~18 hours, so directories
+        stay small and a sorted walk lists files in id order. Upload metadata is kept in
+        a JSON file next to the data.
+    """
+
+    def __init__(self, root: str = STORAGE_FS_ROOT):
+        self.root = root
+        self.tmp = os.path.join(root, ".tmp")
+        os.makedirs(self.tmp, exist_ok=True)
+
+    def _path(self, file_id: str) -> str:
+        if not is_file_id(file_id):
+            raise ValueError(f"Not a file id: {file_id!r}")
+        return os.path.join(self.root, file_id[:4], file_id)
+
+    def _meta_path(self, file_id: str) -> str:
+        return self._path(file_id) + ".json"
+
+    async def save_upload(self, file: UploadFile, metadata: dict) -> StoredFile:
+        file_id = new_file_id()
+        part = os.path.join(self.tmp, f"{file_id}.part")
+        digest = hashlib.sha256()
+        length = 0
+        try:
+            with open(part, "wb") as out:
+                while chunk := await file.read(STORAGE_CHUNK_SIZE):
+                    digest.update(chunk)
+                    length += len(chunk)
+                    await run_in_threadpool(out.write, chunk)
+            os.makedirs(os.path.dirname(self._path(file_id)), exist_ok=True)
+            # Metadata lands first so any visible data file has its metadata next to it
+            with open(self._meta_path(file_id), "w") as meta:
+                json.dump({
+                    "filename": file.filename,
+                    "metadata": {**metadata, "contentType": file.content_type},
+                    "sha256": digest.hexdigest()
+                }, meta)
+            os.replace(part, self._path(file_id))
+        except Exception:
+            for leftover in (part, self._meta_path(file_id)):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise
+        return StoredFile(file_id, digest.hexdigest(), length)
+
+    def _open(self, file_id: str):
+        try:
+            with open(self._meta_path(file_id)) as meta:
+                info = json.load(meta)
+            return LocalFileStream(self._path(file_id), info.get("filename"), info.get("metadata"))
+        except FileNotFoundError:
+            return None
+
+    async def open_download(self, file_id: str):
+        if not is_file_id(file_id):
+            return None
+        return await run_in_threadpool(self._open, file_id)
+
+    def _delete(self, file_ids: list) -> int:
+        deleted = 0
+        for file_id in file_ids:
+            try:
+                os.remove(self._path(file_id))
+                deleted += 1
+            except FileNotFoundError:
+                pass
+            try:
+                os.remove(self._meta_path(file_id))
+            except FileNotFoundError:
+                pass
+        return deleted
+
+    async def delete_many(self, file_ids: list) -> int:
+        return await run_in_threadpool(self._delete, [file_id for file_id in file_ids if is_file_id(file_id)])
+
+    def _list_shard(self, shard: str) -> list:
+        files = []
+        for name in sorted(os.listdir(os.path.join(self.root, shard))):
+            if name.endswith(".json"):
+                continue
+            stat = os.stat(os.path.join(self.root, shard, name))
+            files.append((name, stat.st_size, datetime.fromtimestamp(stat.st_mtime, timezone.utc)))
+        return files
+
+    async def iter_files(self, batch_size: int):
+        shards = await run_in_threadpool(os.listdir, self.root)
+        for shard in sorted(shards):
+            if shard.startswith("."):
+                continue
+            for entry in await run_in_threadpool(self._list_shard, shard):
+                yield entry
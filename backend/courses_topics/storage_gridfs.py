@@ -0,0 +1,92 @@
+import os
+import hashlib
+from bson import ObjectId
+from fastapi import UploadFile
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from courses_topics.storage import BlobStore, StoredFile, is_file_id, STORAGE_CHUNK_SIZE, STORAGE_DELETE_BATCH
+
+MONGO_URI = os.getenv('MONGO_URL')
+MONGO_DB_NAME = os.getenv('MONGO_DB_NAME')
+
+
+class GridFSStore(BlobStore):
+    """Files in MongoDB GridFS, the default bucket shared with contents uploaded before the store existed."""
+
+    def __init__(self):
+        self.client = AsyncIOMotorClient(MONGO_URI)
+        self.db = self.client[MONGO_DB_NAME]
+        self.bucket = AsyncIOMotorGridFSBucket(self.db)
+
+    async def save_upload(self, file: UploadFile, metadata: dict) -> StoredFile:
+        grid_in = self.bucket.open_upload_stream(
+            file.filename,
+            metadata={**metadata, "contentType": file.content_type}
+        )
+        digest = hashlib.sha256()
+        length = 0
+        try:
+            while chunk := await file.read(STORAGE_CHUNK_SIZE):
+                digest.update(chunk)
+                length += len(chunk)
+                await grid_in.write(chunk)
+            # Kept on the file document so stored blobs can be matched back to their digest
+            await grid_in.set("sha256", digest.hexdigest())
+        except Exception:
+            await grid_in.abort()
+            raise
+        await grid_in.close()
+        return StoredFile(str(grid_in._id), digest.hexdigest(), length)
+
+    async def open_download(self, file_id: str):
+        if not is_file_id(file_id):
+            return None
+        try:
+            return await self.bucket.open_download_stream(ObjectId(file_id))
+        except NoFile:
+            return None
+
+    async def delete_many(self, file_ids: list) -> int:
+        """Set-based deletes on fs.files and fs.chunks instead of one bucket.delete per file."""
+        ids = [ObjectId(file_id) for file_id in file_ids if is_file_id(file_id)]
+        deleted = 0
+        for i in range(0, len(ids), STORAGE_DELETE_BATCH):
+            batch = ids[i:i + STORAGE_DELETE_BATCH]
+            # File documents go first so a half finished delete never leaves a readable file
+            result = await self.db["fs.files"].delete_many({"_id": {"$in": batch}})
+            await self.db["fs.chunks"].delete_many({"files_id": {"$in": batch}})
+            deleted += result.deleted_count
+        return deleted
+
+    async def iter_files(self, batch_size: int):
+        cursor = self.db["fs.files"].find({}, {"length": 1, "uploadDate": 1}).sort("_id", 1).batch_size(batch_size)
+        async for doc in cursor:
+            yield str(doc["_id"]), doc.get("length", 0), doc.get("uploadDate")
+
+    async def iter_chunk_owners(self, batch_size: int):
+        """Only the (files_id, n) index is read, never the chunk data."""
+        cursor = (
+            self.db["fs.chunks"]
+            .find({}, {"files_id": 1, "_id": 0})
+            .sort([("files_id", 1), ("n", 1)])
+            .batch_size(batch_size)
+        )
+        current, count = None, 0
+        async for doc in cursor:
+            file_id = str(doc["files_id"])
+            if file_id != current:
+                if current is not None:
+                    yield current, count
+                current, count = file_id, 0
+            count += 1
+        if current is not None:
+            yield current, count
+
+    async def delete_chunks(self, file_ids: list) -> int:
+        """Delete chunks left behind by uploads that never wrote their file document."""
+        ids = [ObjectId(file_id) for file_id in file_ids]
+        deleted = 0
+        for i in range(0, len(ids), STORAGE_DELETE_BATCH):
+            result = await self.db["fs.chunks"].delete_many({"files_id": {"$in": ids[i:i + STORAGE_DELETE_BATCH]}})
+            deleted += result.deleted_count
+        return deleted
@@ -0,0 +1,171 @@
+import os
+import hashlib
+from functools import partial
+from urllib.parse import quote, unquote
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from courses_topics.storage import BlobStore, StoredFile, new_file_id, is_file_id, STORAGE_CHUNK_SIZE, STORAGE_DELETE_BATCH
+
+S3_BUCKET = os.getenv("S3_BUCKET", "expanse-content")
+# Set for MinIO or any other S3 compatible server, credentials come from the usual AWS variables
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_REGION = os.getenv("S3_REGION")
+S3_PREFIX = os.getenv("S3_PREFIX", "content/")
+# S3 needs at least 5 MiB in every multipart part but the last
+S3_PART_SIZE = int(os.getenv("S3_PART_SIZE", str(8 * 1024 * 1024)))
+S3_MAX_CONNECTIONS = int(os.getenv("S3_MAX_CONNECTIONS", "20"))
+
+# DeleteObjects takes at most this many keys per call
+S3_DELETE_LIMIT = 1000
+
+
+class S3Stream:
+    """Reads an object from the current offset with one ranged GET, reopened after a seek."""
+
+    def __init__(self, client, key: str, head: dict):
+        self._client = client
+        self._key = key
+        self._body = None
+        self._pos = 0
+        self.length = head["ContentLength"]
+        self.filename = unquote(head.get("Metadata", {}).get("filename", "")) or None
+        self.metadata = {"contentType": head.get("ContentType")}
+        self.content_type = None
+
+    def seek(self, pos: int):
+        self._pos = pos
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+
+    async def read(self, size: int = -1) -> bytes:
+        if self._pos >= self.length:
+            return b""
+        if self._body is None:
+            response = await run_in_threadpool(partial(
+                self._client.get_object, Bucket=S3_BUCKET, Key=self._key, Range=f"bytes={self._pos}-"
+            ))
+            self._body = response["Body"]
+        data = await run_in_threadpool(self._body.read, None if size < 0 else size)
+        self._pos += len(data)
+        return data
+
+    def close(self):
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+
+
+class S3Store(BlobStore):
+    """Objects in an S3 compatible bucket, uploaded in parts so memory stays at one part per upload."""
+
+    def __init__(self):
+        # boto3 clients are thread safe, every call runs in the threadpool
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=S3_ENDPOINT_URL or None,
+            region_name=S3_REGION or None,
+            config=Config(max_pool_connections=S3_MAX_CONNECTIONS)
+        )
+
+    def _key(self, file_id: str) -> str:
+        if not is_file_id(file_id):
+            raise ValueError(f"Not a file id: {file_id!r}")
+        return f"{S3_PREFIX}{file_id}"
+
+    async def _call(self, method, **kwargs):
+        return await run_in_threadpool(partial(method, Bucket=S3_BUCKET, **kwargs))
+
+    async def save_upload(self, file: UploadFile, metadata: dict) -> StoredFile:
+        file_id = new_file_id()
+        key = self._key(file_id)
+        # User metadata travels as x-amz-meta-* headers: ASCII values, and no underscores
+        # in names since some proxies drop such headers
+        object_args = {
+            "ContentType": file.content_type or "application/octet-stream",
+            "Metadata": {
+                name.replace("_", "-"): quote(str(value))
+                for name, value in {**metadata, "filename": file.filename or ""}.items()
+            }
+        }
+        digest = hashlib.sha256()
+        length = 0
+        buffer = bytearray()
+        upload_id = None
+        parts = []
+
+        async def upload_part():
+            part_number = len(parts) + 1
+            response = await self._call(
+                self.client.upload_part, Key=key, UploadId=upload_id, PartNumber=part_number, Body=bytes(buffer)
+            )
+            parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+            buffer.clear()
+
+        try:
+            while chunk := await file.read(STORAGE_CHUNK_SIZE):
+                digest.update(chunk)
+                length += len(chunk)
+                buffer += chunk
+                if len(buffer) >= S3_PART_SIZE:
+                    if upload_id is None:
+                        upload_id = (await self._call(self.client.create_multipart_upload, Key=key, **object_args))["UploadId"]
+                    await upload_part()
+
+            if upload_id is None:
+                # Small files go up in a single request
+                await self._call(self.client.put_object, Key=key, Body=bytes(buffer), **object_args)
+            else:
+                if buffer:
+                    await upload_part()
+                await self._call(
+                    self.client.complete_multipart_upload, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+                )
+            # Metadata is fixed once the object exists, the digest goes on as a tag instead
+            await self._call(
+                self.client.put_object_tagging, Key=key,
+                Tagging={"TagSet": [{"Key": "sha256", "Value": digest.hexdigest()}]}
+            )
+        except Exception:
+            if upload_id is not None:
+                await self._call(self.client.abort_multipart_upload, Key=key, UploadId=upload_id)
+            raise
+        return StoredFile(file_id, digest.hexdigest(), length)
+
+    async def open_download(self, file_id: str):
+        if not is_file_id(file_id):
+            return None
+        key = self._key(file_id)
+        try:
+            head = await self._call(self.client.head_object, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return S3Stream(self.client, key, head)
+
+    async def delete_many(self, file_ids: list) -> int:
+        file_ids = [file_id for file_id in file_ids if is_file_id(file_id)]
+        deleted = 0
+        batch_size = min(STORAGE_DELETE_BATCH, S3_DELETE_LIMIT)
+        for i in range(0, len(file_ids), batch_size):
+            response = await self._call(
+                self.client.delete_objects,
+                Delete={"Objects": [{"Key": self._key(file_id)} for file_id in file_ids[i:i + batch_size]], "Quiet": False}
+            )
+            deleted += len(response.get("Deleted", []))
+        return deleted
+
+    async def iter_files(self, batch_size: int):
+        # ListObjectsV2 returns keys in byte order, which is file id order under one prefix
+        kwargs = {"Prefix": S3_PREFIX, "MaxKeys": min(batch_size, 1000)}
+        while True:
+            page = await self._call(self.client.list_objects_v2, **kwargs)
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(S3_PREFIX):], obj["Size"], obj["LastModified"]
+            if not page.get("IsTruncated"):
+                return
+            kwargs["ContinuationToken"] = page["NextContinuationToken"]
@@ -0,0 +1,124 @@
+import os
+import re
+import zipfile
+import mimetypes
+from xml.etree import ElementTree
+
+# Runs inside the extraction process pool, so nothing here may touch the database or storage
+
+# Characters kept per file, later pages are dropped
+EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", str(5 * 1024 * 1024)))
+# Largest XML part read out of a slide deck or document, guards against zip bombs
+EXTRACT_MAX_XML_BYTES = int(os.getenv("EXTRACT_MAX_XML_BYTES", str(50 * 1024 * 1024)))
+
+PPTX_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+_DRAWING_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# Text types that do not start with text/
+_TEXT_TYPES = {"application/json", "application/xml", "application/javascript", "application/x-sh"}
+
+
+class UnsupportedContent(Exception):
+    pass
+
+
+def content_kind(content_type: str, filename: str) -> str:
+    """pdf, pptx, docx or text, from the uploaded content type or failing that the file name."""
+    guessed = mimetypes.guess_type(filename or "")[0]
+    for candidate in (content_type, guessed):
+        if not candidate or candidate == "application/octet-stream":
+            continue
+        if candidate == "application/pdf":
+            return "pdf"
+        if candidate == PPTX_TYPE:
+            return "pptx"
+        if candidate == DOCX_TYPE:
+            return "docx"
+        if candidate.startswith("text/") or candidate in _TEXT_TYPES:
+            return "text"
+    raise UnsupportedContent(f"No text extractor for {content_type or filename}")
+
+
+def _pdf_pages(path: str) -> list:
+    # Only needed in the worker processes
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    pages, size = [], 0
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        pages.append(text)
+        size += len(text)
+        if size >= EXTRACT_MAX_CHARS:
+            break
+    return pages
+
+
+def _xml_part(archive: zipfile.ZipFile, name: str):
+    info = archive.getinfo(name)
+    if info.file_size > EXTRACT_MAX_XML_BYTES:
+        raise UnsupportedContent(f"{name} is too large to extract")
+    with archive.open(info) as part:
+        return ElementTree.parse(part).getroot()
+
+
+def _paragraphs(root, namespace: str) -> str:
+    return "\n".join(
+        "".join(node.text or "" for node in paragraph.iter(f"{namespace}t"))
+        for paragraph in root.iter(f"{namespace}p")
+    )
+
+
+def _pptx_pages(path: str) -> list:
+    with zipfile.ZipFile(path) as archive:
+        # slide1.xml, slide2.xml, ... are numbered in the order they were added, which is
+        # the presentation order unless slides were later moved around
+        slides = sorted(
+            (int(match.group(1)), name)
+            for name in archive.namelist()
+            if (match := re.fullmatch(r"ppt/slides/slide(\d+)\.xml", name))
+        )
+        return [_paragraphs(_xml_part(archive, name), _DRAWING_NS) for _, name in slides]
+
+
+def _docx_pages(path: str) -> list:
+    # Word documents have no fixed pages, the whole body counts as one
+    with zipfile.ZipFile(path) as archive:
+        return [_paragraphs(_xml_part(archive, "word/document.xml"), _WORD_NS)]
+
+
+def _text_pages(path: str) -> list:
+    with open(path, "rb") as file:
+        return [file.read(EXTRACT_MAX_CHARS * 4).decode("utf-8", errors="replace")]
+
+
+_EXTRACTORS = {
+    "pdf": _pdf_pages,
+    "pptx": _pptx_pages,
+    "docx": _docx_pages,
+    "text": _text_pages,
+}
+
+
+def extract_text(path: str, content_type: str, filename: str) -> tuple:
+    """
+        Return a file's text with its pages or slides joined by newlines, and the offset
+        each page starts at, capped at EXTRACT_MAX_CHARS.
+    """
+    try:
+        pages = _EXTRACTORS[content_kind(content_type, filename)](path)
+    except zipfile.BadZipFile as e:
+        raise UnsupportedContent(f"Not a valid Office file: {e}")
+
+    parts, offsets, position = [], [], 0
+    for page in pages:
+        if position >= EXTRACT_MAX_CHARS:
+            break
+        # Postgres text cannot hold NUL characters
+        page = page.replace("\x00", "")[:EXTRACT_MAX_CHARS - position]
+        offsets.append(position)
+        parts.append(page)
+        position += len(page) + 1
+    return "\n".join(parts), offsets
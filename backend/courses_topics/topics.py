@@ -1,69 +1,110 @@
 import os, sys
 from datetime import datetime
-from typing import Annotated, Optional, List
-from fastapi import APIRouter, Depends, File, UploadFile, Form, Header
+from typing import Annotated, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, File, UploadFile, Form, Request
 from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
-from pymongo import MongoClient
-from gridfs import GridFS
-from bson import ObjectId
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, insert, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
 from courses_topics import models
-from courses_topics.database import engine, SessionLocal
-from courses_topics.schema import TopicBase, TopicCreate, TopicResponse, ContentBase
+from courses_topics import storage, blobs, content_http, deletion_jobs, archive, import_jobs, uploads, extraction_jobs
+from courses_topics.content_cache import content_cache, CachedFile, CachedFileResponse
+from courses_topics.response_cache import response_cache, course_topics_tag, topic_tag
+from courses_topics.database import AsyncSessionLocal
+from courses_topics.schema import TopicBase, TopicCreate, TopicUploadForm, TopicResponse, ContentBase, ContentUploadForm, DeletionJobResponse, ImportJobResponse
 from common.response_format import success_response, error_response
-from common.token_decoder import token_decoder
+from common.pagination import Keyset, InvalidPage, page_size
+from common.auth import user_dependency
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
+
+TOPICS = Keyset("topics", models.Topics.topic_id)
+
+
+def _topics_query():
+    # Topics with their content ids in one query, aggregated per topic rather than one query per topic
+    content_ids = func.array_remove(
+        func.array_agg(aggregate_order_by(models.Contents.content_id, models.Contents.id)), None
+    )
+    return (
+        select(models.Topics, content_ids.label("content_ids"))
+        .outerjoin(models.Contents, models.Contents.topic_id == models.Topics.topic_id)
+        .filter(models.Topics.topic_is_deleted.is_(False))
+        .group_by(models.Topics.topic_id)
+    )
+
 
-MONGO_URI = os.getenv('MONGO_URL')
-MONGO_DB_NAME = os.getenv('MONGO_DB_NAME')
-client = MongoClient(MONGO_URI)
-db_mongo = client[MONGO_DB_NAME]
-fs = GridFS(db_mongo)
+def _topic_data(rows) -> list:
+    response_data = []
+    for top, content_id_lst in rows:
+        tmp_data = TopicResponse.model_validate(top).model_dump()
+        tmp_data['content_id'] = content_id_lst
+        response_data.append(tmp_data)
+    return jsonable_encoder(response_data)
+
+
+async def _load_topic(topic_id: int) -> list:
+    """A topic as GET /topics returns it, empty when it does not exist."""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(_topics_query().filter(models.Topics.topic_id == topic_id))).all()
+    return _topic_data(rows)
+
+
+async def _load_topic_page(course_id: int, cursor: str, limit: int) -> dict:
+    """One page of a course's topics with the cursor for the next, raising InvalidPage for a bad cursor."""
+    stmt = TOPICS.apply(_topics_query().filter(models.Topics.course_id == course_id), cursor, limit)
+    async with AsyncSessionLocal() as db:
+        rows, next_cursor = TOPICS.page((await db.execute(stmt)).all(), limit, key=lambda row: (row.Topics.topic_id,))
+    return {"topics": _topic_data(rows), "next_cursor": next_cursor}
 
 
 """POST API to create topic and upload conetnt"""
-@router.post("/topics")
+@router.post("/topics", openapi_extra=uploads.openapi_form(
+    {"topic_name": "string", "topic_description": "string", "course_id": "integer", "topic_is_released": "boolean"},
+    {"files": True}
+))
 async def create_topic(
+    request: Request,
     db: db_dependency, 
-    topic_name: str = Form(...), 
-    topic_description: str = Form(...), 
-    course_id: int = Form(...), 
-    topic_is_released: bool = Form(...), 
-    files: List[UploadFile] = File(...), 
-    authorization: str = Header(...)):
+    user_id: user_dependency):
+    # Form fields topic_name, topic_description, course_id, topic_is_released and files,
+    # parsed here rather than by FastAPI so files are never spooled to a temp file
     try:
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="Invalid Authorization header format")
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="User ID not found in token")
+        try:
+            # Attachments stream into storage while the body is read, before any database work starts
+            upload = await uploads.receive_upload(
+                request,
+                file_fields=("files",),
+                metadata={"uploader": user_id},
+                metadata_fields=("course_id",)
             )
-        
-        gridfs_id = None
+        except uploads.UploadRejected as e:
+            return JSONResponse(status_code=e.status_code, content=error_response(message="Error creating topic", details=e.message))
+        except Exception as e:
+            return JSONResponse(status_code=500, content=error_response(message="Error creating topic", details=str(e)))
+        files = upload.files
+        stored_files = [file.stored for file in files]
+        try:
+            form = TopicUploadForm.model_validate(upload.fields)
+            if not files:
+                raise ValueError("At least one file is required")
+        except ValueError as e:
+            await blobs.delete_files([stored.file_id for stored in stored_files])
+            return JSONResponse(status_code=422, content=error_response(message="Error creating topic", details=str(e)))
+
         db_topic = models.Topics(
-            topic_name=topic_name,
-            topic_description=topic_description,
-            course_id=course_id,
-            topic_is_released=topic_is_released,
+            topic_name=form.topic_name,
+            topic_description=form.topic_description,
+            course_id=form.course_id,
+            topic_is_released=form.topic_is_released,
             topic_created_by=user_id,
             topic_updated_by=user_id,
             topic_created_timestamp=datetime.now(),
@@ -71,41 +112,35 @@ async def create_topic(
         )
         try:
             db.add(db_topic)
-            db.commit()
-            db.refresh(db_topic)
-
-            content_ids = []
-            for file in files:
-                gridfs_id = fs.put(
-                    file.file,
-                    filename=file.filename,
-                    content_type=file.content_type,
-                    metadata={
-                        "uploader": user_id, 
-                        "course_id": course_id, 
-                        "topic_id": db_topic.topic_id
-                    }
-                )
+            await db.flush()
+            await blobs.reference_blobs(db, stored_files)
 
-                if gridfs_id:
-                    db_content = models.Contents(
-                        course_id=course_id,
-                        topic_id=db_topic.topic_id,
-                        content_id=str(gridfs_id), 
-                        content_created_by=user_id,
-                        content_updated_by=user_id,
-                        content_created_timestamp=datetime.now(),
-                        content_updated_timestamp=datetime.now()
-                    )
-                    db.add(db_content)
-                    content_ids.append(str(gridfs_id))
-            db.commit()
-            db.refresh(db_content)
+            content_rows = [
+                {
+                    "course_id": form.course_id,
+                    "topic_id": db_topic.topic_id,
+                    "content_id": blobs.new_content_id(),
+                    "content_blob": file.stored.sha256,
+                    "content_name": file.filename,
+                    "content_type": file.content_type,
+                    "content_created_by": user_id,
+                    "content_updated_by": user_id,
+                    "content_created_timestamp": datetime.now(),
+                    "content_updated_timestamp": datetime.now()
+                }
+                for file in files
+            ]
+            await db.execute(insert(models.Contents), content_rows)
+            await extraction_jobs.queue_blobs(db, [file.stored.sha256 for file in files])
+            await db.commit()
+            extraction_jobs.notify()
+            # The topic id too, a lookup before it existed may have cached it as missing
+            await response_cache.invalidate(course_topics_tag(form.course_id), topic_tag(db_topic.topic_id))
 
         except Exception as e:
-            db.rollback()
-            for content_id in content_ids:
-                fs.delete(content_id)
+            await db.rollback()
+            # Nothing was committed, so every uploaded file goes, including new blobs
+            await blobs.delete_files([stored.file_id for stored in stored_files])
             
             return JSONResponse(
                 status_code=500,
@@ -116,7 +151,7 @@ async def create_topic(
             content=success_response(
                 data=jsonable_encoder({
                     "topic_id": db_topic.topic_id,
-                    "content_id": content_ids,
+                    "content_id": [row["content_id"] for row in content_rows],
                     **TopicBase.model_validate(db_topic).model_dump()
                 }),
                 message="Topic created successfully"
@@ -139,40 +174,42 @@ async def create_topic(
 
 """GET API: get all topics for a course OR get all the details for a specific topic using it's ID"""
 @router.get("/topics")
-async def get_topic(db: db_dependency, course_id: int = None, topic_id: int = None, mode: str = None):
+async def get_topic(course_id: int = None, topic_id: int = None, mode: str = None, cursor: str = None, limit: int = None):
     try:
+        next_cursor = None
+        # Both served from the response cache, a miss loads once however many requests wait on it
         if mode == 'all' and course_id and not topic_id:
-            result = db.query(models.Topics).filter(models.Topics.course_id == course_id).all()
+            try:
+                limit = page_size(limit)
+                page = await response_cache.get_or_load(
+                    "topics", f"topics:{course_id}:{limit}:{cursor or ''}", (course_topics_tag(course_id),),
+                    lambda: _load_topic_page(course_id, cursor, limit)
+                )
+            except InvalidPage as e:
+                return JSONResponse(status_code=400, content=error_response(message=str(e)))
+            response_data, next_cursor = page["topics"], page["next_cursor"]
         elif not mode and not course_id and topic_id:
-            result = [db.query(models.Topics).filter(models.Topics.topic_id == topic_id).first()]
+            response_data = await response_cache.get_or_load(
+                "topic", f"topic:{topic_id}", (topic_tag(topic_id),), lambda: _load_topic(topic_id)
+            )
         else:
             return JSONResponse(
                 status_code=404, 
                 content=error_response(message="Inavlid Query Parameters")
             )
 
-        if not result:
+        if not response_data:
             return JSONResponse(
                 status_code=404, 
                 content=error_response(message="Topics Not Found")
             )
 
-        response_data = []
-        for top in result:
-            top_id = top.topic_id
-            cont_objs = db.query(models.Contents).filter(models.Contents.topic_id == top_id).all()
-            content_id_lst = [obj.content_id for obj in cont_objs]
-
-            tmp_data = TopicResponse.model_validate(top).model_dump()
-            tmp_data['content_id'] = content_id_lst
-            response_data.append(tmp_data)
-
-        
         return JSONResponse(
             status_code=200,
             content=success_response(
                 data=jsonable_encoder(response_data), 
-                message="Topics retrieved successfully"
+                message="Topics retrieved successfully",
+                next_cursor=next_cursor
             )
         )
         
@@ -196,7 +233,7 @@ async def get_topic(db: db_dependency, course_id: int = None, topic_id: int = No
 @router.put("/topics")
 async def update_topic(topic_id: int, topic: TopicBase, db: db_dependency):
     try:
-        db_topic = db.query(models.Topics).filter(models.Topics.topic_id == topic_id).first()
+        db_topic = (await db.scalars(select(models.Topics).filter(models.Topics.topic_id == topic_id, models.Topics.topic_is_deleted.is_(False)))).first()
         
         if not db_topic:
             return JSONResponse(
@@ -204,6 +241,7 @@ async def update_topic(topic_id: int, topic: TopicBase, db: db_dependency):
                 content=error_response(message="Topic Not Found")
             )
         
+        previous_course_id = db_topic.course_id
         update_data = topic.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_topic, key, value)
@@ -211,10 +249,12 @@ async def update_topic(topic_id: int, topic: TopicBase, db: db_dependency):
         db_topic.topic_updated_timestamp = datetime.now()
 
         try:
-            db.commit()
-            db.refresh(db_topic)
+            await db.commit()
+            await db.refresh(db_topic)
+            # Both courses' lists when the topic moved
+            await response_cache.invalidate(topic_tag(topic_id), *{course_topics_tag(previous_course_id), course_topics_tag(db_topic.course_id)})
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -246,44 +286,36 @@ async def update_topic(topic_id: int, topic: TopicBase, db: db_dependency):
 
 
 
-"""DELETE API: to delete any topic."""
+"""DELETE API: to delete any topic. The topic is hidden at once and purged by a background job."""
 @router.delete("/topics")
-async def delete_topic(topic_id: int, db: db_dependency):
+async def delete_topic(topic_id: int, db: db_dependency, background_tasks: BackgroundTasks):
     try:
-        db_topic = db.query(models.Topics).filter(models.Topics.topic_id == topic_id).first()
+        db_topic = (await db.scalars(select(models.Topics).filter(models.Topics.topic_id == topic_id, models.Topics.topic_is_deleted.is_(False)))).first()
         
         if not db_topic:
             return JSONResponse(
                 status_code=404, 
                 content=error_response(message="Topic Not Found")
             )
-        
-        db_contents = db.query(models.Contents).filter(models.Contents.topic_id == topic_id).all()
 
         try:
-            for content in db_contents:
-                if fs.exists({"_id": ObjectId(content.content_id)}):
-                    fs.delete(ObjectId(content.content_id))
-                db.delete(content)
-
-            db.delete(db_topic)
-            db.commit()
+            job = await deletion_jobs.mark_topic_deleted(db, db_topic)
+            await db.commit()
+            await response_cache.invalidate(topic_tag(topic_id), course_topics_tag(db_topic.course_id))
         except Exception as e:
-            db.rollback()
-            detail_dict = {
-                "exception": e
-            }
+            await db.rollback()
             return JSONResponse(
                 status_code=500,
-                content=error_response(message="Error deleting topic", details=detail_dict)
+                content=error_response(message="Error deleting topic", details=str(e))
+            )
+
+        background_tasks.add_task(deletion_jobs.run_deletion_job, job.job_id)
+        return JSONResponse(
+            status_code=202,
+            content=success_response(
+                data=jsonable_encoder(DeletionJobResponse.model_validate(job).model_dump()),
+                message="Topic deletion started"
             )
-        
-        return Response(
-            status_code=204,
-            # content=success_response(
-            #     data={},
-            #     message="Topic deleted successfully"
-            # )
         )
     
     except Exception as e:
@@ -302,57 +334,67 @@ async def delete_topic(topic_id: int, db: db_dependency):
 
 
 """POST API to upload a content wrt to course and topic"""
-@router.post("/content")
+@router.post("/content", openapi_extra=uploads.openapi_form(
+    {"course_id": "integer", "topic_id": "integer"},
+    {"file": False}
+))
 async def create_content(
+    request: Request,
     db: db_dependency, 
-    course_id: int = Form(...), 
-    topic_id: int = Form(...), 
-    file: UploadFile = File(...),
-    authorization: str = Header(...)):
+    user_id: user_dependency):
+    # Form fields course_id, topic_id and file, streamed into storage like create_topic
     try:
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="Invalid Authorization header format")
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="User ID not found in token")
+        try:
+            upload = await uploads.receive_upload(
+                request,
+                file_fields=("file",),
+                metadata={"uploader": user_id},
+                metadata_fields=("course_id", "topic_id")
             )
-        gridfs_id = fs.put(
-            file.file,
-            filename=file.filename,
-            content_type=file.content_type,
-            metadata={"uploader": user_id, "course_id": course_id, "topic_id": topic_id}
-        )
-        
-        db_content = models.Contents(
-            course_id=course_id,
-            topic_id=topic_id,
-            content_id=str(gridfs_id), 
-            content_created_by=user_id,
-            content_updated_by=user_id,
-            content_created_timestamp=datetime.now(),
-            content_updated_timestamp=datetime.now()
-        )
-        
+        except uploads.UploadRejected as e:
+            return JSONResponse(status_code=e.status_code, content=error_response(message="Error uploading content", details=e.message))
+        except Exception as e:
+            return JSONResponse(status_code=500, content=error_response(message="Error uploading content", details=str(e)))
+        stored_files = [file.stored for file in upload.files]
         try:
+            form = ContentUploadForm.model_validate(upload.fields)
+            if len(upload.files) != 1:
+                raise ValueError("Exactly one file is required")
+        except ValueError as e:
+            await blobs.delete_files([stored.file_id for stored in stored_files])
+            return JSONResponse(status_code=422, content=error_response(message="Error uploading content", details=str(e)))
+        file = upload.files[0]
+        try:
+            await blobs.reference_blobs(db, stored_files)
+
+            db_content = models.Contents(
+                course_id=form.course_id,
+                topic_id=form.topic_id,
+                content_id=blobs.new_content_id(), 
+                content_blob=file.stored.sha256,
+                content_name=file.filename,
+                content_type=file.content_type,
+                content_created_by=user_id,
+                content_updated_by=user_id,
+                content_created_timestamp=datetime.now(),
+                content_updated_timestamp=datetime.now()
+            )
             db.add(db_content)
-            db.commit()
-            db.refresh(db_content)
+            await db.flush()
+            await extraction_jobs.queue_blobs(db, [file.stored.sha256])
+            await db.commit()
+            extraction_jobs.notify()
+            # Topics are returned with their content ids
+            await response_cache.invalidate(topic_tag(form.topic_id), course_topics_tag(form.course_id))
         except Exception as e:
-            db.rollback()
-            fs.delete(gridfs_id)
+            await db.rollback()
+            await blobs.delete_files([stored.file_id for stored in stored_files])
             
             return JSONResponse(
                 status_code=500,
                 content=error_response(message="Error uploading content", details=str(e))
             )
+        await db.refresh(db_content)
         return JSONResponse(
             status_code=201,
             content=success_response(
@@ -381,31 +423,84 @@ async def create_content(
 
 """GET API to retrieve content details."""
 @router.get("/content")
-async def get_content(content_id: str):
+async def get_content(content_id: str, request: Request):
+    stored_file = None
     try:
-        gridfs_file = fs.get(ObjectId(content_id))
-        if not gridfs_file:
+        # Own session closed before streaming, a dependency's would stay checked out for the whole download
+        async with AsyncSessionLocal() as db:
+            file_id, db_content = await blobs.resolve_content(db, content_id)
+        # Deduplicated contents are served from the local disk cache, their digest pins the bytes
+        cached_file = None
+        if db_content and db_content.content_blob:
+            cached_file = await content_cache.fetch(db_content.content_blob, file_id)
+        stored_file = cached_file or await storage.open_download(file_id)
+        if not stored_file:
             return JSONResponse(
                 status_code=404, 
                 content=error_response(message="Content Not Found")
             )
 
-        # Stream the file back to the client
-        def iter_file():
-            while chunk := gridfs_file.read(1024 * 1024):  # Read in chunks
-                yield chunk
+        # Deduplicated contents are tagged by digest, so the same bytes share one ETag
+        etag = content_http.etag_for(db_content.content_blob if db_content and db_content.content_blob else file_id)
+        headers = content_http.cache_headers(etag)
+        if content_http.etag_matches(request.headers.get("if-none-match"), etag):
+            await storage.close_download(stored_file)
+            return Response(status_code=304, headers=headers)
 
-        filename = gridfs_file.filename
+        filename = (db_content and db_content.content_name) or stored_file.filename
         sanitized_filename = filename.replace("\u202f", " ").replace(" ", "_")
+        headers["Content-Disposition"] = f"attachment; filename={sanitized_filename}"
+        media_type = (db_content and db_content.content_type) or storage.content_type(stored_file)
+        size = stored_file.length
+
+        ranges = None
+        range_header = request.headers.get("range")
+        if range_header and content_http.if_range_matches(request.headers.get("if-range"), etag):
+            try:
+                ranges = content_http.parse_range(range_header, size)
+            except content_http.RangeNotSatisfiable:
+                await storage.close_download(stored_file)
+                return Response(
+                    status_code=416,
+                    headers={**headers, "Content-Range": f"bytes */{size}"}
+                )
+
+        if ranges and len(ranges) == 1:
+            start, end = ranges[0]
+            headers["Content-Range"] = content_http.content_range(start, end, size)
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                storage.closing(stored_file, storage.iter_range(stored_file, start, end)),
+                status_code=206,
+                media_type=media_type,
+                headers=headers
+            )
+
+        if ranges:
+            body = content_http.MultipartRanges(stored_file, ranges, media_type)
+            headers["Content-Length"] = str(body.content_length)
+            return StreamingResponse(
+                storage.closing(stored_file, body),
+                status_code=206,
+                media_type=body.content_type,
+                headers=headers
+            )
 
+        # Whole cached files go out by path, the cache keeps them on disk until the response is done.
+        # FileResponse would honour a Range header itself, so one the If-Range ruled out streams below
+        if isinstance(stored_file, CachedFile) and not range_header:
+            return CachedFileResponse(stored_file, media_type=media_type, headers=headers)
+
+        # Stream anything else back to the client chunk by chunk without blocking the loop
+        headers["Content-Length"] = str(size)
         return StreamingResponse(
-            iter_file(),
-            media_type=gridfs_file.content_type,
-            headers={
-                "Content-Disposition": f"attachment; filename={sanitized_filename}"
-            }
+            storage.closing(stored_file, storage.iter_download(stored_file)),
+            media_type=media_type,
+            headers=headers
         )
     except Exception as e:
+        if stored_file is not None:
+            await storage.close_download(stored_file)
         exc_type, exc_obj, exc_tb = sys.exc_info()
         fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
         detail_dict = {
@@ -421,11 +516,75 @@ async def get_content(content_id: str):
 
 
 
+"""GET API: stream every content of a topic, or of a course's topics, as one zip or tar archive"""
+@router.get("/contentArchive")
+async def get_content_archive(topic_id: int = None, course_id: int = None, format: str = "zip", include_unreleased: bool = False):
+    try:
+        if bool(topic_id) == bool(course_id) or format not in archive.ARCHIVE_MEDIA_TYPES:
+            return JSONResponse(
+                status_code=400, 
+                content=error_response(message="Inavlid Query Parameters")
+            )
+
+        # Taken before the queries, so with every slot busy a request is turned away without touching the database
+        if not archive.try_acquire_export():
+            return JSONResponse(
+                status_code=503, 
+                content=error_response(message="Too many archive downloads in progress, try again shortly"),
+                headers={"Retry-After": "30"}
+            )
+
+        response = None
+        try:
+            # Own session closed before streaming, a dependency's would stay checked out for the whole archive
+            async with AsyncSessionLocal() as db:
+                if topic_id:
+                    target = (await db.scalars(select(models.Topics).filter(models.Topics.topic_id == topic_id, models.Topics.topic_is_deleted.is_(False)))).first()
+                    archive_name = target and archive.safe_name(target.topic_name, f"topic-{topic_id}")
+                else:
+                    target = (await db.scalars(select(models.Courses).filter(models.Courses.course_id == course_id, models.Courses.course_is_deleted.is_(False)))).first()
+                    archive_name = target and archive.safe_name(target.course_code, f"course-{course_id}")
+
+                if not target:
+                    return JSONResponse(
+                        status_code=404, 
+                        content=error_response(message="Topic Not Found" if topic_id else "Course Not Found")
+                    )
+
+                entries = await archive.archive_entries(db, topic_id=topic_id, course_id=course_id, include_unreleased=include_unreleased)
+
+            sanitized_filename = f"{archive_name}.{format}".replace("\u202f", " ").replace(" ", "_")
+            response = archive.ArchiveResponse(
+                archive.stream_archive(entries, format),
+                media_type=archive.ARCHIVE_MEDIA_TYPES[format],
+                headers={"Content-Disposition": f"attachment; filename={sanitized_filename}"}
+            )
+            return response
+        finally:
+            # Once there is a response it releases the slot after sending, until then it is ours to give back
+            if response is None:
+                archive.release_export()
+    except Exception as e:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+        detail_dict = {
+            "exception": e,
+            "exception_type": exc_type,
+            "file_name": fname,
+            "line_number": exc_tb.tb_lineno
+        }
+        return JSONResponse(
+            status_code=500, 
+            content=error_response(message="Error building content archive", details=detail_dict)
+        )
+
+
+
 """DELETE API to delete a content."""
 @router.delete("/content")
 async def delete_content(content_id: str, db: db_dependency):
     try:
-        db_content = db.query(models.Contents).filter(models.Contents.content_id == content_id).first()
+        db_content = (await db.scalars(select(models.Contents).filter(models.Contents.content_id == content_id))).first()
         
         if not db_content:
             return JSONResponse(
@@ -433,15 +592,13 @@ async def delete_content(content_id: str, db: db_dependency):
                 content=error_response(message="Content Not Found")
             )
 
-        gridfs_file = fs.find_one({"_id": ObjectId(content_id)})
-        if gridfs_file:
-            fs.delete(ObjectId(content_id))
-
         try:
-            db.delete(db_content)
-            db.commit()
+            freed_file_ids = await blobs.release_contents(db, [db_content])
+            await db.commit()
+            await response_cache.invalidate(topic_tag(db_content.topic_id), course_topics_tag(db_content.course_id))
+            await blobs.delete_files(freed_file_ids)
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             return JSONResponse(
                 status_code=500,
                 content=error_response(message="Error deleting content", details=str(e))
@@ -467,3 +624,103 @@ async def delete_content(content_id: str, db: db_dependency):
             status_code=500, 
             content=error_response(message="Error deleting content", details=detail_dict)
         )
+
+
+
+"""POST API: import topics from a zip with one folder per topic. Files are stored by a background job."""
+@router.post("/importTopics")
+async def import_topics(
+    db: db_dependency, 
+    user_id: user_dependency,
+    background_tasks: BackgroundTasks,
+    course_id: int = Form(...), 
+    topic_is_released: bool = Form(False), 
+    file: UploadFile = File(...)):
+    try:
+        db_course = (await db.scalars(select(models.Courses).filter(models.Courses.course_id == course_id, models.Courses.course_is_deleted.is_(False)))).first()
+
+        if not db_course:
+            return JSONResponse(
+                status_code=404, 
+                content=error_response(message="Course Not Found")
+            )
+
+        path = None
+        try:
+            path = await import_jobs.save_archive(file)
+            # Only the central directory is read here, so a bad archive is refused before the job starts
+            plan = await run_in_threadpool(import_jobs.plan_import, path)
+            job = import_jobs.new_import_job(course_id, file.filename, plan, user_id)
+            db.add(job)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            if path and os.path.exists(path):
+                os.remove(path)
+            if isinstance(e, import_jobs.ArchiveRejected):
+                return JSONResponse(
+                    status_code=e.status_code,
+                    content=error_response(message=e.message)
+                )
+            return JSONResponse(
+                status_code=500,
+                content=error_response(message="Error importing topics", details=str(e))
+            )
+
+        background_tasks.add_task(import_jobs.run_import_job, job.job_id, path, file.filename, course_id, topic_is_released, user_id)
+        return JSONResponse(
+            status_code=202,
+            content=success_response(
+                data=jsonable_encoder(ImportJobResponse.model_validate(job).model_dump()),
+                message="Topic import started"
+            )
+        )
+    except Exception as e:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+        detail_dict = {
+            "exception": e,
+            "exception_type": exc_type,
+            "file_name": fname,
+            "line_number": exc_tb.tb_lineno
+        }
+        return JSONResponse(
+            status_code=500, 
+            content=error_response(message="Error importing topics", details=detail_dict)
+        )
+
+
+
+"""GET API: progress of a topic import job"""
+@router.get("/importJob")
+async def get_import_job(job_id: str, db: db_dependency):
+    try:
+        job = (await db.scalars(select(models.ImportJobs).filter(models.ImportJobs.job_id == job_id))).first()
+
+        if not job:
+            return JSONResponse(
+                status_code=404, 
+                content=error_response(message="Import Job Not Found")
+            )
+
+        return JSONResponse(
+            status_code=200, 
+            content=success_response(
+                data=jsonable_encoder(ImportJobResponse.model_validate(job).model_dump()), 
+                message="Import job retrieved successfully"
+            )
+        )
+    
+    except Exception as e:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+        detail_dict = {
+            "exception": e,
+            "exception_type": exc_type,
+            "file_name": fname,
+            "line_number": exc_tb.tb_lineno
+        }
+        return JSONResponse(
+            status_code=500, 
+            content=error_response(message="Error getting import job", details=detail_dict)
+        )
@@ -0,0 +1,256 @@
+import os
+import asyncio
+from typing import NamedTuple
+from fastapi import Request
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from courses_topics import storage
+from courses_topics import blobs
+
+# Whole multipart body, files and fields together
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(5 * 1024 * 1024 * 1024)))
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(2 * 1024 * 1024 * 1024)))
+UPLOAD_MAX_FILES = int(os.getenv("UPLOAD_MAX_FILES", "100"))
+# Text fields are kept in memory, so they stay small
+UPLOAD_MAX_FIELD_BYTES = int(os.getenv("UPLOAD_MAX_FIELD_BYTES", str(64 * 1024)))
+UPLOAD_MAX_FIELDS = int(os.getenv("UPLOAD_MAX_FIELDS", "50"))
+# Body chunks queued per file while storage catches up, past this the request body stops being read
+UPLOAD_QUEUE_CHUNKS = int(os.getenv("UPLOAD_QUEUE_CHUNKS", "8"))
+
+
+class UploadRejected(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class UploadedFile(NamedTuple):
+    field_name: str
+    filename: str
+    content_type: str
+    stored: storage.StoredFile
+
+
+class ParsedUpload(NamedTuple):
+    fields: dict        # field name -> last value sent
+    files: list         # UploadedFile in body order
+
+
+def openapi_form(fields: dict, file_fields: dict) -> dict:
+    """openapi_extra for a route that reads its multipart body itself, so the docs still show the form."""
+    properties = {name: {"type": kind} for name, kind in fields.items()}
+    for name, many in file_fields.items():
+        binary = {"type": "string", "format": "binary"}
+        properties[name] = {"type": "array", "items": binary} if many else binary
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "properties": properties, "required": list(properties)
+    }}}}}
+
+
+def _decode(data: bytes) -> str:
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+class _PartStream:
+    """UploadFile stand-in fed by the body parser, storage reads a file part while it arrives."""
+
+    def __init__(self, field_name: str, filename: str, content_type: str):
+        self.field_name = field_name
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+        self.task = None
+        self.complete = False
+        self._queue = asyncio.Queue(UPLOAD_QUEUE_CHUNKS)
+        self._buffer = bytearray()
+        self._eof = False
+        self._error = None
+
+    async def put(self, data):
+        # None marks the end of the part
+        if self.task.done():
+            # Storage gave up early, surface its error instead of reading the rest of the body
+            self.task.result()
+        if not self._queue.full():
+            self._queue.put_nowait(data)
+            return
+        # Storage is behind: wait for room, unless storage failed and will never read again
+        put = asyncio.ensure_future(self._queue.put(data))
+        await asyncio.wait({put, self.task}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            self.task.result()
+
+    def abort(self, error: Exception):
+        """Make the storage side fail its next read, so it cleans up like any failed upload."""
+        self._error = error
+        if not self._queue.full():
+            self._queue.put_nowait(None)
+
+    async def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            if self._buffer and self._queue.empty():
+                break
+            data = await self._queue.get()
+            if self._error:
+                raise self._error
+            if data is None:
+                self._eof = True
+            else:
+                self._buffer += data
+        if self._error:
+            raise self._error
+        size = len(self._buffer) if size < 0 else size
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+class _BodyParser:
+    """
+        Callbacks for python-multipart. They run synchronously inside parser.write, so they
+        only record events, which receive_upload then awaits in order.
+    """
+
+    def __init__(self, file_fields: tuple):
+        self.file_fields = file_fields
+        self.fields = {}
+        self.events = []
+        self.file_count = 0
+        self.field_count = 0
+        self._header_name = b""
+        self._header_value = b""
+        self._headers = {}
+        self._field_name = None
+        self._field_value = None
+        self._stream = None
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._stream = None
+        self._field_value = None
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise UploadRejected('Every part needs a Content-Disposition header with a "name"')
+        self._field_name = _decode(options[b"name"])
+        if b"filename" in options:
+            if self._field_name not in self.file_fields:
+                raise UploadRejected(f"Unexpected file field {self._field_name}")
+            self.file_count += 1
+            if self.file_count > UPLOAD_MAX_FILES:
+                raise UploadRejected(f"More than {UPLOAD_MAX_FILES} files in one upload", 413)
+            content_type = _decode(self._headers.get(b"content-type", b"")) or "application/octet-stream"
+            self._stream = _PartStream(self._field_name, _decode(options[b"filename"]), content_type)
+            self.events.append(("file", self._stream, None))
+        else:
+            self.field_count += 1
+            if self.field_count > UPLOAD_MAX_FIELDS:
+                raise UploadRejected(f"More than {UPLOAD_MAX_FIELDS} form fields", 413)
+            self._field_value = bytearray()
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._stream is not None:
+            self._stream.size += end - start
+            if self._stream.size > UPLOAD_MAX_FILE_BYTES:
+                raise UploadRejected(f"{self._stream.filename} is larger than the upload size limit", 413)
+            self.events.append(("data", self._stream, bytes(data[start:end])))
+        else:
+            self._field_value += data[start:end]
+            if len(self._field_value) > UPLOAD_MAX_FIELD_BYTES:
+                raise UploadRejected(f"Form field {self._field_name} is too long", 413)
+
+    def on_part_end(self):
+        if self._stream is not None:
+            self.events.append(("end", self._stream, None))
+        else:
+            self.fields[self._field_name] = _decode(self._field_value)
+
+
+async def receive_upload(request: Request, file_fields: tuple, metadata: dict, metadata_fields: tuple = ()) -> ParsedUpload:
+    """
+        Parse a multipart body straight off the ASGI receive stream and pipe every file part
+        into storage as it arrives, so no file is spooled to memory or disk first. Files may
+        only come under the names in file_fields. Fields named
+        in metadata_fields that come before a file are added to its storage metadata. Limits
+        are checked while reading; on any failure every file already stored is deleted
+        before the error is raised.
+    """
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    if b"boundary" not in params:
+        raise UploadRejected("Expected a multipart/form-data body")
+    if int(request.headers.get("content-length") or 0) > UPLOAD_MAX_BYTES:
+        raise UploadRejected("Upload is larger than the upload size limit", 413)
+
+    body = _BodyParser(file_fields)
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": body.on_part_begin,
+        "on_part_data": body.on_part_data,
+        "on_part_end": body.on_part_end,
+        "on_header_field": body.on_header_field,
+        "on_header_value": body.on_header_value,
+        "on_header_end": body.on_header_end,
+        "on_headers_finished": body.on_headers_finished,
+    })
+    streams = []
+    received = 0
+    try:
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > UPLOAD_MAX_BYTES:
+                    raise UploadRejected("Upload is larger than the upload size limit", 413)
+                parser.write(chunk)
+                for event, stream, data in body.events:
+                    if event == "file":
+                        file_metadata = {
+                            **metadata,
+                            **{name: body.fields[name] for name in metadata_fields if name in body.fields}
+                        }
+                        stream.task = asyncio.create_task(storage.save_upload(stream, file_metadata))
+                        streams.append(stream)
+                    elif event == "data":
+                        await stream.put(data)
+                    else:
+                        stream.complete = True
+                        await stream.put(None)
+                body.events.clear()
+            parser.finalize()
+        except FormParserError:
+            raise UploadRejected("Malformed multipart body")
+        if not all(stream.complete for stream in streams):
+            raise UploadRejected("Multipart body ended inside a file")
+    except BaseException as e:
+        for stream in streams:
+            stream.abort(e if isinstance(e, Exception) else UploadRejected("Upload was interrupted"))
+        results = await asyncio.gather(*(stream.task for stream in streams), return_exceptions=True)
+        await blobs.delete_files([result.file_id for result in results if isinstance(result, storage.StoredFile)])
+        raise
+
+    results = await asyncio.gather(*(stream.task for stream in streams), return_exceptions=True)
+    stored_files = [result for result in results if isinstance(result, storage.StoredFile)]
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures:
+        await blobs.delete_files([stored.file_id for stored in stored_files])
+        raise failures[0]
+    return ParsedUpload(
+        body.fields,
+        [UploadedFile(stream.field_name, stream.filename, stream.content_type, stored) for stream, stored in zip(streams, stored_files)]
+    )
+
@@ -50,6 +50,31 @@ class CourseServiceStub(object):
                 request_serializer=check__services__pb2.CourseNameRequest.SerializeToString,
                 response_deserializer=check__services__pb2.CourseNameResponse.FromString,
                 _registered_method=True)
+        self.AuthorizeCourseAccess = channel.unary_unary(
+                '/courses_topics.CourseService/AuthorizeCourseAccess',
+                request_serializer=check__services__pb2.CourseAccessRequest.SerializeToString,
+                response_deserializer=check__services__pb2.CourseAccessResponse.FromString,
+                _registered_method=True)
+        self.CheckEnrollmentBatch = channel.unary_unary(
+                '/courses_topics.CourseService/CheckEnrollmentBatch',
+                request_serializer=check__services__pb2.EnrollmentBatchRequest.SerializeToString,
+                response_deserializer=check__services__pb2.EnrollmentBatchResponse.FromString,
+                _registered_method=True)
+        self.CheckValidityBatch = channel.unary_unary(
+                '/courses_topics.CourseService/CheckValidityBatch',
+                request_serializer=check__services__pb2.ValidityBatchRequest.SerializeToString,
+                response_deserializer=check__services__pb2.ValidityBatchResponse.FromString,
+                _registered_method=True)
+        self.CourseNames = channel.unary_unary(
+                '/courses_topics.CourseService/CourseNames',
+                request_serializer=check__services__pb2.CourseNamesRequest.SerializeToString,
+                response_deserializer=check__services__pb2.CourseNamesResponse.FromString,
+                _registered_method=True)
+        self.WatchCourseChanges = channel.unary_stream(
+                '/courses_topics.CourseService/WatchCourseChanges',
+                request_serializer=check__services__pb2.WatchCourseChangesRequest.SerializeToString,
+                response_deserializer=check__services__pb2.CourseChange.FromString,
+                _registered_method=True)
 
 
 class CourseServiceServicer(object):
@@ -74,6 +99,36 @@ class CourseServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def AuthorizeCourseAccess(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CheckEnrollmentBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CheckValidityBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CourseNames(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchCourseChanges(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_CourseServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -92,6 +147,31 @@ def add_CourseServiceServicer_to_server(servicer, server):
                     request_deserializer=check__services__pb2.CourseNameRequest.FromString,
                     response_serializer=check__services__pb2.CourseNameResponse.SerializeToString,
             ),
+            'AuthorizeCourseAccess': grpc.unary_unary_rpc_method_handler(
+                    servicer.AuthorizeCourseAccess,
+                    request_deserializer=check__services__pb2.CourseAccessRequest.FromString,
+                    response_serializer=check__services__pb2.CourseAccessResponse.SerializeToString,
+            ),
+            'CheckEnrollmentBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.CheckEnrollmentBatch,
+                    request_deserializer=check__services__pb2.EnrollmentBatchRequest.FromString,
+                    response_serializer=check__services__pb2.EnrollmentBatchResponse.SerializeToString,
+            ),
+            'CheckValidityBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.CheckValidityBatch,
+                    request_deserializer=check__services__pb2.ValidityBatchRequest.FromString,
+                    response_serializer=check__services__pb2.ValidityBatchResponse.SerializeToString,
+            ),
+            'CourseNames': grpc.unary_unary_rpc_method_handler(
+                    servicer.CourseNames,
+                    request_deserializer=check__services__pb2.CourseNamesRequest.FromString,
+                    response_serializer=check__services__pb2.CourseNamesResponse.SerializeToString,
+            ),
+            'WatchCourseChanges': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchCourseChanges,
+                    request_deserializer=check__services__pb2.WatchCourseChangesRequest.FromString,
+                    response_serializer=check__services__pb2.CourseChange.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'courses_topics.CourseService', rpc_method_handlers)
@@ -184,3 +264,138 @@ class CourseService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def AuthorizeCourseAccess(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/courses_topics.CourseService/AuthorizeCourseAccess',
+            check__services__pb2.CourseAccessRequest.SerializeToString,
+            check__services__pb2.CourseAccessResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CheckEnrollmentBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/courses_topics.CourseService/CheckEnrollmentBatch',
+            check__services__pb2.EnrollmentBatchRequest.SerializeToString,
+            check__services__pb2.EnrollmentBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CheckValidityBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/courses_topics.CourseService/CheckValidityBatch',
+            check__services__pb2.ValidityBatchRequest.SerializeToString,
+            check__services__pb2.ValidityBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CourseNames(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/courses_topics.CourseService/CourseNames',
+            check__services__pb2.CourseNamesRequest.SerializeToString,
+            check__services__pb2.CourseNamesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchCourseChanges(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/courses_topics.CourseService/WatchCourseChanges',
+            check__services__pb2.WatchCourseChangesRequest.SerializeToString,
+            check__services__pb2.CourseChange.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,51 +1,53 @@
 import os, sys
 from datetime import datetime
 from typing import Annotated
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from discussion_forum.database import SessionLocal
+from sqlalchemy import select, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from discussion_forum.database import AsyncSessionLocal
 from discussion_forum.schema import PostBase, CommentBase, CommentCreate
 import discussion_forum.models as forum_models
 from discussion_forum.grpc_client import CourseClient
 from common.response_format import success_response, error_response
-from common.token_decoder import token_decoder
+from common.pagination import Keyset, InvalidPage, page_size
+from common.auth import user_dependency
 # import courses_topics.models as course_models
 
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
+
+# Oldest activity first, like posts
+COMMENTS = Keyset("comments", forum_models.Comments.comment_updated_timestamp, forum_models.Comments.comment_id)
 
-GRPC_SERVER = os.getenv("GRPC_SERVER")
-# Checks enrollment of a student with a course
-def check_enrollment(user_id: str, course_id: int):
-    client = CourseClient(server_address=GRPC_SERVER)
-    is_enrolled = client.check_enrollment(user_id, course_id)
-    return is_enrolled
+# Checks course validity and enrollment of a student in one call
+async def authorize_course_access(user_id: str, course_id: int):
+    client = CourseClient()
+    access = await run_in_threadpool(client.authorize_access, user_id, course_id)
+    return access
 
 # Checks if a course is present
-def check_course_validity(course_id: int):
-    client = CourseClient(server_address=GRPC_SERVER)
-    is_valid = client.check_validity(course_id)
+async def check_course_validity(course_id: int):
+    client = CourseClient()
+    is_valid = await run_in_threadpool(client.check_validity, course_id)
     return is_valid
 
 
 """GET API: to get all the comments for a specific post"""
 @router.get("/courses/{course_id}/discussions/{post_id}")
-async def get_comments(course_id: int, post_id: int, db: db_dependency, authorization: str = Header(...)):
+async def get_comments(course_id: int, post_id: int, db: db_dependency, user_id: user_dependency, cursor: str = None, limit: int = None):
     try:
-        # gRPC validity checker
-        if not check_course_validity(course_id=course_id):
+        # gRPC validity and enrollment checker
+        access = await authorize_course_access(user_id=user_id, course_id=course_id)
+        if not access.is_valid:
             return JSONResponse(
                 status_code = 404,
                 content = error_response(
@@ -53,27 +55,7 @@ async def get_comments(course_id: int, post_id: int, db: db_dependency, authoriz
                 )
             )
 
-        # user Id Auth
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code = 401,
-                content = error_response(
-                    message = "Invalid Authorization Header Format"
-                )
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code = 401,
-                content = error_response(
-                    message = "User ID not found in Token"
-                )
-            )
-
-        # gRPC Enrollment checker
-        if not check_enrollment(user_id=user_id, course_id=course_id):
+        if not access.is_enrolled:
             return JSONResponse(
                 status_code = 401,
                 content = error_response(
@@ -81,7 +63,7 @@ async def get_comments(course_id: int, post_id: int, db: db_dependency, authoriz
                 )
             )
 
-        db_forum = db.query(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id).first()
+        db_forum = (await db.scalars(select(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id))).first()
         if not db_forum:
             return JSONResponse(
                 status_code = 404,
@@ -90,7 +72,12 @@ async def get_comments(course_id: int, post_id: int, db: db_dependency, authoriz
                 )
             )
 
-        result = db.query(forum_models.Comments).filter(forum_models.Comments.comment_in_post == post_id).order_by(forum_models.Comments.comment_updated_timestamp).all()
+        try:
+            limit = page_size(limit)
+            stmt = COMMENTS.apply(select(forum_models.Comments).filter(forum_models.Comments.comment_in_post == post_id), cursor, limit)
+        except InvalidPage as e:
+            return JSONResponse(status_code = 400, content = error_response(message = str(e)))
+        result, next_cursor = COMMENTS.page((await db.scalars(stmt)).all(), limit)
 
         return JSONResponse(
             status_code = 200,
@@ -99,7 +86,8 @@ async def get_comments(course_id: int, post_id: int, db: db_dependency, authoriz
                     "PostData": [db_forum],
                     "CommentData": result
                 }),
-                message = "Comments retrieved successfully" if result else "No Comments Found for the Post"
+                message = "Comments retrieved successfully" if result else "No Comments Found for the Post",
+                next_cursor = next_cursor
             )
         )
 
@@ -123,10 +111,10 @@ async def get_comments(course_id: int, post_id: int, db: db_dependency, authoriz
 
 """POST API: to create a new comment in a post"""
 @router.post("/courses/{course_id}/discussions/{post_id}")
-async def create_comment(course_id: int, post_id: int, comm: CommentCreate, db: db_dependency, authorization: str = Header(...)):
+async def create_comment(course_id: int, post_id: int, comm: CommentCreate, db: db_dependency, user_id: user_dependency):
     try:
         # validity checker for course id gRPC
-        if not check_course_validity(course_id=course_id):
+        if not await check_course_validity(course_id=course_id):
             return JSONResponse(
                 status_code = 404,
                 content = error_response(
@@ -134,27 +122,8 @@ async def create_comment(course_id: int, post_id: int, comm: CommentCreate, db:
                 )
             )
 
-        # user id auth
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code = 401,
-                content = error_response(
-                    message = "Invalid Authorization Header Format"
-                )
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code = 401,
-                content = error_response(
-                    message = "User ID not found in Token"
-                )
-            )
-
         # API Logic
-        db_forum = db.query(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id).first()
+        db_forum = (await db.scalars(select(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id))).first()
         if not db_forum:
             return JSONResponse(
                 status_code = 404,
@@ -172,11 +141,11 @@ async def create_comment(course_id: int, post_id: int, comm: CommentCreate, db:
         
         try:
             db.add(db_comment)
-            db.commit()
-            db.refresh(db_comment)
+            await db.commit()
+            await db.refresh(db_comment)
 
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -221,10 +190,10 @@ async def create_comment(course_id: int, post_id: int, comm: CommentCreate, db:
 
 """PUT API: to update OR vote a comment in a post"""
 @router.put("/courses/{course_id}/discussions/{post_id}")
-async def update_comment(course_id: int, post_id: int, comment_id: int, comm: CommentCreate, db: db_dependency, authorization: str = Header(...), mode: str = None, new_vote: int = None):
+async def update_comment(course_id: int, post_id: int, comment_id: int, comm: CommentCreate, db: db_dependency, user_id: user_dependency, mode: str = None, new_vote: int = None):
     try:
         # Course Validity
-        if not check_course_validity(course_id=course_id):
+        if not await check_course_validity(course_id=course_id):
             return JSONResponse(
                 status_code = 404,
                 content = error_response(
@@ -232,26 +201,7 @@ async def update_comment(course_id: int, post_id: int, comment_id: int, comm: Co
                 )
             )
 
-        # Authorization Error
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code = 401,
-                content = error_response(
-                    message = "Invalid Authorization Header Format"
-                )
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code = 401,
-                content = error_response(
-                    message = "User ID not found in Token"
-                )
-            )
-
-        db_forum = db.query(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id).first()
+        db_forum = (await db.scalars(select(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id))).first()
         if not db_forum:
             return JSONResponse(
                 status_code = 404,
@@ -260,7 +210,7 @@ async def update_comment(course_id: int, post_id: int, comment_id: int, comm: Co
                 )
             )
 
-        db_comment = db.query(forum_models.Comments).filter(forum_models.Comments.comment_id == comment_id).first()
+        db_comment = (await db.scalars(select(forum_models.Comments).filter(forum_models.Comments.comment_id == comment_id))).first()
         if not db_comment:
             return JSONResponse(
                 status_code = 404,
@@ -284,10 +234,10 @@ async def update_comment(course_id: int, post_id: int, comment_id: int, comm: Co
         db_comment.comment_updated_timestamp = datetime.now()
 
         try:
-            db.commit()
-            db.refresh(db_comment)
+            await db.commit()
+            await db.refresh(db_comment)
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -327,10 +277,10 @@ async def update_comment(course_id: int, post_id: int, comment_id: int, comm: Co
 
 """DELETE API: to delete a comment in a post"""
 @router.delete("/courses/{course_id}/discussions/{post_id}")
-async def delete_comment(course_id: int, post_id: int, comment_id: int, db: db_dependency, authorization: str = Header(...)):
+async def delete_comment(course_id: int, post_id: int, comment_id: int, db: db_dependency, user_id: user_dependency):
     try:
         # Course validity checker gRPC
-        if not check_course_validity(course_id=course_id):
+        if not await check_course_validity(course_id=course_id):
             return JSONResponse(
                 status_code = 404,
                 content = error_response(
@@ -338,26 +288,7 @@ async def delete_comment(course_id: int, post_id: int, comment_id: int, db: db_d
                 )
             )
         
-        # Authorization Error
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code = 401,
-                content = error_response(
-                    message = "Invalid Authorization Header Format"
-                )
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code = 401,
-                content = error_response(
-                    message = "User ID not found in Token"
-                )
-            )
-
-        db_forum = db.query(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id).first()
+        db_forum = (await db.scalars(select(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id))).first()
         if not db_forum:
             return JSONResponse(
                 status_code = 404,
@@ -366,7 +297,7 @@ async def delete_comment(course_id: int, post_id: int, comment_id: int, db: db_d
                 )
             )
 
-        db_comment = db.query(forum_models.Comments).filter(forum_models.Comments.comment_id == comment_id).first()
+        db_comment = (await db.scalars(select(forum_models.Comments).filter(forum_models.Comments.comment_id == comment_id))).first()
         if not db_comment:
             return JSONResponse(
                 status_code = 404,
@@ -384,10 +315,10 @@ async def delete_comment(course_id: int, post_id: int, comment_id: int, db: db_d
             )
 
         try:
-            db.delete(db_comment)
-            db.commit()
+            await db.delete(db_comment)
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -1,11 +1,24 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 import os
+from common.db_pool import engine_options, export_pool_metrics
 
 URL_DATABASE = os.getenv('POSTGRES_URL')
 
-engine = create_engine(URL_DATABASE)
+engine = create_engine(URL_DATABASE, **engine_options("discussion_forum"))
+export_pool_metrics(engine, "discussion_forum", "sync")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Same database through the asyncpg driver for code running on the event loop
+ASYNC_URL_DATABASE = make_url(URL_DATABASE).set(drivername="postgresql+asyncpg")
+
+async_engine = create_async_engine(ASYNC_URL_DATABASE, **engine_options("discussion_forum", is_async=True))
+export_pool_metrics(async_engine, "discussion_forum", "async")
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
@@ -1,50 +1,52 @@
 import os, sys
 from datetime import datetime
 from typing import Annotated
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from discussion_forum.database import SessionLocal
+from sqlalchemy import select, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from discussion_forum.database import AsyncSessionLocal
 from discussion_forum.schema import PostBase, PostCreate
 import discussion_forum.models as forum_models
 from discussion_forum.grpc_client import CourseClient
 from common.response_format import success_response, error_response
-from common.token_decoder import token_decoder
+from common.pagination import Keyset, InvalidPage, page_size
+from common.auth import user_dependency
 
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
+
+# Oldest activity first, post_id breaks ties between posts updated at the same moment
+POSTS = Keyset("posts", forum_models.Posts.post_updated_timestamp, forum_models.Posts.post_id)
 
-GRPC_SERVER = os.getenv("GRPC_SERVER")
-# Checks enrollment of a student with a course
-def check_enrollment(user_id: str, course_id: int):
-    client = CourseClient(server_address=GRPC_SERVER)
-    is_enrolled = client.check_enrollment(user_id, course_id)
-    return is_enrolled
+# Checks course validity and enrollment of a student in one call
+async def authorize_course_access(user_id: str, course_id: int):
+    client = CourseClient()
+    access = await run_in_threadpool(client.authorize_access, user_id, course_id)
+    return access
 
 # Checks if a course is present
-def check_course_validity(course_id: int):
-    client = CourseClient(server_address=GRPC_SERVER)
-    is_valid = client.check_validity(course_id)
+async def check_course_validity(course_id: int):
+    client = CourseClient()
+    is_valid = await run_in_threadpool(client.check_validity, course_id)
     return is_valid
 
 
 """GET API: to get all the posts in the course forum"""
 @router.get("/courses/{course_id}/discussions")
-async def get_posts(course_id: int, db: db_dependency, authorization: str = Header(...)):
+async def get_posts(course_id: int, db: db_dependency, user_id: user_dependency, cursor: str = None, limit: int = None):
     try:
-        # gRPC validity checker
-        if not check_course_validity(course_id=course_id):
+        # gRPC validity and enrollment checker
+        access = await authorize_course_access(user_id=user_id, course_id=course_id)
+        if not access.is_valid:
             return JSONResponse(
                 status_code = 404,
                 content = error_response(
@@ -52,23 +54,7 @@ async def get_posts(course_id: int, db: db_dependency, authorization: str = Head
                 )
             )
 
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="Invalid Authorization header format")
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="User ID not found in token")
-            )
-
-        # gRPC Enrollment checker
-        if not check_enrollment(user_id=user_id, course_id=course_id):
+        if not access.is_enrolled:
             return JSONResponse(
                 status_code = 401,
                 content = error_response(
@@ -76,7 +62,12 @@ async def get_posts(course_id: int, db: db_dependency, authorization: str = Head
                 )
             )
 
-        db_forum = db.query(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).order_by(forum_models.Posts.post_updated_timestamp).all()
+        try:
+            limit = page_size(limit)
+            stmt = POSTS.apply(select(forum_models.Posts).filter(forum_models.Posts.course_id == course_id), cursor, limit)
+        except InvalidPage as e:
+            return JSONResponse(status_code = 400, content = error_response(message = str(e)))
+        db_forum, next_cursor = POSTS.page((await db.scalars(stmt)).all(), limit)
         if not db_forum:
             return JSONResponse(
                 status_code = 404,
@@ -89,7 +80,8 @@ async def get_posts(course_id: int, db: db_dependency, authorization: str = Head
             status_code = 200,
             content = success_response(
                 data = jsonable_encoder(db_forum),
-                message = "All posts retrieved successfully"
+                message = "All posts retrieved successfully",
+                next_cursor = next_cursor
             )
         )
 
@@ -113,10 +105,11 @@ async def get_posts(course_id: int, db: db_dependency, authorization: str = Head
 
 """POST API: to create a new post in a course forum"""
 @router.post("/courses/{course_id}/discussions")
-async def create_post(course_id: int, post: PostCreate, db: db_dependency, authorization: str = Header(...)):
+async def create_post(course_id: int, post: PostCreate, db: db_dependency, user_id: user_dependency):
     try:
-        # Course Validity gRPC call
-        if not check_course_validity(course_id=course_id):
+        # Course Validity and Enrollment gRPC call
+        access = await authorize_course_access(user_id=user_id, course_id=course_id)
+        if not access.is_valid:
             return JSONResponse(
                 status_code = 404,
                 content = error_response(
@@ -124,23 +117,7 @@ async def create_post(course_id: int, post: PostCreate, db: db_dependency, autho
                 )
             )
 
-        # Auth User ID
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="Invalid Authorization header format")
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="User ID not found in token")
-            )
-        
-        # gRPC Enrollment checker
-        if not check_enrollment(user_id=user_id, course_id=course_id):
+        if not access.is_enrolled:
             return JSONResponse(
                 status_code = 401,
                 content = error_response(
@@ -157,10 +134,10 @@ async def create_post(course_id: int, post: PostCreate, db: db_dependency, autho
         )
         try:
             db.add(db_forum)
-            db.commit()
-            db.refresh(db_forum)
+            await db.commit()
+            await db.refresh(db_forum)
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -200,10 +177,10 @@ async def create_post(course_id: int, post: PostCreate, db: db_dependency, autho
 
 """PUT API: to update OR vote a post"""
 @router.put("/courses/{course_id}/discussions")
-async def update_post(course_id: int, post_id: int, post: PostBase, db: db_dependency, authorization: str = Header(...), mode: str = None, new_vote: int = None):
+async def update_post(course_id: int, post_id: int, post: PostBase, db: db_dependency, user_id: user_dependency, mode: str = None, new_vote: int = None):
     try:
         # Course Validity gRPC call
-        if not check_course_validity(course_id=course_id):
+        if not await check_course_validity(course_id=course_id):
             return JSONResponse(
                 status_code = 404,
                 content = error_response(
@@ -211,23 +188,8 @@ async def update_post(course_id: int, post_id: int, post: PostBase, db: db_depen
                 )
             )
 
-        # User ID Auth
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="Invalid Authorization header format")
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="User ID not found in token")
-            )
-        
         # API Logic
-        db_forum = db.query(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id).first()
+        db_forum = (await db.scalars(select(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id))).first()
         if not db_forum:
             return JSONResponse(
                 status_code = 404,
@@ -250,10 +212,10 @@ async def update_post(course_id: int, post_id: int, post: PostBase, db: db_depen
         db_forum.post_updated_timestamp = datetime.now()
 
         try:
-            db.commit()
-            db.refresh(db_forum)
+            await db.commit()
+            await db.refresh(db_forum)
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -293,9 +255,9 @@ async def update_post(course_id: int, post_id: int, post: PostBase, db: db_depen
 
 """DELETE API: to delete a post"""
 @router.delete("/courses/{course_id}/discussions")
-async def delete_post(course_id: int, post_id: int, db: db_dependency, authorization: str = Header(...)):
+async def delete_post(course_id: int, post_id: int, db: db_dependency, user_id: user_dependency):
     try:
-        if not check_course_validity(course_id=course_id):
+        if not await check_course_validity(course_id=course_id):
             return JSONResponse(
                 status_code = 404,
                 content = error_response(
@@ -303,22 +265,7 @@ async def delete_post(course_id: int, post_id: int, db: db_dependency, authoriza
                 )
             )
         
-        # User ID Auth
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="Invalid Authorization header format")
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="User ID not found in token")
-            )
-
-        db_forum = db.query(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id).first()
+        db_forum = (await db.scalars(select(forum_models.Posts).filter(forum_models.Posts.course_id == course_id).filter(forum_models.Posts.post_id == post_id))).first()
         if not db_forum:
             return JSONResponse(
                 status_code = 404,
@@ -336,10 +283,10 @@ async def delete_post(course_id: int, post_id: int, db: db_dependency, authoriza
             )
 
         try:
-            db.delete(db_forum)
-            db.commit()
+            await db.delete(db_forum)
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -1,13 +1,139 @@
+import os
+import itertools
+import threading
 import grpc
-from discussion_forum.check_services_pb2 import EnrollmentRequest, ValidityRequest
+from discussion_forum.check_services_pb2 import EnrollmentRequest, ValidityRequest, CourseAccessRequest, CourseAccessResponse, \
+    WatchCourseChangesRequest
 from discussion_forum.check_services_pb2_grpc import CourseServiceStub
+from common.ttl_cache import TTLCache, MISSING
+
+GRPC_SERVER = os.getenv("GRPC_SERVER", "localhost:50051")
+GRPC_CHANNEL_POOL_SIZE = int(os.getenv("GRPC_CHANNEL_POOL_SIZE", "4"))
+GRPC_KEEPALIVE_TIME_MS = int(os.getenv("GRPC_KEEPALIVE_TIME_MS", "30000"))
+GRPC_KEEPALIVE_TIMEOUT_MS = int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "10000"))
+GRPC_CACHE_MAXSIZE = int(os.getenv("GRPC_CACHE_MAXSIZE", "50000"))
+GRPC_CACHE_TTL_SECONDS = float(os.getenv("GRPC_CACHE_TTL_SECONDS", "300"))
+# Negative answers expire sooner in case a change event is missed
+GRPC_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("GRPC_CACHE_NEGATIVE_TTL_SECONDS", "30"))
+
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", GRPC_KEEPALIVE_TIME_MS),
+    ("grpc.keepalive_timeout_ms", GRPC_KEEPALIVE_TIMEOUT_MS),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    # Give every channel its own subchannel so the pool maps to distinct HTTP/2 connections
+    ("grpc.use_local_subchannel_pool", 1),
+]
+
+
+class ChannelManager:
+    """Process-wide pool of long-lived gRPC channels to the CourseService."""
+
+    def __init__(self, server_address=GRPC_SERVER, pool_size=GRPC_CHANNEL_POOL_SIZE):
+        self.server_address = server_address
+        self.pool_size = max(1, pool_size)
+        self._channels = []
+        self._cycle = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        self._channels = [
+            grpc.insecure_channel(self.server_address, options=CHANNEL_OPTIONS)
+            for _ in range(self.pool_size)
+        ]
+        self._cycle = itertools.cycle([CourseServiceStub(channel) for channel in self._channels])
+
+    def start(self):
+        """Open the channel pool. Safe to call more than once."""
+        with self._lock:
+            if self._cycle is None:
+                self._open()
+
+    def stop(self):
+        """Close every pooled channel."""
+        with self._lock:
+            for channel in self._channels:
+                channel.close()
+            self._channels = []
+            self._cycle = None
+
+    def stub(self) -> CourseServiceStub:
+        """Return the next stub in round-robin order, opening the pool lazily."""
+        with self._lock:
+            if self._cycle is None:
+                self._open()
+            return next(self._cycle)
+
+
+channel_manager = ChannelManager()
+
+# Course lookups tagged by course_id so a change event evicts all of them at once
+course_cache = TTLCache(maxsize=GRPC_CACHE_MAXSIZE, ttl=GRPC_CACHE_TTL_SECONDS)
+
+
+def generation(course_id: int) -> tuple:
+    # Read before the RPC, an answer started before a change event must not outlive it
+    return course_cache.generation((course_id,))
+
+
+def remember(key, course_id: int, seen: tuple, value, is_positive: bool = True):
+    """Cache an RPC answer, unless the course changed since seen was read with generation()."""
+    ttl = GRPC_CACHE_TTL_SECONDS if is_positive else GRPC_CACHE_NEGATIVE_TTL_SECONDS
+    course_cache.set(key, value, ttl=ttl, tags=(course_id,), generation=seen)
+    return value
+
+
+class CourseChangeWatcher:
+    """
+        Follows the CourseService WatchCourseChanges stream on a background thread
+        and evicts cached lookups for every course that changes. While the stream
+        is down events may be missed, so the whole cache is dropped on reconnect.
+    """
+
+    def __init__(self, manager: ChannelManager = channel_manager, retry_interval: float = 2.0):
+        self.manager = manager
+        self.retry_interval = retry_interval
+        self._stop = threading.Event()
+        self._call = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="course-change-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._call is not None:
+            self._call.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=self.retry_interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._call = self.manager.stub().WatchCourseChanges(WatchCourseChangesRequest())
+                course_cache.clear()
+                for change in self._call:
+                    course_cache.evict_tag(change.course_id)
+            except grpc.RpcError as e:
+                if self._stop.is_set():
+                    break
+                print(f"gRPC Error: {e.code()} - {e.details()}")
+            course_cache.clear()
+            self._stop.wait(self.retry_interval)
+
+
+course_watcher = CourseChangeWatcher()
+
 
 class CourseClient:
     """gRPC client for the CourseService."""
 
-    def __init__(self, server_address="localhost:50051"):
-        self.channel = grpc.insecure_channel(server_address)
-        self.stub = CourseServiceStub(self.channel)
+    def __init__(self, manager: ChannelManager = channel_manager):
+        self.stub = manager.stub()
 
     def check_enrollment(self, user_id: str, course_id: int) -> bool:
         """
@@ -15,19 +141,40 @@ class CourseClient:
         user_id: str (string ID of the user)
         course_id: int (ID of the course)
         """
+        key = ("enrolled", user_id, course_id)
+        cached = course_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        seen = generation(course_id)
         request = EnrollmentRequest(user_id=user_id, course_id=course_id)
         response = self.stub.CheckEnrollment(request)
-        return response.is_enrolled
-    
+        return remember(key, course_id, seen, response.is_enrolled, response.is_enrolled)
+
     def check_validity(self, course_id: int) -> bool:
         """
         Check if a course is valid.
         course_id: int (ID of the course)
         """
+        key = ("valid", course_id)
+        cached = course_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        seen = generation(course_id)
         request = ValidityRequest(course_id=course_id)
         response = self.stub.CheckValidity(request)
-        return response.is_valid
-    
+        return remember(key, course_id, seen, response.is_valid, response.is_valid)
 
-
-   
+    def authorize_access(self, user_id: str, course_id: int) -> CourseAccessResponse:
+        """
+        Check course validity and user enrollment in a single round-trip.
+        user_id: str (string ID of the user)
+        course_id: int (ID of the course)
+        """
+        key = ("access", user_id, course_id)
+        cached = course_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        seen = generation(course_id)
+        request = CourseAccessRequest(user_id=user_id, course_id=course_id)
+        response = self.stub.AuthorizeCourseAccess(request)
+        return remember(key, course_id, seen, response, response.is_valid and response.is_enrolled)
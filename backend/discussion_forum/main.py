@@ -1,11 +1,29 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from discussion_forum import models
+from prometheus_client import make_asgi_app
+from common.auth import register_auth_error_handler
+from common.migrations import upgrade_database
 from discussion_forum.database import engine
 from discussion_forum.forum import router as forum_router
 from discussion_forum.comments import router as comment_router
+from discussion_forum.grpc_client import channel_manager, course_watcher
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep the CourseService channels open for the lifetime of the worker
+    channel_manager.start()
+    # Evict cached course lookups as soon as the CourseService reports a change
+    course_watcher.start()
+    yield
+    course_watcher.stop()
+    channel_manager.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+register_auth_error_handler(app)
 
 origins = [
     "http://localhost:3000",
@@ -20,7 +38,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-models.Base.metadata.create_all(bind=engine)
+# Schema comes from the migrations, replicas starting together apply them once
+upgrade_database(engine, os.path.dirname(__file__))
 
 app.include_router(forum_router)
 app.include_router(comment_router)
+
+# Prometheus scrape endpoint, includes the database pool metrics
+app.mount("/metrics", make_asgi_app())
@@ -0,0 +1,4 @@
+from common.migrations import run_env
+from discussion_forum import models
+
+run_env(models.Base.metadata)
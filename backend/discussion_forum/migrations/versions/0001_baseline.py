@@ -0,0 +1,68 @@
+"""Schema as create_all built it before migrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+from common.migrations import missing_tables
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TABLES = ("posts", "comments")
+
+
+def _indexes(table: str, *columns):
+    for column in columns:
+        op.create_index(f"ix_{table}_{column}", table, [column])
+
+
+def upgrade():
+    missing = missing_tables(*TABLES)
+
+    if "posts" in missing:
+        op.create_table(
+            "posts",
+            sa.Column("post_id", sa.Integer, primary_key=True),
+            sa.Column("post_title", sa.String, nullable=False),
+            sa.Column("post_content", sa.String, nullable=False),
+            sa.Column("post_created_by", sa.String, nullable=False),
+            sa.Column("post_created_timestamp", sa.DateTime, nullable=False),
+            sa.Column("post_updated_timestamp", sa.DateTime, nullable=False),
+            sa.Column("vote_count", sa.Integer),
+            sa.Column("upvotes_by", sa.String),
+            sa.Column("downvotes_by", sa.String),
+            sa.Column("course_id", sa.Integer, nullable=False),
+        )
+        _indexes(
+            "posts", "post_id", "post_title", "post_content", "post_created_by", "post_created_timestamp",
+            "post_updated_timestamp", "vote_count", "upvotes_by", "downvotes_by", "course_id"
+        )
+
+    if "comments" in missing:
+        op.create_table(
+            "comments",
+            sa.Column("comment_id", sa.Integer, primary_key=True),
+            sa.Column("comment_content", sa.String, nullable=False),
+            sa.Column("comment_created_by", sa.String, nullable=False),
+            sa.Column("comment_created_timestamp", sa.DateTime, nullable=False),
+            sa.Column("comment_updated_timestamp", sa.DateTime),
+            sa.Column("vote_count", sa.Integer),
+            sa.Column("upvotes_by", sa.String),
+            sa.Column("downvotes_by", sa.String),
+            sa.Column("comment_in_post", sa.Integer, sa.ForeignKey("posts.post_id")),
+            sa.Column("reply_to", sa.String, nullable=False),
+        )
+        _indexes(
+            "comments", "comment_id", "comment_content", "comment_created_by", "comment_created_timestamp",
+            "comment_updated_timestamp", "vote_count", "upvotes_by", "downvotes_by", "reply_to"
+        )
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_table(table)
@@ -0,0 +1,53 @@
+"""Drop indexes no query uses, add composites for the real lookups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Every post and comment was written to an index per column, the full text of both
+included, and a vote could never be a HOT update since vote_count and the voter
+lists were indexed. Listings filter by course or post and sort by update time,
+which no index covered.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Single column indexes from 0001, the ones on primary keys duplicate the primary key index
+DROPPED = {
+    "posts": (
+        "post_id", "post_title", "post_content", "post_created_by", "post_created_timestamp",
+        "post_updated_timestamp", "vote_count", "upvotes_by", "downvotes_by", "course_id"
+    ),
+    "comments": (
+        "comment_id", "comment_content", "comment_created_by", "comment_created_timestamp",
+        "comment_updated_timestamp", "vote_count", "upvotes_by", "downvotes_by", "reply_to"
+    ),
+}
+
+# name, table, columns
+ADDED = (
+    # A course's posts in keyset order
+    ("ix_posts_course_id_post_updated_timestamp_post_id", "posts", ["course_id", "post_updated_timestamp", "post_id"]),
+    # A post's comments in keyset order, also what deleting a post checks the foreign key with
+    ("ix_comments_comment_in_post_updated_timestamp_id", "comments", ["comment_in_post", "comment_updated_timestamp", "comment_id"]),
+)
+
+
+def upgrade():
+    for table, columns in DROPPED.items():
+        for column in columns:
+            op.drop_index(f"ix_{table}_{column}", table_name=table, if_exists=True)
+    for name, table, columns in ADDED:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(ADDED):
+        op.drop_index(name, table_name=table, if_exists=True)
+    for table, columns in DROPPED.items():
+        for column in columns:
+            op.create_index(f"ix_{table}_{column}", table, [column], if_not_exists=True)
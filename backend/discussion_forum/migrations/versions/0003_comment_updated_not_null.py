@@ -0,0 +1,29 @@
+"""Make comments.comment_updated_timestamp NOT NULL
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+Comment listings page on (comment_updated_timestamp, comment_id), and a NULL
+sorts after every timestamp and never compares greater than a cursor, so such a
+comment could fall off a page boundary or end a listing early. Comments without
+one are backfilled with their created timestamp.
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "UPDATE comments SET comment_updated_timestamp = comment_created_timestamp "
+        "WHERE comment_updated_timestamp IS NULL"
+    )
+    op.alter_column("comments", "comment_updated_timestamp", nullable=False)
+
+
+def downgrade():
+    op.alter_column("comments", "comment_updated_timestamp", nullable=True)
@@ -1,36 +1,47 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Index, Integer, String, DateTime, ForeignKey
 from sqlalchemy.sql import func
 from discussion_forum.database import Base
 
+# Indexes only where a query filters or sorts, every one is written on each insert.
+# Schema changes go through the migrations in discussion_forum/migrations
+
 
 class Posts(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # A course's posts in keyset order
+        Index("ix_posts_course_id_post_updated_timestamp_post_id", "course_id", "post_updated_timestamp", "post_id"),
+    )
 
-    post_id = Column(Integer, primary_key=True, index=True)
-    post_title = Column(String, nullable=False, index=True)
-    post_content = Column(String, nullable=False, index=True)
-    post_created_by = Column(String, nullable=False, index=True)
-    post_created_timestamp = Column(DateTime, default=func.now(), nullable=False, index=True)
+    post_id = Column(Integer, primary_key=True)
+    post_title = Column(String, nullable=False)
+    post_content = Column(String, nullable=False)
+    post_created_by = Column(String, nullable=False)
+    post_created_timestamp = Column(DateTime, default=func.now(), nullable=False)
     # post_updated_by = Column(String, index=True)
-    post_updated_timestamp = Column(DateTime, default=func.now(), nullable=False, index=True)
-    vote_count = Column(Integer, index=True)
-    upvotes_by = Column(String, index=True)
-    downvotes_by = Column(String, index=True)
-    course_id = Column(Integer, nullable=False, index=True)
+    post_updated_timestamp = Column(DateTime, default=func.now(), nullable=False)
+    vote_count = Column(Integer)
+    upvotes_by = Column(String)
+    downvotes_by = Column(String)
+    course_id = Column(Integer, nullable=False)
 
 
 class Comments(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        # A post's comments in keyset order
+        Index("ix_comments_comment_in_post_updated_timestamp_id", "comment_in_post", "comment_updated_timestamp", "comment_id"),
+    )
 
-    comment_id = Column(Integer, primary_key=True, index=True)
-    comment_content = Column(String, nullable=False, index=True)
-    comment_created_by = Column(String, nullable=False, index=True)
-    comment_created_timestamp = Column(DateTime, default=func.now(), nullable=False, index=True)
+    comment_id = Column(Integer, primary_key=True)
+    comment_content = Column(String, nullable=False)
+    comment_created_by = Column(String, nullable=False)
+    comment_created_timestamp = Column(DateTime, default=func.now(), nullable=False)
     # comment_updated_by = Column(Integer, index=True)
-    comment_updated_timestamp = Column(DateTime, default=func.now(), index=True)
-    vote_count = Column(Integer, index=True)
-    upvotes_by = Column(String, index=True)
-    downvotes_by = Column(String, index=True)
+    comment_updated_timestamp = Column(DateTime, default=func.now(), nullable=False)
+    vote_count = Column(Integer)
+    upvotes_by = Column(String)
+    downvotes_by = Column(String)
     # comment_in_post = Column(Integer, nullable=False, index=True)
     comment_in_post = Column(Integer, ForeignKey("posts.post_id"))
-    reply_to = Column(String, nullable=False, index=True)
+    reply_to = Column(String, nullable=False)
@@ -1,77 +1,63 @@
 import os, sys
-from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi import APIRouter, HTTPException, Depends
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from typing import Annotated
 from sqlalchemy import select
-from sqlalchemy.orm import Session
-from quiz_service.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from quiz_service.database import AsyncSessionLocal
 from quiz_service.schema import QuizCreateSchema, SubmissionSchema
 from quiz_service.models import Quiz, QuizXrefUser
 from quiz_service.grpc_client import CourseClient
-from common.token_decoder import token_decoder
+from common.auth import user_dependency
 from common.response_format import success_response, error_response
+from common.pagination import Keyset, InvalidPage, page_size
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
+
+QUIZZES = Keyset("quizzes", Quiz.quiz_id)
 
-GRPC_SERVER = os.getenv("GRPC_SERVER")
 # Checks enrollment of a student with a course
-def check_enrollment(user_id: str, course_id: int):
-    client = CourseClient(server_address=GRPC_SERVER)
-    is_enrolled = client.check_enrollment(user_id, course_id)
+async def check_enrollment(user_id: str, course_id: int):
+    client = CourseClient()
+    is_enrolled = await run_in_threadpool(client.check_enrollment, user_id, course_id)
     return is_enrolled
 
 
 # Checks if a course is present
-def check_course_validity(course_id: int):
-    client = CourseClient(server_address=GRPC_SERVER)
-    is_valid = client.check_validity(course_id)
+async def check_course_validity(course_id: int):
+    client = CourseClient()
+    is_valid = await run_in_threadpool(client.check_validity, course_id)
     return is_valid
 
 
-# Gets the course name for the given course_id
-def get_course_name(course_id:int):
-    client = CourseClient(server_address=GRPC_SERVER)
-    course_name = client.get_course_name(course_id)
-    return course_name
+# Gets the course names for many course_ids in one call, unknown courses are left out.
+# None when the course service could not be reached
+async def get_course_names(course_ids: list):
+    client = CourseClient()
+    course_names = await run_in_threadpool(client.get_course_names, course_ids)
+    return course_names
 
 
 # Endpoint for creating a new quiz
 @router.post("/create-quiz")
-def create_quiz(quiz: QuizCreateSchema, db: db_dependency, authorization: str = Header(...)):
+async def create_quiz(quiz: QuizCreateSchema, db: db_dependency, user_id: user_dependency):
     """
     Create a new quiz. Stores the JSON content (questions + options) in the quiz_details table.
     """
     try:
-        # Authorization token checker and userid extraction 
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="Invalid Authorization header format")
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="User ID not found in token")
-            )
-        
         quiz_data = jsonable_encoder(quiz)
 
         # Check if course is valid or not
-        if not check_course_validity(course_id=quiz_data['course_id']):
+        if not await check_course_validity(course_id=quiz_data['course_id']):
             return JSONResponse(
                 status_code = 404,
                 content = error_response(
@@ -89,10 +75,10 @@ def create_quiz(quiz: QuizCreateSchema, db: db_dependency, authorization: str =
         )
         try:
             db.add(new_quiz)
-            db.commit()
-            db.refresh(new_quiz)
+            await db.commit()
+            await db.refresh(new_quiz)
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -126,12 +112,12 @@ def create_quiz(quiz: QuizCreateSchema, db: db_dependency, authorization: str =
 
 # Endpoint to get quiz by ID
 @router.get("/get-quiz/{quiz_id}")
-def get_quiz(quiz_id: int, db: db_dependency):
+async def get_quiz(quiz_id: int, db: db_dependency):
     """
     Get the quiz details including questions and options stored in JSON.
     """
     try:
-        quiz = db.query(Quiz).filter(Quiz.quiz_id == quiz_id).first()
+        quiz = (await db.scalars(select(Quiz).filter(Quiz.quiz_id == quiz_id))).first()
         if not quiz:
             return JSONResponse(
                 status_code=404,
@@ -176,13 +162,13 @@ def get_quiz(quiz_id: int, db: db_dependency):
 
 # Endpoint to get all quizzes by course ID
 @router.get("/get-quiz-course/{course_id}")
-def get_quiz_by_course(course_id: int, db: db_dependency):
+async def get_quiz_by_course(course_id: int, db: db_dependency, cursor: str = None, limit: int = None):
     """
         Get quiz details by course ID
     """
     try:
         # Check if course is valid or not
-        if not check_course_validity(course_id=course_id):
+        if not await check_course_validity(course_id=course_id):
             return JSONResponse(
                 status_code = 404,
                 content = error_response(
@@ -190,7 +176,12 @@ def get_quiz_by_course(course_id: int, db: db_dependency):
                 )
             )
         
-        quiz_lst = db.query(Quiz).filter(Quiz.course_id == course_id).all()
+        try:
+            limit = page_size(limit)
+            stmt = QUIZZES.apply(select(Quiz).filter(Quiz.course_id == course_id), cursor, limit)
+        except InvalidPage as e:
+            return JSONResponse(status_code=400, content=error_response(message=str(e)))
+        quiz_lst, next_cursor = QUIZZES.page((await db.scalars(stmt)).all(), limit)
         if not quiz_lst:
             return JSONResponse(
                 status_code=404,
@@ -219,7 +210,8 @@ def get_quiz_by_course(course_id: int, db: db_dependency):
             status_code=200,
             content=success_response(
                 data=quiz_data, 
-                message="Course retrieved successfully"
+                message="Course retrieved successfully",
+                next_cursor=next_cursor
             )
         )
         
@@ -240,30 +232,15 @@ def get_quiz_by_course(course_id: int, db: db_dependency):
 
 # Endpoint for recording user submission
 @router.post("/submit-quiz")
-def record_submission(submission: SubmissionSchema, db: db_dependency, authorization: str = Header(...)):
+async def record_submission(submission: SubmissionSchema, db: db_dependency, user_id: user_dependency):
     """
         Record a user's submission, including the answers provided and the calculated score.
     """
     try:
-        # Authorization token checker and userid extraction 
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="Invalid Authorization header format")
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="User ID not found in token")
-            )
-        
         # payload processing
         submission_data = jsonable_encoder(submission)
         quiz_id = submission_data['quiz_id']
-        quiz = db.query(Quiz).filter(Quiz.quiz_id == quiz_id).first()
+        quiz = (await db.scalars(select(Quiz).filter(Quiz.quiz_id == quiz_id))).first()
         if not quiz:
             return JSONResponse(
                 status_code=404,
@@ -271,7 +248,7 @@ def record_submission(submission: SubmissionSchema, db: db_dependency, authoriza
             )
         
         # gRPC Enrollment checker
-        if not check_enrollment(user_id=user_id, course_id=quiz.course_id):
+        if not await check_enrollment(user_id=user_id, course_id=quiz.course_id):
             return JSONResponse(
                 status_code = 401,
                 content = error_response(
@@ -293,11 +270,11 @@ def record_submission(submission: SubmissionSchema, db: db_dependency, authoriza
         )
         try:
             db.add(new_submission)
-            db.commit()
-            db.refresh(new_submission)
+            await db.commit()
+            await db.refresh(new_submission)
 
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             detail_dict = {
                 "exception": e
             }
@@ -336,50 +313,39 @@ def record_submission(submission: SubmissionSchema, db: db_dependency, authoriza
 
 
 @router.get("/get-score")
-def get_scores(db: db_dependency, authorization: str = Header(...)):
+async def get_scores(db: db_dependency, user_id: user_dependency):
     """
         get scores and quiz attempt details of a user.
     """
     try:
-        # Authorization token checker and userid extraction 
-        if not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="Invalid Authorization header format")
-            )
-        token = authorization.split(" ")[1]
-        decoded_payload = token_decoder(token)[1]
-        user_id = decoded_payload.get("sub")
-        if not user_id:
-            return JSONResponse(
-                status_code=401,
-                content=error_response(message="User ID not found in token")
-            )
-        
-        results = db.query(
+        results = (await db.execute(select(
             Quiz.course_id,
             QuizXrefUser.quiz_id,
             Quiz.quiz_description,
             Quiz.max_score,
             QuizXrefUser.score,
             QuizXrefUser.date_attempted
-        ).join(Quiz, Quiz.quiz_id == QuizXrefUser.quiz_id).filter(QuizXrefUser.user_id==user_id).order_by(QuizXrefUser.date_attempted.desc()).all()
+        ).join(Quiz, Quiz.quiz_id == QuizXrefUser.quiz_id).filter(QuizXrefUser.user_id==user_id).order_by(QuizXrefUser.date_attempted.desc()))).all()
+
+        # One batched lookup for every distinct course. A course gone since the attempt keeps its
+        # scores with a null name, only an unreachable course service fails the request
+        course_ids = list({res.course_id for res in results})
+        course_names = await get_course_names(course_ids=course_ids) if course_ids else {}
+        if course_names is None:
+            return JSONResponse(
+                status_code = 503,
+                content = error_response(
+                    message = "Course service unavailable, try again shortly"
+                )
+            )
 
         course_map = {}
         for res in results:
             course_id = res.course_id
-            if not check_course_validity(course_id=course_id):
-                return JSONResponse(
-                    status_code = 404,
-                    content = error_response(
-                        message = "Course Not Found"
-                    )
-                )
-            course_name = get_course_name(course_id=course_id)
             if course_id not in course_map:
                 course_map[course_id] = {
                     'course_id': course_id,
-                    'course_name': course_name,
+                    'course_name': course_names.get(course_id),
                     'quiz_details': []
                 }
             course_map[course_id]['quiz_details'].append({
@@ -24,13 +24,21 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14\x63heck_services.proto\x12\x0e\x63ourses_topics\"7\n\x11\x45nrollmentRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x11\n\tcourse_id\x18\x02 \x01(\x05\")\n\x12\x45nrollmentResponse\x12\x13\n\x0bis_enrolled\x18\x01 \x01(\x08\"$\n\x0fValidityRequest\x12\x11\n\tcourse_id\x18\x01 \x01(\x05\"$\n\x10ValidityResponse\x12\x10\n\x08is_valid\x18\x01 \x01(\x08\"&\n\x11\x43ourseNameRequest\x12\x11\n\tcourse_id\x18\x01 \x01(\x05\")\n\x12\x43ourseNameResponse\x12\x13\n\x0b\x63ourse_name\x18\x01 \x01(\t2\x92\x02\n\rCourseService\x12X\n\x0f\x43heckEnrollment\x12!.courses_topics.EnrollmentRequest\x1a\".courses_topics.EnrollmentResponse\x12R\n\rCheckValidity\x12\x1f.courses_topics.ValidityRequest\x1a .courses_topics.ValidityResponse\x12S\n\nCourseName\x12!.courses_topics.CourseNameRequest\x1a\".courses_topics.CourseNameResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14\x63heck_services.proto\x12\x0e\x63ourses_topics\"7\n\x11\x45nrollmentRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x11\n\tcourse_id\x18\x02 \x01(\x05\")\n\x12\x45nrollmentResponse\x12\x13\n\x0bis_enrolled\x18\x01 \x01(\x08\"$\n\x0fValidityRequest\x12\x11\n\tcourse_id\x18\x01 \x01(\x05\"$\n\x10ValidityResponse\x12\x10\n\x08is_valid\x18\x01 \x01(\x08\"&\n\x11\x43ourseNameRequest\x12\x11\n\tcourse_id\x18\x01 \x01(\x05\")\n\x12\x43ourseNameResponse\x12\x13\n\x0b\x63ourse_name\x18\x01 \x01(\t\"9\n\x13\x43ourseAccessRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x11\n\tcourse_id\x18\x02 \x01(\x05\"R\n\x14\x43ourseAccessResponse\x12\x10\n\x08is_valid\x18\x01 \x01(\x08\x12\x13\n\x0bis_enrolled\x18\x02 \x01(\x08\x12\x13\n\x0b\x63ourse_name\x18\x03 \x01(\t\"=\n\x16\x45nrollmentBatchRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x12\n\ncourse_ids\x18\x02 \x03(\x05\"\x9a\x01\n\x17\x45nrollmentBatchResponse\x12L\n\x0bis_enrolled\x18\x01 \x03(\x0b\x32\x37.courses_topics.EnrollmentBatchResponse.IsEnrolledEntry\x1a\x31\n\x0fIsEnrolledEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\r\n\x05value\x18\x02 \x01(\x08:\x02\x38\x01\"*\n\x14ValidityBatchRequest\x12\x12\n\ncourse_ids\x18\x01 \x03(\x05\"\x8d\x01\n\x15ValidityBatchResponse\x12\x44\n\x08is_valid\x18\x01 \x03(\x0b\x32\x32.courses_topics.ValidityBatchResponse.IsValidEntry\x1a.\n\x0cIsValidEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\r\n\x05value\x18\x02 \x01(\x08:\x02\x38\x01\"(\n\x12\x43ourseNamesRequest\x12\x12\n\ncourse_ids\x18\x01 \x03(\x05\"\x95\x01\n\x13\x43ourseNamesResponse\x12J\n\x0c\x63ourse_names\x18\x01 \x03(\x0b\x32\x34.courses_topics.CourseNamesResponse.CourseNamesEntry\x1a\x32\n\x10\x43ourseNamesEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x1b\n\x19WatchCourseChangesRequest\"X\n\x0c\x43ourseChange\x12\x35\n\x0b\x63hange_type\x18\x01 \x01(\x0e\x32 .courses_topics.CourseChangeType\x12\x11\n\tcourse_id\x18\x02 \x01(\x05*\x85\x01\n\x10\x43ourseChangeType\x12\x1d\n\x19\x43OURSE_CHANGE_UNSPECIFIED\x10\x00\x12\x12\n\x0e\x43OURSE_CREATED\x10\x01\x12\x12\n\x0e\x43OURSE_UPDATED\x10\x02\x12\x12\n\x0e\x43OURSE_DELETED\x10\x03\x12\x16\n\x12\x45NROLLMENT_CHANGED\x10\x04\x32\xfb\x05\n\rCourseService\x12X\n\x0f\x43heckEnrollment\x12!.courses_topics.EnrollmentRequest\x1a\".courses_topics.EnrollmentResponse\x12R\n\rCheckValidity\x12\x1f.courses_topics.ValidityRequest\x1a .courses_topics.ValidityResponse\x12S\n\nCourseName\x12!.courses_topics.CourseNameRequest\x1a\".courses_topics.CourseNameResponse\x12\x62\n\x15\x41uthorizeCourseAccess\x12#.courses_topics.CourseAccessRequest\x1a$.courses_topics.CourseAccessResponse\x12g\n\x14\x43heckEnrollmentBatch\x12&.courses_topics.EnrollmentBatchRequest\x1a\'.courses_topics.EnrollmentBatchResponse\x12\x61\n\x12\x43heckValidityBatch\x12$.courses_topics.ValidityBatchRequest\x1a%.courses_topics.ValidityBatchResponse\x12V\n\x0b\x43ourseNames\x12\".courses_topics.CourseNamesRequest\x1a#.courses_topics.CourseNamesResponse\x12_\n\x12WatchCourseChanges\x12).courses_topics.WatchCourseChangesRequest\x1a\x1c.courses_topics.CourseChange0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'check_services_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_ENROLLMENTBATCHRESPONSE_ISENROLLEDENTRY']._loaded_options = None
+  _globals['_ENROLLMENTBATCHRESPONSE_ISENROLLEDENTRY']._serialized_options = b'8\001'
+  _globals['_VALIDITYBATCHRESPONSE_ISVALIDENTRY']._loaded_options = None
+  _globals['_VALIDITYBATCHRESPONSE_ISVALIDENTRY']._serialized_options = b'8\001'
+  _globals['_COURSENAMESRESPONSE_COURSENAMESENTRY']._loaded_options = None
+  _globals['_COURSENAMESRESPONSE_COURSENAMESENTRY']._serialized_options = b'8\001'
+  _globals['_COURSECHANGETYPE']._serialized_start=1164
+  _globals['_COURSECHANGETYPE']._serialized_end=1297
   _globals['_ENROLLMENTREQUEST']._serialized_start=40
   _globals['_ENROLLMENTREQUEST']._serialized_end=95
   _globals['_ENROLLMENTRESPONSE']._serialized_start=97
@@ -43,6 +51,32 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_COURSENAMEREQUEST']._serialized_end=254
   _globals['_COURSENAMERESPONSE']._serialized_start=256
   _globals['_COURSENAMERESPONSE']._serialized_end=297
-  _globals['_COURSESERVICE']._serialized_start=300
-  _globals['_COURSESERVICE']._serialized_end=574
+  _globals['_COURSEACCESSREQUEST']._serialized_start=299
+  _globals['_COURSEACCESSREQUEST']._serialized_end=356
+  _globals['_COURSEACCESSRESPONSE']._serialized_start=358
+  _globals['_COURSEACCESSRESPONSE']._serialized_end=440
+  _globals['_ENROLLMENTBATCHREQUEST']._serialized_start=442
+  _globals['_ENROLLMENTBATCHREQUEST']._serialized_end=503
+  _globals['_ENROLLMENTBATCHRESPONSE']._serialized_start=506
+  _globals['_ENROLLMENTBATCHRESPONSE']._serialized_end=660
+  _globals['_ENROLLMENTBATCHRESPONSE_ISENROLLEDENTRY']._serialized_start=611
+  _globals['_ENROLLMENTBATCHRESPONSE_ISENROLLEDENTRY']._serialized_end=660
+  _globals['_VALIDITYBATCHREQUEST']._serialized_start=662
+  _globals['_VALIDITYBATCHREQUEST']._serialized_end=704
+  _globals['_VALIDITYBATCHRESPONSE']._serialized_start=707
+  _globals['_VALIDITYBATCHRESPONSE']._serialized_end=848
+  _globals['_VALIDITYBATCHRESPONSE_ISVALIDENTRY']._serialized_start=802
+  _globals['_VALIDITYBATCHRESPONSE_ISVALIDENTRY']._serialized_end=848
+  _globals['_COURSENAMESREQUEST']._serialized_start=850
+  _globals['_COURSENAMESREQUEST']._serialized_end=890
+  _globals['_COURSENAMESRESPONSE']._serialized_start=893
+  _globals['_COURSENAMESRESPONSE']._serialized_end=1042
+  _globals['_COURSENAMESRESPONSE_COURSENAMESENTRY']._serialized_start=992
+  _globals['_COURSENAMESRESPONSE_COURSENAMESENTRY']._serialized_end=1042
+  _globals['_WATCHCOURSECHANGESREQUEST']._serialized_start=1044
+  _globals['_WATCHCOURSECHANGESREQUEST']._serialized_end=1071
+  _globals['_COURSECHANGE']._serialized_start=1073
+  _globals['_COURSECHANGE']._serialized_end=1161
+  _globals['_COURSESERVICE']._serialized_start=1300
+  _globals['_COURSESERVICE']._serialized_end=2063
 # @@protoc_insertion_point(module_scope)
@@ -1,17 +1,155 @@
+import os
+import itertools
+import threading
 import grpc
-from quiz_service.check_services_pb2 import EnrollmentRequest, ValidityRequest, CourseNameRequest
+from quiz_service.check_services_pb2 import EnrollmentRequest, ValidityRequest, CourseNameRequest, CourseAccessRequest, CourseAccessResponse, \
+    EnrollmentBatchRequest, ValidityBatchRequest, CourseNamesRequest, WatchCourseChangesRequest
 from quiz_service.check_services_pb2_grpc import CourseServiceStub
+from common.ttl_cache import TTLCache, MISSING
+
+GRPC_SERVER = os.getenv("GRPC_SERVER", "localhost:50051")
+GRPC_CHANNEL_POOL_SIZE = int(os.getenv("GRPC_CHANNEL_POOL_SIZE", "4"))
+GRPC_KEEPALIVE_TIME_MS = int(os.getenv("GRPC_KEEPALIVE_TIME_MS", "30000"))
+GRPC_KEEPALIVE_TIMEOUT_MS = int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "10000"))
+GRPC_CACHE_MAXSIZE = int(os.getenv("GRPC_CACHE_MAXSIZE", "50000"))
+GRPC_CACHE_TTL_SECONDS = float(os.getenv("GRPC_CACHE_TTL_SECONDS", "300"))
+# Negative answers expire sooner in case a change event is missed
+GRPC_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("GRPC_CACHE_NEGATIVE_TTL_SECONDS", "30"))
+
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", GRPC_KEEPALIVE_TIME_MS),
+    ("grpc.keepalive_timeout_ms", GRPC_KEEPALIVE_TIMEOUT_MS),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    # Give every channel its own subchannel so the pool maps to distinct HTTP/2 connections
+    ("grpc.use_local_subchannel_pool", 1),
+]
+
+
+class ChannelManager:
+    """Process-wide pool of long-lived gRPC channels to the CourseService."""
+
+    def __init__(self, server_address=GRPC_SERVER, pool_size=GRPC_CHANNEL_POOL_SIZE):
+        self.server_address = server_address
+        self.pool_size = max(1, pool_size)
+        self._channels = []
+        self._cycle = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        self._channels = [
+            grpc.insecure_channel(self.server_address, options=CHANNEL_OPTIONS)
+            for _ in range(self.pool_size)
+        ]
+        self._cycle = itertools.cycle([CourseServiceStub(channel) for channel in self._channels])
+
+    def start(self):
+        """Open the channel pool. Safe to call more than once."""
+        with self._lock:
+            if self._cycle is None:
+                self._open()
+
+    def stop(self):
+        """Close every pooled channel."""
+        with self._lock:
+            for channel in self._channels:
+                channel.close()
+            self._channels = []
+            self._cycle = None
+
+    def stub(self) -> CourseServiceStub:
+        """Return the next stub in round-robin order, opening the pool lazily."""
+        with self._lock:
+            if self._cycle is None:
+                self._open()
+            return next(self._cycle)
+
+
+channel_manager = ChannelManager()
+
+# Course lookups tagged by course_id so a change event evicts all of them at once
+course_cache = TTLCache(maxsize=GRPC_CACHE_MAXSIZE, ttl=GRPC_CACHE_TTL_SECONDS)
+
+
+def generation(course_id: int) -> tuple:
+    # Read before the RPC, an answer started before a change event must not outlive it
+    return course_cache.generation((course_id,))
+
+
+def remember(key, course_id: int, seen: tuple, value, is_positive: bool = True):
+    """Cache an RPC answer, unless the course changed since seen was read with generation()."""
+    ttl = GRPC_CACHE_TTL_SECONDS if is_positive else GRPC_CACHE_NEGATIVE_TTL_SECONDS
+    course_cache.set(key, value, ttl=ttl, tags=(course_id,), generation=seen)
+    return value
+
+
+class CourseChangeWatcher:
+    """
+        Follows the CourseService WatchCourseChanges stream on a background thread
+        and evicts cached lookups for every course that changes. While the stream
+        is down events may be missed, so the whole cache is dropped on reconnect.
+    """
+
+    def __init__(self, manager: ChannelManager = channel_manager, retry_interval: float = 2.0):
+        self.manager = manager
+        self.retry_interval = retry_interval
+        self._stop = threading.Event()
+        self._call = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="course-change-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._call is not None:
+            self._call.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=self.retry_interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._call = self.manager.stub().WatchCourseChanges(WatchCourseChangesRequest())
+                course_cache.clear()
+                for change in self._call:
+                    course_cache.evict_tag(change.course_id)
+            except grpc.RpcError as e:
+                if self._stop.is_set():
+                    break
+                print(f"gRPC Error: {e.code()} - {e.details()}")
+            course_cache.clear()
+            self._stop.wait(self.retry_interval)
+
+
+course_watcher = CourseChangeWatcher()
+
+
+def cached_batch(keys: list):
+    """Split batch keys into cached values by course_id and the course_ids still to fetch."""
+    result, missing = {}, []
+    for key in keys:
+        cached = course_cache.get(key)
+        if cached is MISSING:
+            missing.append(key[-1])
+        else:
+            result[key[-1]] = cached
+    return result, missing
+
 
 class CourseClient:
     """gRPC client for the CourseService to check user enrollment and course validity."""
 
-    def __init__(self, server_address="localhost:50051"):
+    def __init__(self, manager: ChannelManager = channel_manager):
         """
-        Initialize the gRPC client.
-        :param server_address: Address of the CourseService server (e.g., localhost:50051).
+        Initialize the gRPC client on a pooled channel.
+        :param manager: ChannelManager holding the long-lived channels to the CourseService.
         """
-        self.channel = grpc.insecure_channel(server_address)
-        self.stub = CourseServiceStub(self.channel)
+        self.stub = manager.stub()
 
     def check_enrollment(self, user_id: str, course_id: int) -> bool:
         """
@@ -20,10 +158,15 @@ class CourseClient:
             :param course_id: The course ID to check.
             :return: True if the user is enrolled, False otherwise.
         """
+        key = ("enrolled", user_id, course_id)
+        cached = course_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        seen = generation(course_id)
         try:
             request = EnrollmentRequest(user_id=user_id, course_id=course_id)
             response = self.stub.CheckEnrollment(request)
-            return response.is_enrolled
+            return remember(key, course_id, seen, response.is_enrolled, response.is_enrolled)
         except grpc.RpcError as e:
             print(f"gRPC Error: {e.code()} - {e.details()}")
             return False
@@ -35,10 +178,15 @@ class CourseClient:
             :param course_id: The course ID to check.
             :return: True if the course is valid, False otherwise.
         """
+        key = ("valid", course_id)
+        cached = course_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        seen = generation(course_id)
         try:
             request = ValidityRequest(course_id=course_id)
             response = self.stub.CheckValidity(request)
-            return response.is_valid
+            return remember(key, course_id, seen, response.is_valid, response.is_valid)
         except grpc.RpcError as e:
             print(f"gRPC Error: {e.code()} - {e.details()}")
             return False
@@ -50,10 +198,101 @@ class CourseClient:
             :param course_id: The course ID to check.
             :return: course_name
         """
+        key = ("name", course_id)
+        cached = course_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        seen = generation(course_id)
         try:
             request = CourseNameRequest(course_id=course_id)
             response = self.stub.CourseName(request)
-            return response.course_name
+            return remember(key, course_id, seen, response.course_name, bool(response.course_name))
         except grpc.RpcError as e:
             print(f"gRPC Error: {e.code()} - {e.details()}")
             return False
+
+
+    def authorize_access(self, user_id: str, course_id: int) -> CourseAccessResponse:
+        """
+            Check course validity, user enrollment and get the course name in one round-trip.
+            :param user_id: The user ID to check.
+            :param course_id: The course ID to check.
+            :return: CourseAccessResponse with is_valid, is_enrolled and course_name.
+        """
+        key = ("access", user_id, course_id)
+        cached = course_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        seen = generation(course_id)
+        try:
+            request = CourseAccessRequest(user_id=user_id, course_id=course_id)
+            response = self.stub.AuthorizeCourseAccess(request)
+            return remember(key, course_id, seen, response, response.is_valid and response.is_enrolled)
+        except grpc.RpcError as e:
+            print(f"gRPC Error: {e.code()} - {e.details()}")
+            return CourseAccessResponse(is_valid=False, is_enrolled=False)
+
+
+    def check_enrollment_batch(self, user_id: str, course_ids: list) -> dict:
+        """
+            Check if a user is enrolled in each of many courses.
+            :param user_id: The user ID to check.
+            :param course_ids: The course IDs to check.
+            :return: dict of course_id -> True if enrolled, empty dict on error.
+        """
+        result, missing = cached_batch([("enrolled", user_id, course_id) for course_id in course_ids])
+        if not missing:
+            return result
+        seen = {course_id: generation(course_id) for course_id in missing}
+        try:
+            request = EnrollmentBatchRequest(user_id=user_id, course_ids=missing)
+            response = self.stub.CheckEnrollmentBatch(request)
+            for course_id, is_enrolled in response.is_enrolled.items():
+                result[course_id] = remember(("enrolled", user_id, course_id), course_id, seen[course_id], is_enrolled, is_enrolled)
+            return result
+        except grpc.RpcError as e:
+            print(f"gRPC Error: {e.code()} - {e.details()}")
+            return {}
+
+
+    def check_validity_batch(self, course_ids: list) -> dict:
+        """
+            Check if each of many courses is valid.
+            :param course_ids: The course IDs to check.
+            :return: dict of course_id -> True if valid, empty dict on error.
+        """
+        result, missing = cached_batch([("valid", course_id) for course_id in course_ids])
+        if not missing:
+            return result
+        seen = {course_id: generation(course_id) for course_id in missing}
+        try:
+            request = ValidityBatchRequest(course_ids=missing)
+            response = self.stub.CheckValidityBatch(request)
+            for course_id, is_valid in response.is_valid.items():
+                result[course_id] = remember(("valid", course_id), course_id, seen[course_id], is_valid, is_valid)
+            return result
+        except grpc.RpcError as e:
+            print(f"gRPC Error: {e.code()} - {e.details()}")
+            return {}
+
+
+    def get_course_names(self, course_ids: list) -> dict:
+        """
+            Get Course Names for many courses.
+            :param course_ids: The course IDs to look up.
+            :return: dict of course_id -> course_name, missing courses are left out. None on error.
+        """
+        result, missing = cached_batch([("name", course_id) for course_id in course_ids])
+        if not missing:
+            return {course_id: name for course_id, name in result.items() if name}
+        seen = {course_id: generation(course_id) for course_id in missing}
+        try:
+            request = CourseNamesRequest(course_ids=missing)
+            response = self.stub.CourseNames(request)
+            for course_id in missing:
+                course_name = response.course_names.get(course_id, "")
+                result[course_id] = remember(("name", course_id), course_id, seen[course_id], course_name, bool(course_name))
+            return {course_id: name for course_id, name in result.items() if name}
+        except grpc.RpcError as e:
+            print(f"gRPC Error: {e.code()} - {e.details()}")
+            return None
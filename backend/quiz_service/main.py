@@ -1,11 +1,28 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
+from common.auth import register_auth_error_handler
+from common.migrations import upgrade_database
 from quiz_service.api import router
 from quiz_service.database import engine
-from quiz_service.grpc_client import CourseClient
-from quiz_service import models
+from quiz_service.grpc_client import channel_manager, course_watcher
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep the CourseService channels open for the lifetime of the worker
+    channel_manager.start()
+    # Evict cached course lookups as soon as the CourseService reports a change
+    course_watcher.start()
+    yield
+    course_watcher.stop()
+    channel_manager.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+register_auth_error_handler(app)
 
 origins = [
     "http://localhost:3000",
@@ -20,9 +37,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-models.Base.metadata.create_all(bind=engine)
+# Schema comes from the migrations, replicas starting together apply them once
+upgrade_database(engine, os.path.dirname(__file__))
 
 app.include_router(router)
 
-
-
+# Prometheus scrape endpoint, includes the database pool metrics
+app.mount("/metrics", make_asgi_app())
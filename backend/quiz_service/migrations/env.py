@@ -0,0 +1,4 @@
+from common.migrations import run_env
+from quiz_service import models
+
+run_env(models.Base.metadata)
@@ -0,0 +1,51 @@
+"""Schema as create_all built it before migrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSON
+from common.migrations import missing_tables
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TABLES = ("quizzes", "quiz_xref_user")
+
+
+def upgrade():
+    missing = missing_tables(*TABLES)
+
+    if "quizzes" in missing:
+        op.create_table(
+            "quizzes",
+            sa.Column("quiz_id", sa.Integer, primary_key=True, autoincrement=True, unique=True),
+            sa.Column("quiz_description", sa.String, nullable=True),
+            sa.Column("quiz_content", JSON, nullable=False),
+            sa.Column("max_score", sa.Float, nullable=False),
+            sa.Column("course_id", sa.Integer, nullable=False),
+            sa.Column("quiz_created_by", sa.String, nullable=False),
+            sa.Column("quiz_created_timestamp", sa.DateTime, nullable=False),
+        )
+        op.create_index("ix_quizzes_quiz_created_by", "quizzes", ["quiz_created_by"])
+        op.create_index("ix_quizzes_quiz_created_timestamp", "quizzes", ["quiz_created_timestamp"])
+
+    if "quiz_xref_user" in missing:
+        op.create_table(
+            "quiz_xref_user",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True, unique=True),
+            sa.Column("quiz_id", sa.Integer, sa.ForeignKey("quizzes.quiz_id"), nullable=False),
+            sa.Column("user_id", sa.String, nullable=False),
+            sa.Column("score", sa.Float, nullable=False),
+            sa.Column("date_attempted", sa.DateTime, nullable=False),
+        )
+        op.create_index("ix_quiz_xref_user_date_attempted", "quiz_xref_user", ["date_attempted"])
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_table(table)
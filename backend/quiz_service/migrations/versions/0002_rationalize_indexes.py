@@ -0,0 +1,45 @@
+"""Drop indexes no query uses, add composites for the real lookups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Creators and timestamps were indexed though nothing filters on them, while quizzes by
+course and a user's attempts had no index at all.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Single column indexes from 0001
+DROPPED = {
+    "quizzes": ("quiz_created_by", "quiz_created_timestamp"),
+    "quiz_xref_user": ("date_attempted",),
+}
+
+# name, table, columns
+ADDED = (
+    # GET /get-quiz-course keyset
+    ("ix_quizzes_course_id_quiz_id", "quizzes", ["course_id", "quiz_id"]),
+    # GET /get-score, a user's attempts newest first
+    ("ix_quiz_xref_user_user_id_date_attempted", "quiz_xref_user", ["user_id", "date_attempted"]),
+)
+
+
+def upgrade():
+    for table, columns in DROPPED.items():
+        for column in columns:
+            op.drop_index(f"ix_{table}_{column}", table_name=table, if_exists=True)
+    for name, table, columns in ADDED:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(ADDED):
+        op.drop_index(name, table_name=table, if_exists=True)
+    for table, columns in DROPPED.items():
+        for column in columns:
+            op.create_index(f"ix_{table}_{column}", table, [column], if_not_exists=True)
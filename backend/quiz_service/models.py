@@ -1,21 +1,27 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime
+from sqlalchemy import Column, Index, Integer, String, ForeignKey, Float, DateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSON
 from quiz_service.database import Base
 
+# Schema changes go through the migrations in quiz_service/migrations
+
 
 # Quiz Table Model
 class Quiz(Base):
     __tablename__ = 'quizzes'  # Fixed the table name to match the ForeignKey references
+    __table_args__ = (
+        # GET /get-quiz-course keyset
+        Index('ix_quizzes_course_id_quiz_id', 'course_id', 'quiz_id'),
+    )
 
-    quiz_id = Column(Integer, primary_key=True, autoincrement=True, unique=True)
+    quiz_id = Column(Integer, primary_key=True, autoincrement=True)
     quiz_description = Column(String, nullable=True)
     quiz_content = Column(JSON, nullable=False)
     max_score = Column(Float, nullable=False)
     course_id = Column(Integer, nullable=False)
-    quiz_created_by = Column(String, nullable=False, index=True)
-    quiz_created_timestamp = Column(DateTime, default=func.now(), nullable=False, index=True)
+    quiz_created_by = Column(String, nullable=False)
+    quiz_created_timestamp = Column(DateTime, default=func.now(), nullable=False)
 
     # Relationships (if needed)
     users = relationship('QuizXrefUser', back_populates='quiz')
@@ -24,12 +30,16 @@ class Quiz(Base):
 # Cross Reference Table Between Quiz and User (Quiz_XREF_USER)
 class QuizXrefUser(Base):
     __tablename__ = 'quiz_xref_user'
+    __table_args__ = (
+        # GET /get-score, a user's attempts newest first
+        Index('ix_quiz_xref_user_user_id_date_attempted', 'user_id', 'date_attempted'),
+    )
 
-    id = Column(Integer, primary_key=True, autoincrement=True, unique=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     quiz_id = Column(Integer, ForeignKey('quizzes.quiz_id'), nullable=False)
     user_id = Column(String, nullable=False)
     score = Column(Float, nullable=False)
-    date_attempted = Column(DateTime, default=func.now(), nullable=False, index=True)
+    date_attempted = Column(DateTime, default=func.now(), nullable=False)
 
     # Relationships (if needed)
     quiz = relationship('Quiz', back_populates='users')
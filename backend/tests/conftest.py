@@ -0,0 +1,41 @@
+import os
+import tempfile
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+# Read when the service modules are imported, so set before any test imports them.
+# Tests never touch real content storage or share response caches
+os.environ["STORAGE_BACKEND"] = "filesystem"
+os.environ["STORAGE_FALLBACK_BACKEND"] = ""
+os.environ["STORAGE_FS_ROOT"] = tempfile.mkdtemp(prefix="expanse-storage-")
+os.environ["CONTENT_CACHE_DIR"] = tempfile.mkdtemp(prefix="expanse-content-cache-")
+os.environ["RESPONSE_CACHE_BACKEND"] = "off"
+
+
+@pytest.fixture(scope="session")
+def postgres_url():
+    """
+        POSTGRES_URL of a database the tests may migrate and write to. Tests using it
+        are skipped when it is not set or Postgres cannot be reached.
+    """
+    url = os.getenv("POSTGRES_URL")
+    if not url:
+        pytest.skip("POSTGRES_URL is not set")
+    engine = create_engine(url, poolclass=NullPool)
+    try:
+        with engine.connect():
+            pass
+    except Exception as e:
+        pytest.skip(f"Postgres is not reachable: {e}")
+    finally:
+        engine.dispose()
+    return url
+
+
+@pytest.fixture
+def anyio_backend():
+    """
+        Async tests run on asyncio only, the services and their drivers don't support trio.
+    """
+    return "asyncio"
@@ -0,0 +1,59 @@
+import time
+from types import SimpleNamespace
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from common import auth
+
+CLIENT_ID = "frontend-client.apps.googleusercontent.com"
+KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _token(**claims) -> str:
+    claims = {"iss": "https://accounts.google.com", "sub": "user-1", "aud": CLIENT_ID, "exp": int(time.time()) + 600, **claims}
+    return jwt.encode(claims, KEY, algorithm="RS256")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """A client for an app with one authenticated route, keys served without any network."""
+    monkeypatch.setattr(auth.jwks_client, "get_signing_key_from_jwt", lambda token: SimpleNamespace(key=KEY.public_key()))
+    monkeypatch.setattr(auth, "claims_cache", auth.TTLCache(maxsize=100))
+    monkeypatch.setattr(auth, "JWT_AUDIENCE", CLIENT_ID)
+    app = FastAPI()
+    auth.register_auth_error_handler(app)
+
+    @app.get("/me")
+    async def me(user_id: auth.user_dependency):
+        return {"user_id": user_id}
+
+    return TestClient(app)
+
+
+def _get(client, token):
+    return client.get("/me", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_token_for_our_client_is_accepted(client):
+    token = _token()
+    assert _get(client, token).json() == {"user_id": "user-1"}
+    # Answered from the claims cache the second time
+    assert _get(client, token).json() == {"user_id": "user-1"}
+
+
+def test_token_for_another_client_is_refused(client):
+    assert _get(client, _token(aud="someone-elses-app.apps.googleusercontent.com")).status_code == 401
+    claims = jwt.decode(_token(), options={"verify_signature": False})
+    del claims["aud"]
+    assert _get(client, jwt.encode(claims, KEY, algorithm="RS256")).status_code == 401
+
+
+def test_every_token_is_refused_without_an_audience(client, monkeypatch):
+    monkeypatch.setattr(auth, "JWT_AUDIENCE", None)
+    assert _get(client, _token()).status_code == 503
+
+
+def test_expired_token_is_refused(client):
+    assert _get(client, _token(exp=int(time.time()) - 3600)).json()["message"] == "Token has expired"
@@ -0,0 +1,89 @@
+import io
+import os
+import asyncio
+import pytest
+from starlette.datastructures import Headers, UploadFile
+from courses_topics import storage
+from courses_topics.content_cache import ContentCache, CachedFile, FillingFile
+
+pytestmark = pytest.mark.anyio
+
+
+async def _stored(data: bytes):
+    upload = UploadFile(io.BytesIO(data), filename="slides.pdf", headers=Headers({"content-type": "application/pdf"}))
+    return await storage.save_upload(upload, {})
+
+
+async def _read_all(stream) -> bytes:
+    return b"".join([chunk async for chunk in storage.iter_download(stream)])
+
+
+async def _cache(cache: ContentCache, stored):
+    filling = await cache.fetch(stored.sha256, stored.file_id)
+    filling.close()
+    await filling._fill.task
+
+
+async def test_miss_streams_while_the_cache_fills(tmp_path, monkeypatch):
+    data = os.urandom(3 * storage.STORAGE_CHUNK_SIZE + 5)
+    stored = await _stored(data)
+    release = asyncio.Event()
+    iter_download = storage.iter_download
+
+    async def slow_download(stream):
+        # Hands over the first chunk, then holds the rest back until the test lets it through
+        sent = 0
+        async for chunk in iter_download(stream):
+            if sent and not release.is_set():
+                await release.wait()
+            sent += len(chunk)
+            yield chunk
+
+    monkeypatch.setattr(storage, "iter_download", slow_download)
+    cache = ContentCache(str(tmp_path), 10 * len(data), len(data))
+    first = await cache.fetch(stored.sha256, stored.file_id)
+    joined = await cache.fetch(stored.sha256, stored.file_id)
+    try:
+        assert isinstance(first, FillingFile) and isinstance(joined, FillingFile)
+        assert first.length == len(data)
+        assert await first.read(10) == data[:10]
+        release.set()
+        assert data[10:] == b"".join([chunk async for chunk in iter_download(first)])
+        joined.seek(len(data) - 3)
+        assert await joined.read() == data[-3:]
+    finally:
+        first.close()
+        joined.close()
+    await first._fill.task
+
+    cached = await cache.fetch(stored.sha256, stored.file_id)
+    assert isinstance(cached, CachedFile)
+    cached.close()
+    assert not cache._pins and not cache._fills
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".part")] == []
+
+
+async def test_eviction_waits_for_the_files_being_read(tmp_path):
+    first_data, second_data = os.urandom(1000), os.urandom(1000)
+    first, second = await _stored(first_data), await _stored(second_data)
+    cache = ContentCache(str(tmp_path), 1500, 1000)
+    await _cache(cache, first)
+
+    reading = await cache.fetch(first.sha256, first.file_id)
+    assert isinstance(reading, CachedFile)
+    await _cache(cache, second)
+    # Evicted from the index, still on disk for the response sending it
+    assert first.sha256 not in cache._entries
+    assert os.path.exists(reading.path)
+    assert await _read_all(reading) == first_data
+    reading.close()
+    assert not os.path.exists(reading.path)
+    assert cache._bytes == 1000 and not cache._pins and not cache._evicted_pinned
+
+
+async def test_large_and_missing_files_bypass_the_cache(tmp_path):
+    stored = await _stored(os.urandom(2000))
+    cache = ContentCache(str(tmp_path), 10000, 1000)
+    assert await cache.fetch(stored.sha256, stored.file_id) is None
+    assert await cache.fetch("0" * 64, "0" * 24) is None
+    assert os.listdir(tmp_path) == [] and not cache._fills
@@ -0,0 +1,45 @@
+import uuid
+import pytest
+from sqlalchemy import delete, insert, update
+
+
+@pytest.fixture
+def courses(postgres_url):
+    """A live and a soft deleted course on a migrated database, with the same user enrolled in both."""
+    from common.migrations import upgrade_database
+    from courses_topics import models
+    from courses_topics.database import engine
+
+    upgrade_database(engine, "courses_topics")
+    with engine.begin() as conn:
+        course_ids = [
+            conn.execute(insert(models.Courses).values(
+                course_code=f"GS-{uuid.uuid4().hex[:12]}", course_name="gRPC lookups", course_description="Test course",
+                course_created_by="tests", course_updated_by="tests"
+            ).returning(models.Courses.course_id)).scalar() for _ in range(2)
+        ]
+        conn.execute(insert(models.UserXrefCourse), [{"user_id": "user-1", "course_id": course_id} for course_id in course_ids])
+        conn.execute(update(models.Courses).where(models.Courses.course_id == course_ids[1]).values(course_is_deleted=True))
+    try:
+        yield course_ids
+    finally:
+        with engine.begin() as conn:
+            conn.execute(delete(models.UserXrefCourse).where(models.UserXrefCourse.course_id.in_(course_ids)))
+            conn.execute(delete(models.Courses).where(models.Courses.course_id.in_(course_ids)))
+
+
+def test_deleted_courses_are_gone_for_every_lookup(courses):
+    from courses_topics import grpc_server
+    from courses_topics.database import SessionLocal
+
+    live, deleted = courses
+    db = SessionLocal()
+    try:
+        assert db.execute(grpc_server.enrollment_stmt("user-1", live)).first() is not None
+        assert db.execute(grpc_server.enrollment_stmt("user-1", deleted)).first() is None
+        assert set(db.scalars(grpc_server.enrollment_batch_stmt("user-1", {live, deleted})).all()) == {live}
+        assert set(db.scalars(grpc_server.validity_batch_stmt({live, deleted})).all()) == {live}
+        assert [row.course_id for row in db.execute(grpc_server.course_names_stmt({live, deleted}))] == [live]
+        assert db.execute(grpc_server.course_access_stmt("user-1", deleted)).first() is None
+    finally:
+        db.close()
@@ -0,0 +1,138 @@
+import uuid
+import importlib
+import pytest
+from contextlib import contextmanager
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, MetaData, String, Table, create_engine, text
+from sqlalchemy.pool import NullPool
+
+# courses_topics tables as create_all made them before migrations, down to the index per column
+PRE_SERIES = MetaData()
+
+Table(
+    "courses", PRE_SERIES,
+    Column("course_id", Integer, primary_key=True, index=True),
+    Column("course_code", String, nullable=False, unique=True),
+    Column("course_name", String, nullable=False, index=True),
+    Column("course_description", String, nullable=False, index=True),
+    Column("course_created_by", String, nullable=False, index=True),
+    Column("course_created_timestamp", DateTime, nullable=False, index=True),
+    Column("course_updated_by", String, nullable=False, index=True),
+    Column("course_updated_timestamp", DateTime, nullable=False, index=True),
+)
+
+Table(
+    "topics", PRE_SERIES,
+    Column("topic_id", Integer, primary_key=True, index=True),
+    Column("topic_name", String, nullable=False, index=True),
+    Column("topic_description", String, nullable=False, index=True),
+    Column("course_id", Integer, ForeignKey("courses.course_id")),
+    Column("topic_is_released", Boolean, nullable=False, index=True),
+    Column("topic_created_by", String, nullable=False, index=True),
+    Column("topic_created_timestamp", DateTime, nullable=False, index=True),
+    Column("topic_updated_by", String, nullable=False, index=True),
+    Column("topic_updated_timestamp", DateTime, nullable=False, index=True),
+)
+
+Table(
+    "topics_xref_contents", PRE_SERIES,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("course_id", Integer, ForeignKey("courses.course_id")),
+    Column("topic_id", Integer, ForeignKey("topics.topic_id")),
+    Column("content_id", String, nullable=False, index=True),
+    Column("content_created_by", String, nullable=False, index=True),
+    Column("content_created_timestamp", DateTime, nullable=False, index=True),
+    Column("content_updated_by", String, nullable=False, index=True),
+    Column("content_updated_timestamp", DateTime, nullable=False, index=True),
+)
+
+Table(
+    "user_xref_course", PRE_SERIES,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", String, nullable=False, index=True),
+    Column("course_id", Integer, ForeignKey("courses.course_id")),
+    Column("enrollment_date", DateTime, nullable=False, index=True),
+)
+
+
+@contextmanager
+def _scratch_engine(postgres_url, prefix: str):
+    """An engine on a new empty schema, dropped afterwards."""
+    schema = f"{prefix}_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(postgres_url, poolclass=NullPool)
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(postgres_url, poolclass=NullPool, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
+
+
+def _model_drift(engine, metadata) -> list:
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+    with engine.connect() as conn:
+        return compare_metadata(MigrationContext.configure(conn, opts={"compare_type": True}), metadata)
+
+
+@pytest.fixture
+def pre_series_engine(postgres_url):
+    """An engine on a scratch schema holding the pre-series tables with a row in each, dropped afterwards."""
+    with _scratch_engine(postgres_url, "pre_series") as engine:
+        PRE_SERIES.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO courses (course_code, course_name, course_description, course_created_by, "
+                "course_created_timestamp, course_updated_by, course_updated_timestamp) "
+                "VALUES ('PRE101', 'Course', 'Description', 'tests', now(), 'tests', now())"
+            ))
+            conn.execute(text(
+                "INSERT INTO topics (topic_name, topic_description, course_id, topic_is_released, topic_created_by, "
+                "topic_created_timestamp, topic_updated_by, topic_updated_timestamp) "
+                "VALUES ('Topic', 'Description', 1, true, 'tests', now(), 'tests', now())"
+            ))
+            conn.execute(text(
+                "INSERT INTO topics_xref_contents (course_id, topic_id, content_id, content_created_by, "
+                "content_created_timestamp, content_updated_by, content_updated_timestamp) "
+                "VALUES (1, 1, 'file-1', 'tests', now(), 'tests', now())"
+            ))
+            # Nothing kept a user from being enrolled twice before the unique index
+            conn.execute(text(
+                "INSERT INTO user_xref_course (user_id, course_id, enrollment_date) "
+                "VALUES ('user-1', 1, now()), ('user-1', 1, now())"
+            ))
+        yield engine
+
+
+@pytest.mark.parametrize("service", ["courses_topics", "discussion_forum", "quiz_service"])
+def test_migrations_build_the_models(postgres_url, service):
+    """
+        Services migrate on startup and never create_all, so a model change without the
+        migration for it breaks every deployed database. This catches it before it ships.
+    """
+    from common.migrations import upgrade_database
+    models = importlib.import_module(f"{service}.models")
+
+    with _scratch_engine(postgres_url, service) as engine:
+        upgrade_database(engine, service)
+        assert _model_drift(engine, models.Base.metadata) == []
+
+
+def test_pre_series_database_upgrades_to_the_models(pre_series_engine):
+    from common.migrations import upgrade_database
+    from courses_topics import models
+
+    upgrade_database(pre_series_engine, "courses_topics")
+    assert _model_drift(pre_series_engine, models.Base.metadata) == []
+
+    with pre_series_engine.connect() as conn:
+        assert conn.execute(text("SELECT course_is_deleted FROM courses")).scalar() is False
+        assert conn.execute(text("SELECT topic_is_deleted FROM topics")).scalar() is False
+        assert conn.execute(text("SELECT content_blob, content_name FROM topics_xref_contents")).one() == (None, None)
+        assert conn.execute(text("SELECT count(*) FROM user_xref_course")).scalar() == 1
+
+    # Running again finds nothing to do
+    upgrade_database(pre_series_engine, "courses_topics")
@@ -0,0 +1,114 @@
+import io
+import os
+import hashlib
+import pytest
+from starlette.datastructures import Headers, UploadFile
+from courses_topics import storage
+
+pytestmark = pytest.mark.anyio
+
+
+def _upload(data: bytes, filename: str = "notes week 1.pdf", content_type: str = "application/pdf") -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename, headers=Headers({"content-type": content_type}))
+
+
+async def _read_all(stream) -> bytes:
+    return b"".join([chunk async for chunk in storage.iter_download(stream)])
+
+
+async def _read_range(stream, start: int, end: int) -> bytes:
+    return b"".join([chunk async for chunk in storage.iter_range(stream, start, end)])
+
+
+async def _round_trip(store, data: bytes):
+    stored = await store.save_upload(_upload(data), {"uploader": "user-1", "course_id": 7})
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert stored.length == len(data)
+
+    stream = await store.open_download(stored.file_id)
+    try:
+        assert stream.length == len(data)
+        assert stream.filename == "notes week 1.pdf"
+        assert storage.content_type(stream) == "application/pdf"
+        assert await _read_all(stream) == data
+        # Ranges seek backwards and forwards on the same stream
+        assert await _read_range(stream, len(data) - 10, len(data) - 1) == data[-10:]
+        assert await _read_range(stream, 5, 1004) == data[5:1005]
+    finally:
+        stream.close()
+
+    listed = [entry async for entry in store.iter_files(batch_size=1)]
+    assert [(file_id, length) for file_id, length, _ in listed] == [(stored.file_id, len(data))]
+
+    assert await store.delete_many([stored.file_id]) == 1
+    assert await store.open_download(stored.file_id) is None
+    # Deleting again is harmless, S3 even reports missing keys as deleted
+    await store.delete_many([stored.file_id])
+
+
+@pytest.fixture
+def fs_store(tmp_path):
+    from courses_topics.storage_fs import FileSystemStore
+    return FileSystemStore(root=str(tmp_path))
+
+
+async def test_filesystem_round_trip(fs_store):
+    await _round_trip(fs_store, os.urandom(3 * storage.STORAGE_CHUNK_SIZE + 123))
+
+
+async def test_filesystem_lists_files_in_id_order(fs_store):
+    ids = [(await fs_store.save_upload(_upload(os.urandom(100)), {})).file_id for _ in range(5)]
+    assert [file_id async for file_id, _, _ in fs_store.iter_files(batch_size=2)] == sorted(ids)
+    assert not os.listdir(fs_store.tmp)
+
+
+async def test_filesystem_refuses_ids_outside_the_store(fs_store, tmp_path):
+    # A file with a metadata sidecar next to the store root, like any other readable JSON pair on disk
+    outside = tmp_path.parent / f"{tmp_path.name}-secret"
+    outside.write_bytes(b"secret")
+    (tmp_path.parent / f"{outside.name}.json").write_text("{}")
+    for file_id in (f"../{outside.name}", f"..{os.sep}..{os.sep}{outside.name}", str(outside), "0" * 23 + "G"):
+        assert await fs_store.open_download(file_id) is None
+        assert await fs_store.delete_many([file_id]) == 0
+    assert outside.read_bytes() == b"secret"
+
+
+@pytest.fixture
+def s3_store(monkeypatch):
+    moto = pytest.importorskip("moto")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    from courses_topics import storage_s3
+    # S3 takes nothing smaller for every part but the last
+    monkeypatch.setattr(storage_s3, "S3_PART_SIZE", 5 * 1024 * 1024)
+    with moto.mock_aws():
+        store = storage_s3.S3Store()
+        store.client.create_bucket(Bucket=storage_s3.S3_BUCKET)
+        yield store
+
+
+async def test_s3_round_trip(s3_store):
+    await _round_trip(s3_store, os.urandom(1024 * 1024))
+
+
+async def test_s3_multipart_round_trip(s3_store):
+    # Three parts, the last one short
+    await _round_trip(s3_store, os.urandom(11 * 1024 * 1024 + 5))
+
+
+async def test_s3_refuses_ids_outside_the_prefix(s3_store):
+    from courses_topics import storage_s3
+    s3_store.client.put_object(Bucket=storage_s3.S3_BUCKET, Key="private/report.pdf", Body=b"secret")
+    for file_id in ("../private/report.pdf", "x/../../private/report.pdf"):
+        assert await s3_store.open_download(file_id) is None
+        await s3_store.delete_many([file_id])
+    assert s3_store.client.get_object(Bucket=storage_s3.S3_BUCKET, Key="private/report.pdf")["Body"].read() == b"secret"
+
+
+async def test_s3_tags_the_digest(s3_store):
+    from courses_topics import storage_s3
+    data = os.urandom(2048)
+    stored = await s3_store.save_upload(_upload(data), {"course_id": 7})
+    tags = s3_store.client.get_object_tagging(Bucket=storage_s3.S3_BUCKET, Key=s3_store._key(stored.file_id))
+    assert tags["TagSet"] == [{"Key": "sha256", "Value": hashlib.sha256(data).hexdigest()}]
@@ -0,0 +1,84 @@
+import uuid
+import pytest
+from sqlalchemy import delete, event, insert
+
+
+@pytest.fixture
+def topics_client(postgres_url):
+    """A client for the topics router on a migrated database, with a course of three topics and their contents."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from common.migrations import upgrade_database
+    from courses_topics import models, topics
+    from courses_topics.database import engine, async_engine
+
+    upgrade_database(engine, "courses_topics")
+    with engine.begin() as conn:
+        course_id = conn.execute(insert(models.Courses).values(
+            course_code=f"QC-{uuid.uuid4().hex[:12]}", course_name="Query counts", course_description="Test course",
+            course_created_by="tests", course_updated_by="tests"
+        ).returning(models.Courses.course_id)).scalar()
+        topic_ids = conn.execute(insert(models.Topics).returning(models.Topics.topic_id), [
+            {
+                "topic_name": f"Topic {i}", "topic_description": "Test topic", "course_id": course_id,
+                "topic_is_released": True, "topic_created_by": "tests", "topic_updated_by": "tests"
+            } for i in range(3)
+        ]).scalars().all()
+        conn.execute(insert(models.Contents), [
+            {
+                "course_id": course_id, "topic_id": topic_id, "content_id": uuid.uuid4().hex,
+                "content_name": f"file {i}.pdf", "content_type": "application/pdf",
+                "content_created_by": "tests", "content_updated_by": "tests"
+            } for topic_id in topic_ids for i in range(4)
+        ])
+
+    app = FastAPI()
+    app.include_router(topics.router)
+    try:
+        with TestClient(app) as client:
+            yield client, course_id, topic_ids
+            # The pool's connections belong to the client's event loop
+            client.portal.call(async_engine.dispose)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(delete(models.Contents).where(models.Contents.course_id == course_id))
+            conn.execute(delete(models.Topics).where(models.Topics.course_id == course_id))
+            conn.execute(delete(models.Courses).where(models.Courses.course_id == course_id))
+
+
+@pytest.fixture
+def statements():
+    from courses_topics.database import async_engine
+
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+
+def test_course_topics_take_one_query(topics_client, statements):
+    client, course_id, topic_ids = topics_client
+    # Opens the pool's first connection, whose setup queries are not the endpoint's
+    assert client.get("/topics", params={"mode": "all", "course_id": course_id}).status_code == 200
+    statements.clear()
+
+    response = client.get("/topics", params={"mode": "all", "course_id": course_id})
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 3
+    assert all(len(topic["content_id"]) == 4 for topic in response.json()["data"])
+    assert len(statements) == 1, statements
+
+
+def test_topic_takes_one_query(topics_client, statements):
+    client, course_id, topic_ids = topics_client
+    assert client.get("/topics", params={"topic_id": topic_ids[0]}).status_code == 200
+    statements.clear()
+
+    response = client.get("/topics", params={"topic_id": topic_ids[1]})
+    assert response.status_code == 200
+    assert [topic["topic_id"] for topic in response.json()["data"]] == [topic_ids[1]]
+    assert len(statements) == 1, statements
@@ -0,0 +1,51 @@
+import pytest
+from common.ttl_cache import TTLCache
+
+
+def test_evicted_tag_refuses_values_loaded_before():
+    cache = TTLCache(maxsize=10)
+    seen = cache.generation(("course-1",))
+    cache.evict_tag("course-1")
+    assert cache.set("name", "stale", tags=("course-1",), generation=seen) is False
+    assert cache.set("name", "fresh", tags=("course-1",), generation=cache.generation(("course-1",))) is True
+    assert cache.get("name") == "fresh"
+
+
+def test_generations_stay_within_maxsize():
+    cache = TTLCache(maxsize=10)
+    for course_id in range(1000):
+        seen = cache.generation((course_id,))
+        cache.set(("name", course_id), "name", tags=(course_id,), generation=seen)
+        cache.evict_tag(course_id)
+    assert len(cache._generations) <= 10 and len(cache) == 0
+
+
+def test_dropped_generation_never_matches_again():
+    cache = TTLCache(maxsize=2)
+    seen = cache.generation(("course-1",))
+    # Pushed out by newer tags, then evicted while the load was in flight
+    cache.generation(("course-2",))
+    cache.generation(("course-3",))
+    cache.evict_tag("course-1")
+    cache.generation(("course-1",))
+    assert cache.set("name", "stale", tags=("course-1",), generation=seen) is False
+
+
+@pytest.mark.anyio
+async def test_memory_backend_versions_stay_bounded_and_bump(postgres_url):
+    # Imports the courses_topics database module, which needs POSTGRES_URL
+    from courses_topics.response_cache import MemoryBackend
+
+    backend = MemoryBackend(maxsize=10, ttl=60)
+    _, versions = await backend.lookup("topic:1", ("topic:1",))
+    await backend.store("topic:1", [list(versions), "loaded"], 60)
+    assert await backend.lookup("topic:1", ("topic:1",)) == ([list(versions), "loaded"], versions)
+
+    backend._bump_local(("topic:1",))
+    entry, current = await backend.lookup("topic:1", ("topic:1",))
+    assert tuple(entry[0]) != current
+
+    for topic_id in range(1000):
+        await backend.lookup(f"topic:{topic_id}", (f"topic:{topic_id}",))
+        backend._bump_local((f"topic:{topic_id}",))
+    assert len(backend._entries._generations) <= 10
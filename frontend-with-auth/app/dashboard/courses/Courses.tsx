@@ -23,6 +23,7 @@ import { useRouter } from "next/navigation";
 import axios from "axios";
 import { useSession } from "next-auth/react";
 import { API_BASE_URL } from "@/app/constants";
+import { appendPage, getPage, LoadMoreButton } from "@/app/pagination";
 
 interface props {
   role: string;
@@ -39,15 +40,6 @@ interface Course {
   course_updated_timestamp: string;
 }
 
-interface CourseResponse {
-  data: {
-    status: string;
-    message: string;
-    data: Course[];
-    timestamp: string;
-  };
-}
-
 const Courses = ({ role }: props) => {
   const router = useRouter();
   const toast = useToast();
@@ -69,6 +61,8 @@ const Courses = ({ role }: props) => {
   const [courseToEdit, setCourseToEdit] = useState<Course | null>(null);
   const [courseToDelete, setCourseToDelete] = useState<number | null>(null);
   const [courseData, setCourseData] = useState<Course[] | null>(null);
+  const [courseCursor, setCourseCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const handleClick = (course_id: number) => {
     router.push(`/dashboard/courses/${course_id}`);
@@ -209,19 +203,25 @@ const Courses = ({ role }: props) => {
 
   const bg = useColorModeValue("neutral.500", "neutral.50._dark");
 
-  async function getCourses() {
+  async function getCourses(cursor?: string) {
+    setLoadingMore(!!cursor);
     try {
-      const response = await axios.get<CourseResponse>(
+      const { items, nextCursor } = await getPage<Course>(
         `${API_BASE_URL}course?mode=all`,
         {
           headers: {
             Authorization: `Bearer ${sessionData?.idToken}`,
           },
-        }
+        },
+        (data) => data,
+        cursor
       );
-      setCourseData(response?.data?.data as unknown as Course[]);
+      setCourseData((prev) => appendPage(prev, items, cursor));
+      setCourseCursor(nextCursor);
     } catch (error) {
       console.error(error);
+    } finally {
+      setLoadingMore(false);
     }
   }
 
@@ -305,6 +305,12 @@ const Courses = ({ role }: props) => {
           </Box>
         ))}
       </Flex>
+      <LoadMoreButton
+        nextCursor={courseCursor}
+        loading={loadingMore}
+        onLoadMore={getCourses}
+        label="Load more courses"
+      />
 
       <Modal isOpen={isDeleteModalOpen} onClose={onDeleteModalClose}>
         <ModalOverlay />
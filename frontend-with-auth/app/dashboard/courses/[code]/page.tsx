@@ -31,6 +31,7 @@ import QuizNavigation from "./QuizNavigation";
 import DiscussionNavigation from "./DiscussionNavigation";
 import CreateTopicModal from "./AddTopicsModal"; // Import the modal
 import { API_BASE_URL } from "@/app/constants";
+import { appendPage, getPage, LoadMoreButton } from "@/app/pagination";
 import PDFViewer from "@/app/components/PDFViewer";
 import { ChevronLeftIcon } from "@chakra-ui/icons";
 import { useRouter } from "next/navigation";
@@ -67,6 +68,8 @@ const CourseDetails = ({ params: { code } }: Props) => {
 
   const [loadingCourse, setLoadingCourse] = useState(false);
   const [loadingTopics, setLoadingTopics] = useState(false);
+  const [topicCursor, setTopicCursor] = useState<string | null>(null);
+  const [loadingMoreTopics, setLoadingMoreTopics] = useState(false);
   const [loadingContent, setLoadingContent] = useState(false);
 
   const [isCreateTopicModalOpen, setCreateTopicModalOpen] = useState(false);
@@ -114,23 +117,22 @@ const CourseDetails = ({ params: { code } }: Props) => {
   }, []);
 
   // Fetch topics
-  const fetchTopics = async () => {
-    setLoadingTopics(true);
+  const fetchTopics = async (cursor?: string) => {
+    const setLoading = cursor ? setLoadingMoreTopics : setLoadingTopics;
+    setLoading(true);
     try {
-      const response = await axios.get(API_BASE_URL + "topics?mode=all", {
+      const { items, nextCursor } = await getPage(API_BASE_URL + "topics?mode=all", {
         params: { course_id: code },
         headers: {
           Authorization: `Bearer ${sessionData?.idToken}`,
         },
-      });
-      const data = response.data;
-      if (data.status === "success") {
-        setTopics(data.data);
-      }
+      }, (data) => data, cursor);
+      setTopics((prev) => appendPage(prev, items, cursor));
+      setTopicCursor(nextCursor);
     } catch (error) {
       console.error("Error fetching topics:", error);
     } finally {
-      setLoadingTopics(false);
+      setLoading(false);
     }
   };
 
@@ -185,7 +187,7 @@ const CourseDetails = ({ params: { code } }: Props) => {
           Authorization: `Bearer ${sessionData?.idToken}`,
         },
       });
-      if (response.status === 204) {
+      if (response.status === 202 || response.status === 204) {
         setTopics((prevTopics) =>
           prevTopics.filter((topic) => topic.topic_id !== topicToDelete)
         );
@@ -396,6 +398,12 @@ const CourseDetails = ({ params: { code } }: Props) => {
             ) : (
               <Text>No topics available.</Text>
             )}
+            <LoadMoreButton
+              nextCursor={topicCursor}
+              loading={loadingMoreTopics}
+              onLoadMore={fetchTopics}
+              label="Load more topics"
+            />
           </Box>
         </GridItem>
 
@@ -31,13 +31,15 @@ import React, { useEffect, useState } from "react";
 import axios from "axios";
 import { API_BASE_URL, API_QUIZ_BASE_URL } from "@/app/constants";
 import { DUMMY_QUIZZES } from "@/app/constants";
+import { appendPage, getPage, LoadMoreButton } from "@/app/pagination";
 import BasicDetails from "./BasicDetails";
 import { useRouter } from "next/navigation";
 import { ChevronLeftIcon } from "@chakra-ui/icons";
 
 interface Course {
   course_id: number;
-  course_name: string;
+  // null once the course has been deleted, its scores are still listed
+  course_name: string | null;
   course_description: string;
   course_code: string;
   quiz_details: QuizDetails[];
@@ -65,6 +67,8 @@ const ProfilePage = () => {
   const [courses, setCourses] = useState<Course[]>([]);
   const [quizData, setQuizData] = useState<Course[]>([]);
   const [loadingCourses, setLoadingCourses] = useState(false);
+  const [courseCursor, setCourseCursor] = useState<string | null>(null);
+  const [loadingMoreCourses, setLoadingMoreCourses] = useState(false);
 
   const history = useRouter();
   const role = sessionData?.user?.role; // Role can be 'student' or 'teacher'
@@ -94,17 +98,17 @@ const ProfilePage = () => {
     }
   };
 
-  const fetchCourses = async () => {
-    setLoadingCourses(true);
+  const fetchCourses = async (cursor?: string) => {
+    const setLoading = cursor ? setLoadingMoreCourses : setLoadingCourses;
+    setLoading(true);
     try {
-      const response = await axios.get(API_BASE_URL + "course?mode=all", {
+      const { items, nextCursor } = await getPage<Course>(API_BASE_URL + "course?mode=all", {
         headers: {
           Authorization: `Bearer ${sessionData?.idToken}`,
         },
-      });
-      if (response.status === 200) {
-        setCourses(response.data.data);
-      }
+      }, (data) => data, cursor);
+      setCourses((prev) => appendPage(prev, items, cursor));
+      setCourseCursor(nextCursor);
     } catch (error) {
       console.error("Error fetching courses:", error);
       toast({
@@ -116,7 +120,7 @@ const ProfilePage = () => {
         position: "top",
       });
     } finally {
-      setLoadingCourses(false);
+      setLoading(false);
     }
   };
 
@@ -258,7 +262,7 @@ const ProfilePage = () => {
                       size="md"
                       color={isDarkMode ? "_dark.300" : "primary.900"}
                     >
-                      {course.course_name}
+                      {course.course_name ?? "Deleted course"}
                     </Heading>
                     <Divider my={4} />
                     <Heading
@@ -288,6 +292,12 @@ const ProfilePage = () => {
               ))}
             </SimpleGrid>
           )}
+          <LoadMoreButton
+            nextCursor={courseCursor}
+            loading={loadingMoreCourses}
+            onLoadMore={fetchCourses}
+            label="Load more courses"
+          />
         </Box>
       </Flex>
       <Box
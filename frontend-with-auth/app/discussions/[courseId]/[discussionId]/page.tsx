@@ -24,6 +24,7 @@ import Post from "./Post";
 import { useSession } from "next-auth/react";
 import axios from "axios";
 import { API_DISCUSSION_BASE_URL } from "@/app/constants";
+import { appendPage, getPage, LoadMoreButton } from "@/app/pagination";
 import { jwtDecode } from "jwt-decode";
 import { ChevronLeftIcon } from "@chakra-ui/icons";
 import { useRouter } from "next/navigation";
@@ -53,17 +54,6 @@ interface Post {
   // vote_count: number;
 }
 
-interface CommentResponse {
-  data: {
-    CommentData: unknown;
-    PostData: unknown;
-    status: string;
-    message: string;
-    data: Comment[];
-    timestamp: string;
-  };
-}
-
 const DiscussionDetails = ({ params: { courseId, discussionId } }: Props) => {
   const bg = useColorModeValue("neutral.500", "neutral.50._dark");
   const { data: sessionData, status } = useSession();
@@ -87,6 +77,8 @@ const DiscussionDetails = ({ params: { courseId, discussionId } }: Props) => {
   const [commentToEdit, setCommentToEdit] = useState<Comment | null>(null);
   const [commentToDelete, setCommentToDelete] = useState<number | null>(null);
   const [commentData, setCommentData] = useState<Comment[] | null>(null);
+  const [commentCursor, setCommentCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [postData, setPostData] = useState<Post[] | null>(null);
 
   const handleEdit = (comment: Comment) => {
@@ -226,21 +218,28 @@ const DiscussionDetails = ({ params: { courseId, discussionId } }: Props) => {
     if (sessionData) getComments();
   }, [sessionData]);
 
-  async function getComments() {
+  async function getComments(cursor?: string) {
+    setLoadingMore(!!cursor);
     try {
-      const response = await axios.get<CommentResponse>(
+      // Comments come a page at a time, the post itself is on every page
+      const { items, data, nextCursor } = await getPage<Comment>(
         `${API_DISCUSSION_BASE_URL}courses/${courseId}/discussions/${discussionId}`,
         {
           headers: {
             Authorization: `Bearer ${sessionData?.idToken}`,
           },
-        }
+        },
+        (data) => data?.CommentData,
+        cursor
       );
-      setCommentData(response?.data?.data?.CommentData as unknown as Comment[]);
-      setPostData(response?.data?.data?.PostData as unknown as Post[]);
+      setCommentData((prev) => appendPage(prev, items, cursor));
+      setCommentCursor(nextCursor);
+      setPostData(data?.PostData as unknown as Post[]);
       // console.log({postData?.map((post) => {JSON.stringify(post)})
     } catch (error) {
       console.error(error);
+    } finally {
+      setLoadingMore(false);
     }
   }
   if (!courseId || !discussionId || status === "unauthenticated")
@@ -339,6 +338,12 @@ const DiscussionDetails = ({ params: { courseId, discussionId } }: Props) => {
           // </Box>
         ))}
       </Flex>
+      <LoadMoreButton
+        nextCursor={commentCursor}
+        loading={loadingMore}
+        onLoadMore={getComments}
+        label="Load more comments"
+      />
       <Button mt={5} colorScheme="teal" onClick={onOpen} mb={6}>
         Reply to Post
       </Button>
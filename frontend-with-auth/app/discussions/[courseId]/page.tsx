@@ -25,6 +25,7 @@ import { useRouter } from "next/navigation";
 import { useSession } from "next-auth/react";
 import axios from "axios";
 import { API_DISCUSSION_BASE_URL } from "@/app/constants";
+import { appendPage, getPage, LoadMoreButton } from "@/app/pagination";
 import { ChevronLeftIcon } from "@chakra-ui/icons";
 import { jwtDecode } from "jwt-decode";
 
@@ -41,15 +42,6 @@ interface Post {
   // vote_count: number;
 }
 
-interface PostResponse {
-  data: {
-    status: string;
-    message: string;
-    data: Post[];
-    timestamp: string;
-  };
-}
-
 const Posts = ({ params: { courseId } }: Props) => {
   const { data: sessionData, status } = useSession();
   const router = useRouter();
@@ -69,6 +61,8 @@ const Posts = ({ params: { courseId } }: Props) => {
   // const [postToVote, setPostToVote] = useState<Post | null>(null);
   const [postToDelete, setPostToDelete] = useState<number | null>(null);
   const [postData, setPostData] = useState<Post[]>([]);
+  const [postCursor, setPostCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const {
     isOpen: isDeleteModalOpen,
     onOpen: onDeleteModalOpen,
@@ -225,19 +219,25 @@ const Posts = ({ params: { courseId } }: Props) => {
     }
   }, [sessionData]);
 
-  async function getPosts() {
+  async function getPosts(cursor?: string) {
+    setLoadingMore(!!cursor);
     try {
-      const response = await axios.get<PostResponse>(
+      const { items, nextCursor } = await getPage<Post>(
         `${API_DISCUSSION_BASE_URL}courses/${courseId}/discussions`,
         {
           headers: {
             Authorization: `Bearer ${sessionData?.idToken}`,
           },
-        }
+        },
+        (data) => data,
+        cursor
       );
-      setPostData(response?.data?.data as unknown as Post[]);
+      setPostData((prev) => appendPage(prev, items, cursor));
+      setPostCursor(nextCursor);
     } catch (error) {
       console.error(error);
+    } finally {
+      setLoadingMore(false);
     }
   }
 
@@ -335,6 +335,12 @@ const Posts = ({ params: { courseId } }: Props) => {
             </Center>
           )}
         </Flex>
+        <LoadMoreButton
+          nextCursor={postCursor}
+          loading={loadingMore}
+          onLoadMore={getPosts}
+          label="Load more posts"
+        />
 
         <Modal isOpen={isDeleteModalOpen} onClose={onDeleteModalClose}>
           <ModalOverlay />
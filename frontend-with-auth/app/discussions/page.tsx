@@ -13,7 +13,7 @@ import {
   Badge,
   Center,
 } from "@chakra-ui/react";
-import axios from "axios";
+import { appendPage, getPage, LoadMoreButton } from "../pagination";
 import { API_BASE_URL } from "../constants";
 import { useSession } from "next-auth/react";
 import { FaBook } from "react-icons/fa";
@@ -29,17 +29,10 @@ interface Course {
   course_updated_timestamp: string;
 }
 
-interface CourseResponse {
-  data: {
-    status: string;
-    message: string;
-    data: Course[];
-    timestamp: string;
-  };
-}
-
 const DiscussionHomePage = () => {
   const [courseData, setCourseData] = useState<Course[]>([]);
+  const [courseCursor, setCourseCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const router = useRouter();
   const { data: sessionData, status } = useSession();
 
@@ -47,19 +40,25 @@ const DiscussionHomePage = () => {
     if (sessionData) getCourses();
   }, [sessionData]);
 
-  async function getCourses() {
+  async function getCourses(cursor?: string) {
+    setLoadingMore(!!cursor);
     try {
-      const response = await axios.get<CourseResponse>(
+      const { items, nextCursor } = await getPage<Course>(
         `${API_BASE_URL}course?mode=all`,
         {
           headers: {
             Authorization: `Bearer ${sessionData?.idToken}`,
           },
-        }
+        },
+        (data) => data,
+        cursor
       );
-      setCourseData(response?.data?.data as unknown as Course[]);
+      setCourseData((prev) => appendPage(prev, items, cursor));
+      setCourseCursor(nextCursor);
     } catch (error) {
       console.error(error);
+    } finally {
+      setLoadingMore(false);
     }
   }
 
@@ -123,6 +122,12 @@ const DiscussionHomePage = () => {
           </Text>
         </Center>
       )}
+      <LoadMoreButton
+        nextCursor={courseCursor}
+        loading={loadingMore}
+        onLoadMore={getCourses}
+        label="Load more courses"
+      />
     </Box>
   );
 };
@@ -16,6 +16,7 @@ import {
 import axios from "axios";
 import { useSession } from "next-auth/react";
 import { API_BASE_URL } from "../constants";
+import { appendPage, getAllPages, getPage, LoadMoreButton } from "../pagination";
 import { User } from "@prisma/client";
 import { useRouter } from "next/navigation";
 
@@ -41,6 +42,8 @@ const StudentEnrollment = () => {
   }
 
   const [courseData, setCourseData] = useState<Course[] | null>(null);
+  const [courseCursor, setCourseCursor] = useState<string | null>(null);
+  const [loadingCourses, setLoadingCourses] = useState(false);
   const [usersData, setUsersData] = useState<User[] | null>(null);
   const [enrolledUsers, setEnrolledUsers] = useState<string[]>([]);
   const [selectedCourse, setSelectedCourse] = useState<number | null>(null);
@@ -63,16 +66,20 @@ const StudentEnrollment = () => {
     }
   }, [selectedCourse]);
 
-  async function getCourses() {
+  async function getCourses(cursor?: string) {
+    setLoadingCourses(true);
     try {
-      const response = await axios.get(`${API_BASE_URL}course?mode=all`, {
+      const { items, nextCursor } = await getPage<Course>(`${API_BASE_URL}course?mode=all`, {
         headers: {
           Authorization: `Bearer ${sessionData?.idToken}`,
         },
-      });
-      setCourseData(response.data.data);
+      }, (data) => data, cursor);
+      setCourseData((prev) => appendPage(prev, items, cursor));
+      setCourseCursor(nextCursor);
     } catch (error) {
       console.error("Error fetching courses:", error);
+    } finally {
+      setLoadingCourses(false);
     }
   }
 
@@ -88,13 +95,14 @@ const StudentEnrollment = () => {
   async function getEnrolledUsers() {
     setLoading(true);
     try {
-      const response = await axios.get(`${API_BASE_URL}enrolledUsers`, {
+      // Saving posts the whole list back and drops anyone missing, so every page is needed
+      const { items } = await getAllPages(`${API_BASE_URL}enrolledUsers`, {
         params: { course_id: selectedCourse },
         headers: {
           Authorization: `Bearer ${sessionData?.idToken}`,
         },
-      });
-      setEnrolledUsers(response.data.data.users);
+      }, (data) => data.users);
+      setEnrolledUsers(items);
     } catch (error) {
       console.error("Error fetching enrolled users:", error);
     } finally {
@@ -169,6 +177,12 @@ const StudentEnrollment = () => {
           </option>
         ))}
       </Select>
+      <LoadMoreButton
+        nextCursor={courseCursor}
+        loading={loadingCourses}
+        onLoadMore={getCourses}
+        label="Load more courses"
+      />
 
       {/* User Selection */}
       {loading ? (
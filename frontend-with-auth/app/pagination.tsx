@@ -0,0 +1,68 @@
+import axios, { AxiosRequestConfig } from "axios";
+import { Button, Flex } from "@chakra-ui/react";
+
+// List endpoints return one page at a time with a next_cursor beside the data,
+// null on the last page. Pass it back as cursor to get the page after.
+export async function getPage<T>(
+  url: string,
+  config: AxiosRequestConfig,
+  pick: (data: any) => T[],
+  cursor?: string | null
+): Promise<{ items: T[]; data: any; nextCursor: string | null }> {
+  const response = await axios.get(url, {
+    ...config,
+    params: { ...config.params, ...(cursor ? { cursor } : {}) },
+  });
+  return {
+    items: pick(response.data.data) || [],
+    data: response.data.data,
+    nextCursor: response.data.next_cursor || null,
+  };
+}
+
+// Follows next_cursor to the last page. Only for callers that need the whole list
+// at once, lists shown to the user load a page at a time with LoadMoreButton.
+export async function getAllPages<T>(
+  url: string,
+  config: AxiosRequestConfig,
+  pick: (data: any) => T[]
+): Promise<{ items: T[]; data: any }> {
+  let page = await getPage(url, config, pick);
+  const first = page.data;
+  const items: T[] = [...page.items];
+  while (page.nextCursor) {
+    page = await getPage(url, config, pick, page.nextCursor);
+    items.push(...page.items);
+  }
+  return { items, data: first };
+}
+
+// Appends a page to what is already shown, or starts over without a cursor
+export function appendPage<T>(shown: T[] | null, page: T[], cursor?: string | null): T[] {
+  return cursor && shown ? [...shown, ...page] : page;
+}
+
+export function LoadMoreButton({
+  nextCursor,
+  loading,
+  onLoadMore,
+  label = "Load more",
+}: {
+  nextCursor: string | null;
+  loading?: boolean;
+  onLoadMore: (cursor: string) => void;
+  label?: string;
+}) {
+  if (!nextCursor) return null;
+  return (
+    <Flex justifyContent="center" mt={4}>
+      <Button
+        variant="outline"
+        isLoading={loading}
+        onClick={() => onLoadMore(nextCursor)}
+      >
+        {label}
+      </Button>
+    </Flex>
+  );
+}
@@ -29,9 +29,9 @@ import {
 } from "@chakra-ui/react";
 import { FiPlusCircle } from "react-icons/fi";
 import { useSession } from "next-auth/react";
-import axios from "axios";
 import { useRouter } from "next/navigation";
 import { API_QUIZ_BASE_URL, API_BASE_URL } from "../constants";
+import { appendPage, getPage, LoadMoreButton } from "../pagination";
 
 interface Course {
   course_id: number;
@@ -49,9 +49,13 @@ const QuizHomePage = () => {
   const { data: sessionData, status } = useSession();
   const role = sessionData?.user.role;
   const [courseData, setCourseData] = useState<Course[] | null>(null);
+  const [courseCursor, setCourseCursor] = useState<string | null>(null);
   const [quizData, setQuizData] = useState<Record<number, Quiz[]>>({});
+  const [quizCursors, setQuizCursors] = useState<Record<number, string | null>>({});
   const [loadingCourses, setLoadingCourses] = useState(false);
+  const [loadingMoreCourses, setLoadingMoreCourses] = useState(false);
   const [loadingQuizzes, setLoadingQuizzes] = useState<number | null>(null);
+  const [loadingMoreQuizzes, setLoadingMoreQuizzes] = useState<number | null>(null);
   const [selectedQuiz, setSelectedQuiz] = useState<Quiz | null>(null);
   const { isOpen, onOpen, onClose } = useDisclosure();
   const router = useRouter();
@@ -64,15 +68,17 @@ const QuizHomePage = () => {
     fetchCourses();
   }, []);
 
-  const fetchCourses = async () => {
-    setLoadingCourses(true);
+  const fetchCourses = async (cursor?: string) => {
+    const setLoading = cursor ? setLoadingMoreCourses : setLoadingCourses;
+    setLoading(true);
     try {
-      const response = await axios.get(`${API_BASE_URL}course?mode=all`, {
+      const { items, nextCursor } = await getPage<Course>(`${API_BASE_URL}course?mode=all`, {
         headers: {
           Authorization: `Bearer ${sessionData?.idToken}`,
         },
-      });
-      setCourseData(response.data.data);
+      }, (data) => data, cursor);
+      setCourseData((prev) => appendPage(prev, items, cursor));
+      setCourseCursor(nextCursor);
     } catch (error) {
       console.error(error);
       toast({
@@ -84,32 +90,36 @@ const QuizHomePage = () => {
         isClosable: true,
       });
     } finally {
-      setLoadingCourses(false);
+      setLoading(false);
     }
   };
 
   const fetchQuizzesByCourse = useCallback(
-    async (courseId: number) => {
-      if (quizData[courseId]) return;
+    async (courseId: number, cursor?: string) => {
+      if (quizData[courseId] && !cursor) return;
 
-      setLoadingQuizzes(courseId);
+      const setLoading = cursor ? setLoadingMoreQuizzes : setLoadingQuizzes;
+      setLoading(courseId);
       try {
-        const response = await axios.get(
+        const { items, nextCursor } = await getPage<Quiz>(
           `${API_QUIZ_BASE_URL}get-quiz-course/${courseId}`,
           {
             headers: {
               Authorization: `Bearer ${sessionData?.idToken}`,
             },
-          }
+          },
+          (data) => data,
+          cursor
         );
         setQuizData((prev) => ({
           ...prev,
-          [courseId]: response.data.data,
+          [courseId]: appendPage(prev[courseId] || null, items, cursor),
         }));
+        setQuizCursors((prev) => ({ ...prev, [courseId]: nextCursor }));
       } catch (error) {
         console.error(error);
       } finally {
-        setLoadingQuizzes(null);
+        setLoading(null);
       }
     },
     [quizData, sessionData?.idToken]
@@ -143,66 +153,80 @@ const QuizHomePage = () => {
       {loadingCourses ? (
         <Skeleton height="20px" mb={4} />
       ) : courseData ? (
-        <Accordion allowMultiple>
-          {courseData.map((course) => (
-            <AccordionItem key={course.course_id}>
-              <h2>
-                <AccordionButton
-                  p="5"
-                  fontSize="lg"
-                  onClick={() => fetchQuizzesByCourse(course.course_id)}
-                >
-                  <Box flex="1" textAlign="left">
-                    {course.course_name} - {course.course_code}
-                  </Box>
-                  <AccordionIcon />
-                </AccordionButton>
-              </h2>
-              <AccordionPanel p={4}>
-                <Flex justify="space-between" align="center">
-                  <Box flex="1">
-                    {loadingQuizzes === course.course_id ? (
-                      <Skeleton height="40px" />
-                    ) : (
-                      <VStack align="start" spacing={3}>
-                        <List spacing={2}>
-                          {quizData[course.course_id]?.length ? (
-                            quizData[course.course_id].map((quiz) => (
-                              <ListItem key={quiz.quiz_id}>
-                                <Button
-                                  variant="link"
-                                  fontSize="md"
-                                  colorScheme="teal"
-                                  onClick={() => {
-                                    setSelectedQuiz(quiz);
-                                    onOpen();
-                                  }}
-                                >
-                                  {quiz.quiz_description}
-                                </Button>
-                              </ListItem>
-                            ))
-                          ) : (
-                            <Text>No quizzes available for this course.</Text>
-                          )}
-                        </List>
-                      </VStack>
+        <>
+          <Accordion allowMultiple>
+            {courseData.map((course) => (
+              <AccordionItem key={course.course_id}>
+                <h2>
+                  <AccordionButton
+                    p="5"
+                    fontSize="lg"
+                    onClick={() => fetchQuizzesByCourse(course.course_id)}
+                  >
+                    <Box flex="1" textAlign="left">
+                      {course.course_name} - {course.course_code}
+                    </Box>
+                    <AccordionIcon />
+                  </AccordionButton>
+                </h2>
+                <AccordionPanel p={4}>
+                  <Flex justify="space-between" align="center">
+                    <Box flex="1">
+                      {loadingQuizzes === course.course_id ? (
+                        <Skeleton height="40px" />
+                      ) : (
+                        <VStack align="start" spacing={3}>
+                          <List spacing={2}>
+                            {quizData[course.course_id]?.length ? (
+                              quizData[course.course_id].map((quiz) => (
+                                <ListItem key={quiz.quiz_id}>
+                                  <Button
+                                    variant="link"
+                                    fontSize="md"
+                                    colorScheme="teal"
+                                    onClick={() => {
+                                      setSelectedQuiz(quiz);
+                                      onOpen();
+                                    }}
+                                  >
+                                    {quiz.quiz_description}
+                                  </Button>
+                                </ListItem>
+                              ))
+                            ) : (
+                              <Text>No quizzes available for this course.</Text>
+                            )}
+                          </List>
+                          <LoadMoreButton
+                            nextCursor={quizCursors[course.course_id] || null}
+                            loading={loadingMoreQuizzes === course.course_id}
+                            onLoadMore={(cursor) => fetchQuizzesByCourse(course.course_id, cursor)}
+                            label="Load more quizzes"
+                          />
+                        </VStack>
+                      )}
+                    </Box>
+                    {role === "teacher" && (
+                      <Button
+                        leftIcon={<Icon as={FiPlusCircle} />}
+                        colorScheme="teal"
+                        onClick={() => handleCreateQuiz(course.course_id)}
+                      >
+                        Create New Quiz
+                      </Button>
                     )}
-                  </Box>
-                  {role === "teacher" && (
-                    <Button
-                      leftIcon={<Icon as={FiPlusCircle} />}
-                      colorScheme="teal"
-                      onClick={() => handleCreateQuiz(course.course_id)}
-                    >
-                      Create New Quiz
-                    </Button>
-                  )}
-                </Flex>
-              </AccordionPanel>
-            </AccordionItem>
-          ))}
-        </Accordion>
+                  </Flex>
+                </AccordionPanel>
+              </AccordionItem>
+            ))}
+          </Accordion>
+          <LoadMoreButton
+            nextCursor={courseCursor}
+            loading={loadingMoreCourses}
+            onLoadMore={fetchCourses}
+            label="Load more courses"
+          />
+        </>
       ) : (
         <Text>No courses available.</Text>
       )}